@@ -2,6 +2,14 @@ from flask import Flask, jsonify, request
 from flask_cors import CORS
 from BackEnd.config import config_by_name
 from BackEnd.utils.database import Database
+from BackEnd.services.password_service import PasswordService
+from BackEnd.services.rate_limiter import RateLimiter
+from BackEnd.services.write_behind import WriteBehindBuffer
+from BackEnd.services.maintenance_scheduler import MaintenanceScheduler
+from BackEnd.services.idempotency import IdempotencyStore
+from BackEnd.services.cache_invalidation import InvalidationChannel
+from BackEnd.services.email_service import EmailService
+from BackEnd.services.email_outbox_worker import EmailOutboxWorker
 from BackEnd.routes.auth import init_auth_routes
 from BackEnd.routes.pricing import init_pricing_routes
 from BackEnd.routes.order import init_order_routes
@@ -29,14 +37,23 @@ def create_app(config_name='development'):
     app.config.from_object(config)
     config.init_app(app)
     
+    # Password hashing runs on a bounded worker pool, forked first while
+    # this process has no other threads or open connections
+    PasswordService.configure(
+        rounds=config.BCRYPT_ROUNDS,
+        workers=config.PASSWORD_HASH_WORKERS,
+        max_queue=config.PASSWORD_HASH_MAX_QUEUE,
+        timeout=config.PASSWORD_HASH_TIMEOUT
+    )
+    
     # Enable CORS - SIMPLIFIED AND FIXED
     CORS(app, 
          resources={
              r"/*": {
                  "origins": ["*","https://marvelous-brigadeiros-4a14c8.netlify.app/"],  # Allow all origins for now
                  "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-                 "allow_headers": ["Content-Type", "Authorization", "Accept", "X-Requested-With"],
-                 "expose_headers": ["Content-Type", "Authorization"],
+                 "allow_headers": ["Content-Type", "Authorization", "Accept", "X-Requested-With", "Idempotency-Key", "Last-Event-ID"],
+                 "expose_headers": ["Content-Type", "Authorization", "Idempotent-Replayed"],
                  "supports_credentials": False,  # Changed to False when using "*"
                  "max_age": 3600
              }
@@ -45,6 +62,7 @@ def create_app(config_name='development'):
     # Initialize database
     try:
         Database.initialize(config)
+        Database.init_app(app)
         logger.info("Database initialized successfully")
         
         # Initialize pricing database
@@ -52,10 +70,61 @@ def create_app(config_name='development'):
         initialize_pricing_database()
         logger.info("Pricing database initialized successfully")
         
+        # Initialize email outbox
+        from BackEnd.setup_email_db import initialize_email_database
+        initialize_email_database()
+        
+        # Initialize auth tables (refresh token rotation); the token digest
+        # backfill runs from setup_auth_db.py and the maintenance scheduler
+        from BackEnd.setup_auth_db import initialize_auth_database
+        initialize_auth_database()
+        
+        # Initialize idempotency keys (order creation retries)
+        from BackEnd.setup_idempotency_db import initialize_idempotency_database
+        initialize_idempotency_database()
+        
+        # Typed order metadata columns; older orders are backfilled from
+        # their notes by setup_orders_db.py and the maintenance scheduler
+        from BackEnd.setup_orders_db import add_order_metadata_columns
+        add_order_metadata_columns()
+        
+        # Initialize order status event log
+        from BackEnd.setup_order_events_db import initialize_order_events_database
+        initialize_order_events_database()
+        
+        # Initialize order statistics rollup
+        from BackEnd.setup_order_stats_db import initialize_order_stats_database
+        initialize_order_stats_database()
+        
     except Exception as e:
         logger.error(f"Failed to initialize database: {e}")
         raise
     
+    # Batched login_attempts / user_sessions inserts
+    WriteBehindBuffer.configure(
+        enabled=config.WRITE_BEHIND_ENABLED,
+        batch_size=config.WRITE_BEHIND_BATCH_SIZE,
+        flush_seconds=config.WRITE_BEHIND_FLUSH_SECONDS,
+        max_pending=config.WRITE_BEHIND_MAX_PENDING
+    )
+    
+    # Cross-worker cache invalidation (no-op without SHARED_STORE_URL)
+    InvalidationChannel.configure(config.SHARED_STORE_URL)
+    
+    # Login lockout and OTP limits
+    RateLimiter.configure(config)
+    IdempotencyStore.configure(config)
+    
+    # Start the email outbox workers
+    if config.EMAIL_OUTBOX_ENABLED:
+        EmailOutboxWorker.configure(EmailService(config), config)
+        EmailOutboxWorker.start()
+    
+    # Start the cleanup scheduler (only the elected worker runs jobs)
+    if config.MAINTENANCE_ENABLED:
+        MaintenanceScheduler.configure(config)
+        MaintenanceScheduler.start()
+    
     # Create upload folder if it doesn't exist
     if not os.path.exists(config.UPLOAD_FOLDER):
         os.makedirs(config.UPLOAD_FOLDER)
@@ -107,6 +176,40 @@ def create_app(config_name='development'):
                 'error': str(e)
             }), 503
     
+    # Connection pool metrics endpoint
+    @app.route('/health/db-pool', methods=['GET', 'OPTIONS'])
+    def db_pool_stats():
+        """Connection pool settings, checkout counters and wait histogram"""
+        if request.method == 'OPTIONS':
+            return '', 204
+        
+        return jsonify(Database.get_pool_stats()), 200
+    
+    # Email outbox backlog endpoint
+    @app.route('/health/email-outbox', methods=['GET', 'OPTIONS'])
+    def email_outbox_stats():
+        """Queued/sent/failed email counts"""
+        if request.method == 'OPTIONS':
+            return '', 204
+        
+        from BackEnd.models.email_outbox import EmailOutbox
+        return jsonify({
+            'enabled': config.EMAIL_OUTBOX_ENABLED,
+            'counts': EmailOutbox.get_status_counts()
+        }), 200
+    
+    # Maintenance scheduler endpoint
+    @app.route('/health/maintenance', methods=['GET', 'OPTIONS'])
+    def maintenance_status():
+        """Leader status and the last cleanup run of this worker"""
+        if request.method == 'OPTIONS':
+            return '', 204
+        
+        return jsonify({
+            'enabled': config.MAINTENANCE_ENABLED,
+            **MaintenanceScheduler.get_status()
+        }), 200
+    
     # Root endpoint
     @app.route('/', methods=['GET', 'OPTIONS'])
     def index():
@@ -120,11 +223,15 @@ def create_app(config_name='development'):
             'cors': 'enabled',
             'endpoints': {
                 'health': '/health',
+                'db_pool': '/health/db-pool',
+                'email_outbox': '/health/email-outbox',
+                'maintenance': '/health/maintenance',
                 'auth': {
                     'send_otp': '/api/send-otp',
                     'verify_otp': '/api/verify-otp',
                     'register': '/api/register',
                     'login': '/api/login',
+                    'refresh_token': '/api/token/refresh',
                 },
                 'user': {
                     'get_profile': '/api/user/<id>',
@@ -147,11 +254,16 @@ def create_app(config_name='development'):
                     'order_details': '/api/orders/<id>',
                     'cancel': '/api/orders/<id>/cancel',
                     'statistics': '/api/orders/statistics',
+                    'all_orders': '/api/orders/all?cursor=<cursor>',
+                    'export': '/api/orders/export?format=ndjson|csv',
+                    'events': '/api/orders/events?after=<cursor>&wait=<seconds>',
+                    'events_stream': '/api/orders/events/stream',
                     'health': '/api/orders/health'
                 },
                 'dry_clean': {
                     'create_order': '/api/dry-clean/orders',
-                    'get_orders': '/api/dry-clean/orders',
+                    'get_orders': '/api/dry-clean/orders?cursor=<cursor>',
+                    'export_orders': '/api/dry-clean/orders/export?format=ndjson|csv',
                     'get_order': '/api/dry-clean/orders/<id>',
                     'update_status': '/api/dry-clean/orders/<id>/status',
                     'delete_order': '/api/dry-clean/orders/<id>',
@@ -201,8 +313,8 @@ def create_app(config_name='development'):
         # Allow all origins for now to fix the issue
         response.headers['Access-Control-Allow-Origin'] = '*'
         response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
-        response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, Accept, X-Requested-With'
-        response.headers['Access-Control-Expose-Headers'] = 'Content-Type, Authorization'
+        response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, Accept, X-Requested-With, Idempotency-Key, Last-Event-ID'
+        response.headers['Access-Control-Expose-Headers'] = 'Content-Type, Authorization, Idempotent-Replayed'
         response.headers['Access-Control-Max-Age'] = '3600'
         
         # Log response
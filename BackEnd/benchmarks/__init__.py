@@ -0,0 +1 @@
+"""Benchmarks package"""
\ No newline at end of file
@@ -0,0 +1,119 @@
+# ============================================
+# GOOGLE CERTIFICATE FETCH BENCHMARK
+# Google ID token verification with a fresh transport
+# per call vs the shared certificate cache, against a
+# local stub key server
+#
+# Usage: python -m BackEnd.benchmarks.google_cert_fetch
+# ============================================
+
+from BackEnd.services.google_oauth_service import GoogleOAuthService
+from google.auth import crypt, jwt
+from google.auth.transport import requests as google_requests
+from google.oauth2 import id_token
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import json
+import time
+import os
+
+CLIENT_ID = 'bench-client.apps.googleusercontent.com'
+KEY_ID = 'bench-key'
+
+
+class StubKeyServer:
+    """
+    Serves one RSA public key in Google's certs format on localhost
+    
+    Point GOOGLE_CERTS_URL at `url` to run sign-ins without Google.
+    """
+    
+    def __init__(self, max_age=3600):
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        private_pem = key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.TraditionalOpenSSL,
+            serialization.NoEncryption()
+        )
+        public_pem = key.public_key().public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        
+        self.signer = crypt.RSASigner.from_string(private_pem, KEY_ID)
+        self.requests = 0
+        
+        body = json.dumps({KEY_ID: public_pem.decode('utf-8')}).encode('utf-8')
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests += 1
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Cache-Control', f'public, max-age={max_age}')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, *args):
+                pass
+        
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}/oauth2/v1/certs"
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+    
+    def issue_token(self, email='bench@example.com'):
+        now = int(time.time())
+        return jwt.encode(self.signer, {
+            'iss': 'https://accounts.google.com',
+            'aud': CLIENT_ID,
+            'sub': '1234567890',
+            'email': email,
+            'email_verified': True,
+            'iat': now,
+            'exp': now + 3600
+        }).decode('utf-8')
+    
+    def close(self):
+        self._httpd.shutdown()
+
+
+def measure(label, verify, token, iterations, server):
+    requests_before = server.requests
+    
+    started = time.perf_counter()
+    for _ in range(iterations):
+        verify(token)
+    elapsed = time.perf_counter() - started
+    
+    print(f"  {label:<40} {elapsed / iterations * 1000:>10.3f} {server.requests - requests_before:>10}")
+
+
+def main():
+    iterations = int(os.getenv('BENCH_ITERATIONS', 200))
+    server = StubKeyServer()
+    token = server.issue_token()
+    
+    def fresh_transport(token):
+        # Pre-cache implementation: new transport (and HTTP session) per sign-in
+        return id_token.verify_token(token, google_requests.Request(), CLIENT_ID, certs_url=server.url)
+    
+    service = GoogleOAuthService(CLIENT_ID, server.url)
+    
+    print("=" * 64)
+    print(f"  {'path':<40} {'ms/verify':>10} {'fetches':>10}")
+    print("=" * 64)
+    
+    measure('fresh transport per verification', fresh_transport, token, iterations, server)
+    measure('shared certificate cache', service.verify_google_token, token, iterations, server)
+    
+    print("=" * 64)
+    print(f"  cache: {service.cert_cache.get_stats()}")
+    server.close()
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,124 @@
+# ============================================
+# PRICING ROUND-TRIP BENCHMARK
+# Compares database round trips for the grouped catalog
+# endpoints before and after the catalog snapshot
+#
+# Usage: python -m BackEnd.benchmarks.pricing_round_trips
+# ============================================
+
+from BackEnd.config import config_by_name
+from BackEnd.utils.database import Database
+from BackEnd.models.pricing import Pricing, SERVICE_TYPES
+import time
+import os
+
+
+class RoundTripCounter:
+    """Counts Database.execute_query calls while active"""
+    
+    def __init__(self):
+        self.count = 0
+        self._original = None
+    
+    def __enter__(self):
+        self.count = 0
+        self._original = Database.execute_query
+        original = self._original
+        
+        def counting_execute_query(query, params=None, fetch='all'):
+            self.count += 1
+            return original(query, params, fetch)
+        
+        Database.execute_query = counting_execute_query
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        Database.execute_query = self._original
+        return False
+
+
+def legacy_grouped_by_category():
+    """Pre-snapshot implementation: one query per category"""
+    categories = Database.execute_query("""
+        SELECT id, category_name, category_slug, description,
+               icon, display_order, is_active, created_at
+        FROM service_categories
+        WHERE is_active = TRUE
+        ORDER BY display_order ASC
+    """, fetch='all') or []
+    
+    result = {}
+    for category in categories:
+        items = Database.execute_query("""
+            SELECT
+                id, item_name, item_slug, service_type, price,
+                gender_category, description, is_popular, display_order
+            FROM pricing_items
+            WHERE category_id = %s AND is_active = TRUE
+            ORDER BY display_order ASC
+        """, (category['id'],), fetch='all') or []
+        result[category['category_slug']] = {'category': category, 'items': items}
+    
+    return result
+
+
+def legacy_grouped_by_service_type():
+    """Pre-snapshot implementation: one query per service type"""
+    result = {}
+    for service_type in SERVICE_TYPES:
+        items = Database.execute_query("""
+            SELECT
+                pi.id, pi.category_id, sc.category_name, pi.item_name,
+                pi.item_slug, pi.service_type, pi.price, pi.gender_category,
+                pi.description, pi.is_popular
+            FROM pricing_items pi
+            JOIN service_categories sc ON pi.category_id = sc.id
+            WHERE pi.service_type = %s AND pi.is_active = TRUE AND sc.is_active = TRUE
+            ORDER BY sc.display_order ASC, pi.display_order ASC
+        """, (service_type,), fetch='all') or []
+        if items:
+            result[service_type] = items
+    
+    return result
+
+
+def measure(label, func, iterations):
+    """Run func repeatedly and report round trips and latency"""
+    with RoundTripCounter() as counter:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        elapsed = time.perf_counter() - started
+    
+    print(f"  {label:<40} {counter.count / iterations:>8.2f} {elapsed / iterations * 1000:>10.3f}")
+
+
+def main():
+    env = os.getenv('FLASK_ENV', 'development')
+    config = config_by_name.get(env, config_by_name['default'])
+    
+    if not Database.initialize(config):
+        print("Could not connect to the database - check your .env settings")
+        return
+    
+    iterations = int(os.getenv('BENCH_ITERATIONS', 200))
+    
+    print("=" * 64)
+    print(f"  {'endpoint':<40} {'trips/op':>8} {'ms/op':>10}")
+    print("=" * 64)
+    
+    measure('legacy /grouped/category', legacy_grouped_by_category, iterations)
+    measure('legacy /grouped/service', legacy_grouped_by_service_type, iterations)
+    
+    # Cold snapshot: version check + single JOIN load
+    Pricing.invalidate_catalog()
+    measure('snapshot /grouped/category (cold)', Pricing.get_items_grouped_by_category, 1)
+    
+    # Warm snapshot: served from memory until the TTL lapses
+    measure('snapshot /grouped/category (warm)', Pricing.get_items_grouped_by_category, iterations)
+    measure('snapshot /grouped/service (warm)', Pricing.get_items_grouped_by_service_type, iterations)
+    print("=" * 64)
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,139 @@
+# ============================================
+# QUERY OVERHEAD BENCHMARK
+# Per-query cost of Database.execute_query: the original
+# fresh-cursor path vs the current text path vs cached
+# server-side prepared statements
+#
+# Usage: python -m BackEnd.benchmarks.query_overhead
+# Statement reuse is only measured with
+# DB_POOL_RESET_SESSION=False; with the reset on every
+# checkout starts a fresh session and prepares again
+# ============================================
+
+from BackEnd.config import config_by_name
+from BackEnd.utils.database import Database, WRITE_PREFIXES
+import mysql.connector
+import time
+import os
+
+# Fixed lookups taken from models/ and services/
+QUERIES = [
+    ("SELECT id, email, username, full_name, is_active FROM users WHERE id = %s", (1,)),
+    ("SELECT id, user_id, token, expires_at FROM user_sessions WHERE token_hash = %s AND expires_at > NOW()", ("0" * 64,)),
+    ("SELECT id, item_name, price FROM pricing_items WHERE id = %s AND is_active = TRUE", (1,)),
+]
+
+
+def legacy_execute_query(query, params=None, fetch='all'):
+    """Pre-cache implementation: fresh cursor and string classification per call"""
+    connection = None
+    cursor = None
+    
+    try:
+        connection = Database.get_connection()
+        cursor = connection.cursor(dictionary=True)
+        
+        if params:
+            cursor.execute(query, params)
+        else:
+            cursor.execute(query)
+        
+        if fetch == 'one':
+            result = cursor.fetchone()
+        elif fetch == 'all':
+            result = cursor.fetchall()
+        else:
+            result = None
+        
+        if query.strip().upper().startswith(('INSERT', 'UPDATE', 'DELETE')):
+            connection.commit()
+        
+        return result
+    
+    except mysql.connector.Error:
+        if connection:
+            connection.rollback()
+        raise
+    
+    finally:
+        if cursor:
+            cursor.close()
+        if connection:
+            connection.close()
+
+
+def measure(label, func, iterations):
+    """Run every benchmark query iterations times and report microseconds per query"""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for query, params in QUERIES:
+            func(query, params)
+    elapsed = time.perf_counter() - started
+    
+    print(f"  {label:<44} {elapsed / (iterations * len(QUERIES)) * 1e6:>10.1f}")
+
+
+def measure_classification(iterations):
+    """Commit decision alone (no database needed)"""
+    query = QUERIES[0][0]
+    
+    started = time.perf_counter()
+    for _ in range(iterations):
+        query.strip().upper().startswith(WRITE_PREFIXES)
+    legacy = time.perf_counter() - started
+    
+    started = time.perf_counter()
+    for _ in range(iterations):
+        Database._is_write(query)
+    cached = time.perf_counter() - started
+    
+    print(f"  {'commit check: strip().upper()':<44} {legacy / iterations * 1e6:>10.3f}")
+    print(f"  {'commit check: cached':<44} {cached / iterations * 1e6:>10.3f}")
+
+
+def main():
+    env = os.getenv('FLASK_ENV', 'development')
+    config = config_by_name.get(env, config_by_name['default'])
+    iterations = int(os.getenv('BENCH_ITERATIONS', 1000))
+    
+    print("=" * 60)
+    print(f"  {'path':<44} {'us/query':>10}")
+    print("=" * 60)
+    
+    measure_classification(iterations * 100)
+    
+    if not Database.initialize(config):
+        print("Could not connect to the database - skipping query timings")
+        return
+    
+    def current(query, params):
+        return Database.execute_query(query, params, fetch='one')
+    
+    def legacy(query, params):
+        return legacy_execute_query(query, params, fetch='one')
+    
+    # Warm the pool before timing
+    for query, params in QUERIES:
+        current(query, params)
+    
+    Database._use_prepared = False
+    measure('legacy execute_query', legacy, iterations)
+    measure('execute_query (text protocol)', current, iterations)
+    
+    # Each execute_query is its own checkout here, so with the pool
+    # resetting sessions the statement cache never outlives one call
+    reused = not config.DB_POOL_RESET_SESSION
+    Database._use_prepared = True
+    measure('execute_query (prepared, reused)' if reused else 'execute_query (prepared each call)', current, iterations)
+    Database._use_prepared = config.DB_USE_PREPARED_STATEMENTS
+    
+    stats = Database.get_pool_stats()['prepared_statements']
+    print("=" * 60)
+    print(f"  prepares={stats['prepares']} hits={stats['hits']} evictions={stats['evictions']}")
+    if not reused:
+        print("  DB_POOL_RESET_SESSION=True: statements are dropped at every checkout;")
+        print("  rerun with DB_POOL_RESET_SESSION=False to measure statement reuse")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
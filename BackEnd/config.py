@@ -22,14 +22,39 @@ class Config:
     DB_PASSWORD = os.getenv('DB_PASSWORD', '')
     DB_NAME = os.getenv('DB_NAME', 'laundry_db')
     
+    # Database pool settings
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))  # max 32 (mysql-connector limit)
+    DB_POOL_MAX_OVERFLOW = int(os.getenv('DB_POOL_MAX_OVERFLOW', 5))  # extra short-lived connections
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 10))  # seconds to wait for a free connection
+    DB_POOL_RESET_SESSION = os.getenv('DB_POOL_RESET_SESSION', 'True').lower() in ('true', '1', 'yes')
+    
+    # Share one connection/transaction across all queries in a request
+    DB_REQUEST_SCOPED_CONNECTIONS = os.getenv('DB_REQUEST_SCOPED_CONNECTIONS', 'True').lower() in ('true', '1', 'yes')
+    
+    # Server-side prepared statements for Database.execute_query. Off by default:
+    # mysql-connector sends COM_STMT_RESET before each execute, so reuse only wins
+    # when parse time outweighs the extra round trip (see benchmarks/query_overhead.py)
+    DB_USE_PREPARED_STATEMENTS = os.getenv('DB_USE_PREPARED_STATEMENTS', 'False').lower() in ('true', '1', 'yes')
+    DB_STATEMENT_CACHE_SIZE = int(os.getenv('DB_STATEMENT_CACHE_SIZE', 64))  # per connection
+    
     # Email settings
     MAIL_SERVER = os.getenv('MAIL_SERVER', 'smtp.gmail.com')
     MAIL_PORT = int(os.getenv('MAIL_PORT', 587))
     MAIL_USERNAME = os.getenv('MAIL_USERNAME')
     MAIL_PASSWORD = os.getenv('MAIL_PASSWORD')
-    MAIL_USE_TLS = True
-    MAIL_USE_SSL = False
+    MAIL_USE_TLS = os.getenv('MAIL_USE_TLS', 'True').lower() in ('true', '1', 'yes')
+    MAIL_USE_SSL = os.getenv('MAIL_USE_SSL', 'False').lower() in ('true', '1', 'yes')
     MAIL_DEFAULT_SENDER = os.getenv('MAIL_DEFAULT_SENDER', MAIL_USERNAME)
+    MAIL_IDLE_TIMEOUT_SECONDS = int(os.getenv('MAIL_IDLE_TIMEOUT_SECONDS', 60))  # close idle worker SMTP connections
+    
+    # Email outbox settings (emails are queued and sent by background workers)
+    EMAIL_OUTBOX_ENABLED = os.getenv('EMAIL_OUTBOX_ENABLED', 'True').lower() in ('true', '1', 'yes')
+    EMAIL_OUTBOX_WORKERS = int(os.getenv('EMAIL_OUTBOX_WORKERS', 1))
+    EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', 20))
+    EMAIL_OUTBOX_POLL_SECONDS = int(os.getenv('EMAIL_OUTBOX_POLL_SECONDS', 5))
+    EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', 6))
+    EMAIL_OUTBOX_RETRY_SECONDS = int(os.getenv('EMAIL_OUTBOX_RETRY_SECONDS', 30))  # doubles per attempt, max 1h
+    EMAIL_OUTBOX_STALE_SECONDS = int(os.getenv('EMAIL_OUTBOX_STALE_SECONDS', 300))  # requeue rows stuck in 'sending'
     
     # OTP settings
     OTP_EXPIRY_MINUTES = int(os.getenv('OTP_EXPIRY_MINUTES', 10))
@@ -40,11 +65,14 @@ class Config:
     JWT_ALGORITHM = 'HS256'
     JWT_ACCESS_TOKEN_EXPIRES = int(os.getenv('JWT_ACCESS_TOKEN_EXPIRES', 24))  # hours
     JWT_REFRESH_TOKEN_EXPIRES = int(os.getenv('JWT_REFRESH_TOKEN_EXPIRES', 30))  # days
+    JWT_CACHE_SIZE = int(os.getenv('JWT_CACHE_SIZE', 10000))  # verified tokens kept per process
+    REFRESH_TOKEN_REUSE_GRACE_SECONDS = int(os.getenv('REFRESH_TOKEN_REUSE_GRACE_SECONDS', 10))  # concurrent refreshes (two tabs) get the same successor
     
     # Google OAuth settings
     GOOGLE_CLIENT_ID = os.getenv('GOOGLE_CLIENT_ID')
     GOOGLE_CLIENT_SECRET = os.getenv('GOOGLE_CLIENT_SECRET')
     GOOGLE_REDIRECT_URI = os.getenv('GOOGLE_REDIRECT_URI', f'{APP_URL}/api/auth/google/callback')
+    GOOGLE_CERTS_URL = os.getenv('GOOGLE_CERTS_URL', 'https://www.googleapis.com/oauth2/v1/certs')  # point at a stub key server in tests
     
     # Password reset settings
     PASSWORD_RESET_EXPIRY_HOURS = int(os.getenv('PASSWORD_RESET_EXPIRY_HOURS', 1))
@@ -53,7 +81,58 @@ class Config:
     # Security settings
     MAX_LOGIN_ATTEMPTS = int(os.getenv('MAX_LOGIN_ATTEMPTS', 5))
     LOGIN_LOCKOUT_MINUTES = int(os.getenv('LOGIN_LOCKOUT_MINUTES', 15))
+    MAX_LOGIN_ATTEMPTS_PER_IP = int(os.getenv('MAX_LOGIN_ATTEMPTS_PER_IP', 50))  # failed logins per lockout window
+    OTP_MAX_REQUESTS_PER_IP = int(os.getenv('OTP_MAX_REQUESTS_PER_IP', 20))  # per OTP expiry window
+    SHARED_STORE_URL = os.getenv('SHARED_STORE_URL')  # e.g. redis://localhost:6379/0 to share rate limits between workers
     MAX_SESSIONS_PER_USER = int(os.getenv('MAX_SESSIONS_PER_USER', 5))
+    LOGIN_NEGATIVE_CACHE_SECONDS = int(os.getenv('LOGIN_NEGATIVE_CACHE_SECONDS', 30))  # unknown login identifiers, 0 = off
+    
+    # Password hashing settings
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))  # hashes with another cost are upgraded on login
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 2))  # 0 = hash on the request thread
+    PASSWORD_HASH_MAX_QUEUE = int(os.getenv('PASSWORD_HASH_MAX_QUEUE', 32))
+    PASSWORD_HASH_TIMEOUT = int(os.getenv('PASSWORD_HASH_TIMEOUT', 10))  # seconds
+    
+    # Write-behind settings (login_attempts and user_sessions inserts are batched)
+    WRITE_BEHIND_ENABLED = os.getenv('WRITE_BEHIND_ENABLED', 'True').lower() in ('true', '1', 'yes')
+    WRITE_BEHIND_BATCH_SIZE = int(os.getenv('WRITE_BEHIND_BATCH_SIZE', 200))  # rows per INSERT
+    WRITE_BEHIND_FLUSH_SECONDS = float(os.getenv('WRITE_BEHIND_FLUSH_SECONDS', 1.0))
+    WRITE_BEHIND_MAX_PENDING = int(os.getenv('WRITE_BEHIND_MAX_PENDING', 10000))  # then flush on the request thread
+    
+    # Maintenance settings (expiry/retention purges, run by one elected worker)
+    MAINTENANCE_ENABLED = os.getenv('MAINTENANCE_ENABLED', 'True').lower() in ('true', '1', 'yes')
+    MAINTENANCE_INTERVAL_SECONDS = int(os.getenv('MAINTENANCE_INTERVAL_SECONDS', 3600))
+    MAINTENANCE_DELETE_CHUNK_SIZE = int(os.getenv('MAINTENANCE_DELETE_CHUNK_SIZE', 1000))  # rows per DELETE
+    MAINTENANCE_DELETE_PAUSE_SECONDS = float(os.getenv('MAINTENANCE_DELETE_PAUSE_SECONDS', 0.05))  # between chunks
+    LOGIN_ATTEMPTS_RETENTION_DAYS = int(os.getenv('LOGIN_ATTEMPTS_RETENTION_DAYS', 30))
+    
+    # Idempotency-Key settings (order creation retries replay the stored response)
+    IDEMPOTENCY_KEY_TTL_SECONDS = int(os.getenv('IDEMPOTENCY_KEY_TTL_SECONDS', 24 * 3600))  # stored responses in idempotency_keys
+    IDEMPOTENCY_CACHE_TTL_SECONDS = int(os.getenv('IDEMPOTENCY_CACHE_TTL_SECONDS', 300))  # per-worker replay cache
+    IDEMPOTENCY_CACHE_SIZE = int(os.getenv('IDEMPOTENCY_CACHE_SIZE', 1000))
+    IDEMPOTENCY_CLAIM_TIMEOUT_SECONDS = int(os.getenv('IDEMPOTENCY_CLAIM_TIMEOUT_SECONDS', 60))  # unfinished claims are taken over after this
+    
+    # Order status feed settings (/api/orders/events and /events/stream)
+    ORDER_EVENTS_POLL_SECONDS = int(os.getenv('ORDER_EVENTS_POLL_SECONDS', 2))  # event log reads per open feed
+    ORDER_EVENTS_STREAM_SECONDS = int(os.getenv('ORDER_EVENTS_STREAM_SECONDS', 300))  # then the client reconnects
+    ORDER_EVENTS_LONG_POLL_SECONDS = int(os.getenv('ORDER_EVENTS_LONG_POLL_SECONDS', 25))
+    ORDER_EVENTS_SHORT_POLL_SECONDS = int(os.getenv('ORDER_EVENTS_SHORT_POLL_SECONDS', 10))  # client poll interval when it may not wait
+    # Request threads per worker process (gunicorn --threads, set by gunicorn.conf.py; 1 = sync workers)
+    WORKER_THREADS = max(1, int(os.getenv('WORKER_THREADS', 1)))
+    # Long polls and streams waiting at once per worker, together; half the threads by
+    # default so the rest keep serving other endpoints (0 with sync workers: short polling)
+    ORDER_EVENTS_MAX_WAITING = int(os.getenv('ORDER_EVENTS_MAX_WAITING', WORKER_THREADS // 2))
+    ORDER_EVENTS_RETENTION_DAYS = int(os.getenv('ORDER_EVENTS_RETENTION_DAYS', 7))
+    
+    # Admin settings (comma-separated emails allowed to use admin endpoints)
+    ADMIN_EMAILS = [email.strip().lower() for email in os.getenv('ADMIN_EMAILS', '').split(',') if email.strip()]
+    
+    # User profile cache settings (per worker; SHARED_STORE_URL adds cross-worker invalidation)
+    USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', 5000))
+    USER_CACHE_TTL_SECONDS = int(os.getenv('USER_CACHE_TTL_SECONDS', 60))  # 0 = off
+    
+    # Pricing catalog cache settings
+    PRICING_CACHE_TTL_SECONDS = int(os.getenv('PRICING_CACHE_TTL_SECONDS', 300))
     
     # File upload settings
     UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'uploads')
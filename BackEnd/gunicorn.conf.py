@@ -0,0 +1,14 @@
+# ============================================
+# GUNICORN SETTINGS
+# Threaded workers: a long poll on /api/orders/events
+# waits on one thread instead of a whole worker
+# ============================================
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '3000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', 4))
+worker_class = 'gthread'
+
+# Exported so Config.WORKER_THREADS (and the order feed's waiting cap) match
+threads = int(os.environ.setdefault('WORKER_THREADS', '8'))
\ No newline at end of file
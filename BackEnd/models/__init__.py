@@ -4,5 +4,6 @@ from .user import User
 from .pricing import Pricing
 from .order import Order
 from .dry_clean import DryClean  # ADD THIS LINE
+from .email_outbox import EmailOutbox
 
-__all__ = ['User', 'Pricing', 'Order', 'DryClean']  # ADD DryClean HERE
\ No newline at end of file
+__all__ = ['User', 'Pricing', 'Order', 'DryClean', 'EmailOutbox']  # ADD DryClean HERE
\ No newline at end of file
@@ -4,11 +4,20 @@
 # ============================================
 
 from BackEnd.utils.database import Database
+from BackEnd.models.order_stats import OrderStats
+from BackEnd.models.order_events import OrderEvents
 from datetime import datetime
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Columns written by the admin export
+EXPORT_FIELDS = (
+    'id', 'user_id', 'name', 'email', 'phone', 'address',
+    'service', 'items', 'pickup_date', 'pickup_time',
+    'special_instructions', 'status', 'created_at', 'updated_at'
+)
+
 
 class DryClean:
     """Dry Clean model for handling dry cleaning orders"""
@@ -74,6 +83,8 @@ class DryClean:
             cursor.execute(insert_query, params)
             order_id = cursor.lastrowid
             
+            OrderStats.apply(cursor, 'dry_clean', user_id, {'pending': 1}, orders_delta=1)
+            
             # Commit transaction
             connection.commit()
             
@@ -153,8 +164,16 @@ class DryClean:
                     pass
     
     @staticmethod
-    def get_all_orders(status=None, limit=None, email=None):
-        """Get all dry clean orders with optional filtering"""
+    def get_all_orders(status=None, limit=None, email=None, after=None):
+        """
+        Get all dry clean orders with optional filtering
+        
+        Args:
+            status: Optional status filter
+            limit: Page size (None returns every matching order)
+            email: Optional customer email filter
+            after: Optional (created_at, id) keyset of the last row already seen
+        """
         cursor = None
         connection = None
         
@@ -173,7 +192,13 @@ class DryClean:
                 query += " AND email = %s"
                 params.append(email)
             
-            query += " ORDER BY created_at DESC"
+            # Keyset pagination: id breaks ties between equal timestamps
+            if after:
+                after_created_at, after_id = after
+                query += " AND (created_at < %s OR (created_at = %s AND id < %s))"
+                params.extend([after_created_at, after_created_at, after_id])
+            
+            query += " ORDER BY created_at DESC, id DESC"
             
             if limit:
                 query += " LIMIT %s"
@@ -209,6 +234,29 @@ class DryClean:
                 except:
                     pass
     
+    @staticmethod
+    def iter_all_orders(status=None, email=None, batch_size=1000):
+        """
+        Stream every dry clean order (admin export) without materializing the result
+        
+        Yields:
+            Order dictionaries with raw date values, newest first
+        """
+        query = f"SELECT {', '.join(EXPORT_FIELDS)} FROM dry_clean_orders WHERE 1=1"
+        params = []
+        
+        if status:
+            query += " AND status = %s"
+            params.append(status)
+        
+        if email:
+            query += " AND email = %s"
+            params.append(email)
+        
+        query += " ORDER BY created_at DESC, id DESC"
+        
+        yield from Database.stream_query(query, tuple(params) if params else None, batch_size=batch_size)
+    
     @staticmethod
     def update_order_status(order_id, status):
         """Update dry clean order status"""
@@ -224,12 +272,24 @@ class DryClean:
             connection = Database.get_connection()
             cursor = connection.cursor()
             
+            # Lock the row to read the status being replaced
+            cursor.execute(
+                "SELECT status, user_id FROM dry_clean_orders WHERE id = %s FOR UPDATE",
+                (order_id,)
+            )
+            order = cursor.fetchone()
+            
+            if not order:
+                connection.rollback()
+                return False, 'Order not found'
+            
+            old_status, owner_id = order
+            
             query = "UPDATE dry_clean_orders SET status = %s, updated_at = NOW() WHERE id = %s"
             
             cursor.execute(query, (status, order_id))
-            
-            if cursor.rowcount == 0:
-                return False, 'Order not found'
+            OrderStats.apply_status_change(cursor, 'dry_clean', owner_id, old_status, status)
+            OrderEvents.record(cursor, 'dry_clean', order_id, owner_id, old_status, status)
             
             connection.commit()
             logger.info(f"Dry clean order {order_id} status updated to {status}")
@@ -267,11 +327,21 @@ class DryClean:
             connection = Database.get_connection()
             cursor = connection.cursor()
             
-            cursor.execute("DELETE FROM dry_clean_orders WHERE id = %s", (order_id,))
+            cursor.execute(
+                "SELECT status, user_id FROM dry_clean_orders WHERE id = %s FOR UPDATE",
+                (order_id,)
+            )
+            order = cursor.fetchone()
             
-            if cursor.rowcount == 0:
+            if not order:
+                connection.rollback()
                 return False, 'Order not found'
             
+            order_status, owner_id = order
+            
+            cursor.execute("DELETE FROM dry_clean_orders WHERE id = %s", (order_id,))
+            OrderStats.apply(cursor, 'dry_clean', owner_id, {order_status: -1}, orders_delta=-1)
+            
             connection.commit()
             logger.info(f"Dry clean order {order_id} deleted")
             
@@ -300,45 +370,13 @@ class DryClean:
     
     @staticmethod
     def get_order_statistics():
-        """Get dry clean order statistics"""
-        cursor = None
-        connection = None
-        
+        """Get dry clean order statistics (one primary-key read of the order_stats rollup)"""
         try:
-            connection = Database.get_connection()
-            cursor = connection.cursor(dictionary=True)
-            
-            query = """
-                SELECT 
-                    COUNT(*) as total_orders,
-                    SUM(CASE WHEN status = 'pending' THEN 1 ELSE 0 END) as pending_orders,
-                    SUM(CASE WHEN status = 'confirmed' THEN 1 ELSE 0 END) as confirmed_orders,
-                    SUM(CASE WHEN status = 'processing' THEN 1 ELSE 0 END) as processing_orders,
-                    SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END) as completed_orders,
-                    SUM(CASE WHEN status = 'cancelled' THEN 1 ELSE 0 END) as cancelled_orders
-                FROM dry_clean_orders
-            """
-            
-            cursor.execute(query)
-            stats = cursor.fetchone()
-            
-            return stats
+            return OrderStats.get('dry_clean')
             
         except Exception as e:
             logger.exception(f"Error getting order statistics: {e}")
             return None
-        
-        finally:
-            if cursor:
-                try:
-                    cursor.close()
-                except:
-                    pass
-            if connection:
-                try:
-                    connection.close()
-                except:
-                    pass
     
     @staticmethod
     def create_contact(contact_data):
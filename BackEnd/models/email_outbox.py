@@ -0,0 +1,221 @@
+# ============================================
+# EMAIL OUTBOX MODEL
+# Queued emails drained by the outbox workers
+# ============================================
+
+from BackEnd.utils.database import Database
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class EmailOutbox:
+    """Email outbox model: requests enqueue, background workers send"""
+    
+    @staticmethod
+    def enqueue(to_email, subject, html_body, text_body=None):
+        """
+        Queue an email for delivery
+        
+        Returns:
+            Tuple (success: bool, result: outbox_id or error_message)
+        """
+        connection = None
+        cursor = None
+        
+        try:
+            connection = Database.get_connection()
+            cursor = connection.cursor()
+            
+            query = """
+                INSERT INTO email_outbox (to_email, subject, html_body, text_body)
+                VALUES (%s, %s, %s, %s)
+            """
+            cursor.execute(query, (to_email, subject, html_body, text_body))
+            outbox_id = cursor.lastrowid
+            
+            connection.commit()
+            
+            logger.debug(f"Email {outbox_id} queued for {to_email}")
+            return True, outbox_id
+        
+        except Exception as e:
+            logger.exception(f"Error queueing email for {to_email}: {e}")
+            if connection:
+                try:
+                    connection.rollback()
+                except:
+                    pass
+            return False, str(e)
+        
+        finally:
+            if cursor:
+                try:
+                    cursor.close()
+                except:
+                    pass
+            if connection:
+                try:
+                    connection.close()
+                except:
+                    pass
+    
+    @staticmethod
+    def claim_batch(worker_id, limit):
+        """
+        Lock up to `limit` due emails for one worker
+        
+        SKIP LOCKED lets several workers claim at once without waiting on
+        each other's rows. Claimed rows are marked 'sending' and committed
+        straight away, so no lock is held while SMTP runs.
+        
+        Returns:
+            List of outbox rows (attempts already incremented)
+        """
+        connection = None
+        cursor = None
+        
+        try:
+            connection = Database.get_connection()
+            cursor = connection.cursor(dictionary=True)
+            
+            cursor.execute("""
+                SELECT id, to_email, subject, html_body, text_body, attempts
+                FROM email_outbox
+                WHERE status = 'pending' AND next_attempt_at <= NOW()
+                ORDER BY next_attempt_at ASC, id ASC
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            """, (limit,))
+            rows = cursor.fetchall()
+            
+            if rows:
+                ids = [row['id'] for row in rows]
+                placeholders = ', '.join(['%s'] * len(ids))
+                cursor.execute(f"""
+                    UPDATE email_outbox
+                    SET status = 'sending', locked_by = %s, locked_at = NOW(),
+                        attempts = attempts + 1
+                    WHERE id IN ({placeholders})
+                """, (worker_id, *ids))
+            
+            connection.commit()
+            
+            for row in rows:
+                row['attempts'] += 1
+            
+            return rows
+        
+        except Exception as e:
+            logger.error(f"Error claiming outbox batch: {e}")
+            if connection:
+                try:
+                    connection.rollback()
+                except:
+                    pass
+            return []
+        
+        finally:
+            if cursor:
+                try:
+                    cursor.close()
+                except:
+                    pass
+            if connection:
+                try:
+                    connection.close()
+                except:
+                    pass
+    
+    @staticmethod
+    def mark_sent(outbox_ids):
+        """Mark a batch of emails as delivered"""
+        if not outbox_ids:
+            return
+        
+        placeholders = ', '.join(['%s'] * len(outbox_ids))
+        query = f"""
+            UPDATE email_outbox
+            SET status = 'sent', sent_at = NOW(), locked_by = NULL, last_error = NULL
+            WHERE id IN ({placeholders})
+        """
+        Database.execute_query(query, tuple(outbox_ids), fetch=None)
+    
+    @staticmethod
+    def mark_retry(outbox_id, error, delay_seconds):
+        """Put an email back in the queue after a failed attempt"""
+        query = """
+            UPDATE email_outbox
+            SET status = 'pending', locked_by = NULL, last_error = %s,
+                next_attempt_at = NOW() + INTERVAL %s SECOND
+            WHERE id = %s
+        """
+        Database.execute_query(query, (error[:1000], int(delay_seconds), outbox_id), fetch=None)
+    
+    @staticmethod
+    def mark_failed(outbox_id, error):
+        """Give up on an email"""
+        query = """
+            UPDATE email_outbox
+            SET status = 'failed', locked_by = NULL, last_error = %s
+            WHERE id = %s
+        """
+        Database.execute_query(query, (error[:1000], outbox_id), fetch=None)
+    
+    @staticmethod
+    def release_stale(stale_seconds):
+        """
+        Requeue emails whose worker died mid-send
+        
+        Returns:
+            Number of emails requeued
+        """
+        connection = None
+        cursor = None
+        
+        try:
+            connection = Database.get_connection()
+            cursor = connection.cursor()
+            
+            cursor.execute("""
+                UPDATE email_outbox
+                SET status = 'pending', locked_by = NULL
+                WHERE status = 'sending' AND locked_at < NOW() - INTERVAL %s SECOND
+            """, (int(stale_seconds),))
+            released = cursor.rowcount
+            
+            connection.commit()
+            
+            if released:
+                logger.warning(f"Requeued {released} stale outbox emails")
+            return released
+        
+        except Exception as e:
+            logger.error(f"Error releasing stale outbox emails: {e}")
+            return 0
+        
+        finally:
+            if cursor:
+                try:
+                    cursor.close()
+                except:
+                    pass
+            if connection:
+                try:
+                    connection.close()
+                except:
+                    pass
+    
+    @staticmethod
+    def get_status_counts():
+        """Number of outbox emails per status"""
+        try:
+            rows = Database.execute_query("""
+                SELECT status, COUNT(*) AS count
+                FROM email_outbox
+                GROUP BY status
+            """, fetch='all') or []
+            return {row['status']: row['count'] for row in rows}
+        except Exception as e:
+            logger.error(f"Error getting outbox stats: {e}")
+            return {}
\ No newline at end of file
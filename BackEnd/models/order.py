@@ -3,23 +3,176 @@
 # ============================================
 
 from BackEnd.utils.database import Database
+from BackEnd.models.pricing import Pricing, SERVICE_TYPES
+from BackEnd.models.order_stats import OrderStats
+from BackEnd.models.order_events import OrderEvents
 from datetime import datetime, timedelta
+from decimal import Decimal, ROUND_HALF_UP
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
+# Per-garment rates of the flat-rate services sold on the iron page
+# (iron.html); order lines without an item_id are priced from here
+FLAT_RATE_SERVICES = {
+    'Normal Iron': Decimal('10'),
+    'Urgent Iron': Decimal('15')
+}
+
+MONEY = Decimal('0.01')
+
+# Layout of the notes string written by create_order
+ORDER_NOTES_RE = re.compile(
+    r'^Service: (?P<service_type>.*?) \| Address: (?P<delivery_address>.*?) \| Contact: (?P<contact_number>.*?)'
+    r' \| Urgent: (?P<urgent_items>\d+) \| Normal: (?P<normal_items>\d+)(?: \| Notes: (?P<customer_notes>.*))?$',
+    re.DOTALL
+)
+PINCODE_RE = re.compile(r'(?<!\d)(\d{6})(?!\d)')
+
+# Sizes of the orders metadata columns (service_type VARCHAR(50), item counts INT)
+SERVICE_TYPE_MAX_LENGTH = 50
+MAX_ITEM_COUNT = 2147483647
+
+
+def extract_pincode(address):
+    """Last 6-digit PIN code in an address, or None"""
+    matches = PINCODE_RE.findall(address or '')
+    return matches[-1] if matches else None
+
+
+def parse_order_notes(notes):
+    """
+    Split a packed order notes string into the typed metadata columns
+    Returns: dict of column -> value, or None if notes is not in that format
+    """
+    match = ORDER_NOTES_RE.match(notes or '')
+    if not match:
+        return None
+    
+    metadata = match.groupdict()
+    metadata['urgent_items'] = int(metadata['urgent_items'])
+    metadata['normal_items'] = int(metadata['normal_items'])
+    
+    # Values the columns cannot hold count as unparsed, like any other bad note
+    if (len(metadata['service_type']) > SERVICE_TYPE_MAX_LENGTH
+            or max(metadata['urgent_items'], metadata['normal_items']) > MAX_ITEM_COUNT):
+        return None
+    
+    metadata['customer_notes'] = metadata['customer_notes'] or None
+    metadata['delivery_address'] = metadata['delivery_address'][:500]
+    metadata['contact_number'] = metadata['contact_number'][:20]
+    metadata['delivery_pincode'] = extract_pincode(metadata['delivery_address'])
+    return metadata
+
+# Columns returned by the admin listing and export
+ADMIN_ORDER_FIELDS = (
+    'id', 'user_id', 'subtotal', 'tax', 'total',
+    'order_status', 'payment_status', 'delivery_date',
+    'service_type', 'delivery_pincode', 'urgent_items', 'normal_items',
+    'created_at', 'updated_at',
+    'full_name', 'email', 'phone'
+)
+
 
 class Order:
     """Order model for handling order operations"""
     
     @staticmethod
-    def create_order(user_id, order_data):
+    def price_items(items, service_type='iron'):
+        """
+        Price order lines on the server, ignoring client-sent prices
+        
+        Lines with an item_id are priced from the pricing catalog snapshot
+        (one lookup for the whole basket); lines without one must name a
+        flat-rate service.
+        
+        Args:
+            items: List of dicts with item_id or service, and quantity
+            service_type: One of SERVICE_TYPES, stored for flat-rate lines
+            
+        Returns:
+            Tuple (success: bool, result: dict with lines and subtotal or error_message)
+        """
+        if service_type not in SERVICE_TYPES:
+            return False, "Invalid service type"
+        
+        lines = []
+        
+        for item in items:
+            if not isinstance(item, dict):
+                return False, "Invalid order item"
+            
+            # Whole numbers, also as strings ("2") as older clients send them
+            quantity = item.get('quantity')
+            try:
+                if isinstance(quantity, bool) or (isinstance(quantity, float) and not quantity.is_integer()):
+                    raise ValueError(quantity)
+                quantity = int(quantity)
+            except (TypeError, ValueError, OverflowError):
+                quantity = 0
+            
+            if quantity <= 0:
+                return False, f"Invalid quantity for {item.get('service') or item.get('item_id')}"
+            
+            item_id = item.get('item_id')
+            if item_id is not None:
+                try:
+                    item_id = int(item_id)
+                except (TypeError, ValueError):
+                    return False, f"Item with ID {item_id} not found"
+            
+            lines.append((item_id, item.get('service'), quantity))
+        
+        catalog_items = Pricing.get_items_by_ids(
+            item_id for item_id, _, _ in lines if item_id is not None
+        )
+        
+        priced = []
+        subtotal = Decimal('0')
+        flat_rate_quantities = {service: 0 for service in FLAT_RATE_SERVICES}
+        
+        for idx, (item_id, service, quantity) in enumerate(lines, start=1):
+            if item_id is not None:
+                catalog_item = catalog_items.get(item_id)
+                if not catalog_item:
+                    return False, f"Item with ID {item_id} not found"
+                
+                name = catalog_item['item_name']
+                price = Decimal(catalog_item['price'])
+                line_service_type = catalog_item['service_type']
+            else:
+                price = FLAT_RATE_SERVICES.get(service)
+                if price is None:
+                    return False, f"Unknown service: {service}"
+                
+                # Flat-rate lines keep their line number as item_id
+                item_id = idx
+                name = service
+                line_service_type = service_type
+                flat_rate_quantities[service] += quantity
+            
+            line_subtotal = (price * quantity).quantize(MONEY, rounding=ROUND_HALF_UP)
+            subtotal += line_subtotal
+            priced.append((item_id, name, quantity, price, line_service_type, line_subtotal))
+        
+        return True, {
+            'lines': priced,
+            'total_items': sum(line[2] for line in priced),
+            'urgent_items': flat_rate_quantities['Urgent Iron'],
+            'normal_items': flat_rate_quantities['Normal Iron'],
+            'subtotal': subtotal
+        }
+    
+    @staticmethod
+    def create_order(user_id, order_data, priced_items=None):
         """
         Create a new order for iron service
         
         Args:
             user_id: ID of the user placing the order
             order_data: Dictionary containing order details
+            priced_items: Result of price_items() when the caller already priced the basket
             
         Returns:
             Tuple (success: bool, result: order_id or error_message)
@@ -28,22 +181,27 @@ class Order:
         cursor = None
         
         try:
+            service_type = order_data.get('service_type') or 'iron'
+            
+            if priced_items is None:
+                success, priced_items = Order.price_items(order_data.get('items', []), service_type)
+                if not success:
+                    return False, priced_items
+            
             # Get database connection
             connection = Database.get_connection()
             cursor = connection.cursor()
             
             # Extract order data from frontend
-            items = order_data.get('items', [])
-            service_type = order_data.get('service_type', 'iron')
-            total_items = order_data.get('total_items', 0)
+            total_items = priced_items['total_items']
             total_amount = order_data.get('total_amount', 0)
-            urgent_items = order_data.get('urgent_items', 0)
-            normal_items = order_data.get('normal_items', 0)
-            delivery_address = order_data.get('delivery_address', '')
-            contact_number = order_data.get('contact_number', '')
+            urgent_items = priced_items['urgent_items']
+            normal_items = priced_items['normal_items']
+            delivery_address = order_data.get('delivery_address') or ''
+            contact_number = order_data.get('contact_number') or ''
             notes = order_data.get('notes', '')
             
-            logger.info(f"Processing order - User: {user_id}, Items: {total_items}, Amount: {total_amount}")
+            logger.debug(f"Processing order - User: {user_id}, Items: {total_items}, Amount: {total_amount}")
             
             # Calculate delivery date based on service type
             order_date = datetime.now()
@@ -59,15 +217,23 @@ class Order:
                 # Normal: 24 hours from now
                 delivery_date = order_date + timedelta(hours=24)
             
-            # Calculate subtotal and tax
-            subtotal = float(total_amount)
-            tax = round(subtotal * 0.18, 2)  # 18% GST
+            # Calculate subtotal and tax from the server-side prices
+            subtotal = priced_items['subtotal']
+            tax = (subtotal * Decimal('0.18')).quantize(MONEY, rounding=ROUND_HALF_UP)  # 18% GST
             total = subtotal + tax
             
-            logger.info(f"Order calculations - Subtotal: {subtotal}, Tax: {tax}, Total: {total}")
-            logger.info(f"Delivery date calculated: {delivery_date}")
+            try:
+                client_amount = Decimal(str(total_amount))
+            except Exception:
+                client_amount = None
+            if client_amount != subtotal:
+                logger.warning(f"Order amount from client ({total_amount}) differs from catalog price ({subtotal}) for user {user_id}")
             
-            # Build notes with all information
+            logger.debug(f"Order calculations - Subtotal: {subtotal}, Tax: {tax}, Total: {total}")
+            logger.debug(f"Delivery date calculated: {delivery_date}")
+            
+            # Build notes with all information (kept for existing readers;
+            # the same values are stored in their own columns below)
             order_notes = f"Service: {service_type} | Address: {delivery_address} | Contact: {contact_number}"
             order_notes += f" | Urgent: {urgent_items} | Normal: {normal_items}"
             if notes:
@@ -78,9 +244,12 @@ class Order:
                 INSERT INTO orders (
                     user_id, subtotal, tax, total,
                     order_status, payment_status,
-                    delivery_date, notes
+                    delivery_date, notes,
+                    service_type, delivery_address, delivery_pincode, contact_number,
+                    urgent_items, normal_items, customer_notes
                 ) VALUES (
-                    %s, %s, %s, %s, %s, %s, %s, %s
+                    %s, %s, %s, %s, %s, %s, %s, %s,
+                    %s, %s, %s, %s, %s, %s, %s
                 )
             """
             
@@ -90,25 +259,32 @@ class Order:
             # Prepare parameters with explicit type conversion
             params = (
                 int(user_id),
-                float(subtotal),
-                float(tax),
-                float(total),
+                subtotal,
+                tax,
+                total,
                 'pending',
                 'pending',
                 delivery_date_str,  # String format for MySQL
-                order_notes
+                order_notes,
+                service_type,
+                delivery_address[:500],
+                extract_pincode(delivery_address),
+                contact_number[:20],
+                urgent_items,
+                normal_items,
+                notes or None
             )
             
-            logger.info(f"Inserting order with delivery_date: {delivery_date_str}")
-            logger.info(f"Full params: {params}")
+            logger.debug(f"Inserting order with delivery_date: {delivery_date_str}")
+            logger.debug(f"Full params: {params}")
             
             cursor.execute(insert_query, params)
             
             order_id = cursor.lastrowid
-            logger.info(f"Order record created with ID: {order_id}")
+            logger.debug(f"Order record created with ID: {order_id}")
             
-            # Insert order items
-            if items:
+            # Insert order items (executemany sends one multi-row INSERT)
+            if priced_items['lines']:
                 items_query = """
                     INSERT INTO order_items (
                         order_id, item_id, item_name, quantity, 
@@ -116,24 +292,12 @@ class Order:
                     ) VALUES (%s, %s, %s, %s, %s, %s, %s)
                 """
                 
-                for idx, item in enumerate(items, start=1):
-                    item_name = item.get('service', 'Iron Service')
-                    quantity = int(item.get('quantity', 0))
-                    price = float(item.get('price_per_item', 0))
-                    item_subtotal = float(item.get('subtotal', 0))
-                    
-                    item_params = (
-                        int(order_id),
-                        idx,
-                        item_name,
-                        quantity,
-                        price,
-                        service_type,
-                        item_subtotal
-                    )
-                    
-                    cursor.execute(items_query, item_params)
-                    logger.info(f"Order item added - {item_name}: {quantity} x {price} = {item_subtotal}")
+                cursor.executemany(items_query, [
+                    (int(order_id),) + line for line in priced_items['lines']
+                ])
+                logger.debug(f"{len(priced_items['lines'])} order items added to order {order_id}")
+            
+            OrderStats.apply(cursor, 'orders', user_id, {'pending': 1}, orders_delta=1, spent_delta=total)
             
             # Commit transaction
             connection.commit()
@@ -183,6 +347,8 @@ class Order:
                     o.id, o.user_id, o.subtotal, o.tax, o.total,
                     o.order_status, o.payment_status, o.delivery_date,
                     o.pickup_date, o.notes, o.created_at, o.updated_at,
+                    o.service_type, o.delivery_address, o.delivery_pincode, o.contact_number,
+                    o.urgent_items, o.normal_items, o.customer_notes,
                     u.full_name, u.email, u.phone, u.address
                 FROM orders o
                 JOIN users u ON o.user_id = u.id
@@ -237,8 +403,19 @@ class Order:
                     pass
     
     @staticmethod
-    def get_user_orders(user_id, limit=None, status=None):
-        """Get all orders for a user"""
+    def get_user_orders(user_id, limit=None, status=None, before_id=None):
+        """
+        Get orders for a user, newest first
+        
+        Args:
+            user_id: ID of the user
+            limit: maximum number of orders to return
+            status: optional order_status filter
+            before_id: keyset cursor - only return orders with a smaller ID
+            
+        Returns:
+            List of orders, each with its items
+        """
         cursor = None
         connection = None
         
@@ -253,7 +430,13 @@ class Order:
                 query += " AND order_status = %s"
                 params.append(status)
             
-            query += " ORDER BY created_at DESC"
+            if before_id:
+                query += " AND id < %s"
+                params.append(before_id)
+            
+            # IDs are assigned in insert order, so id DESC is newest first and
+            # lets the (user_id, id) index serve both the filter and the sort
+            query += " ORDER BY id DESC"
             
             if limit:
                 query += " LIMIT %s"
@@ -262,7 +445,22 @@ class Order:
             cursor.execute(query, tuple(params))
             orders = cursor.fetchall()
             
-            # Format dates and get items for each order
+            if not orders:
+                return []
+            
+            # Fetch items for every order in one query and stitch them in memory
+            order_ids = [order['id'] for order in orders]
+            placeholders = ', '.join(['%s'] * len(order_ids))
+            cursor.execute(
+                f"SELECT * FROM order_items WHERE order_id IN ({placeholders}) ORDER BY order_id, id",
+                tuple(order_ids)
+            )
+            
+            items_by_order = {order_id: [] for order_id in order_ids}
+            for item in cursor.fetchall():
+                items_by_order[item['order_id']].append(item)
+            
+            # Format dates and attach items
             for order in orders:
                 if order.get('delivery_date'):
                     order['delivery_date'] = order['delivery_date'].isoformat() if hasattr(order['delivery_date'], 'isoformat') else str(order['delivery_date'])
@@ -273,10 +471,7 @@ class Order:
                 if order.get('updated_at'):
                     order['updated_at'] = order['updated_at'].isoformat() if hasattr(order['updated_at'], 'isoformat') else str(order['updated_at'])
                 
-                # Get items
-                items_query = "SELECT * FROM order_items WHERE order_id = %s"
-                cursor.execute(items_query, (order['id'],))
-                order['items'] = cursor.fetchall()
+                order['items'] = items_by_order[order['id']]
             
             return orders
             
@@ -311,18 +506,30 @@ class Order:
             connection = Database.get_connection()
             cursor = connection.cursor()
             
-            query = "UPDATE orders SET order_status = %s, updated_at = NOW() WHERE id = %s"
-            params = [status, order_id]
+            # Lock the row to read the status being replaced
+            query = "SELECT order_status, user_id FROM orders WHERE id = %s"
+            params = [order_id]
             
             if user_id:
                 query += " AND user_id = %s"
                 params.append(user_id)
             
-            cursor.execute(query, tuple(params))
+            cursor.execute(query + " FOR UPDATE", tuple(params))
+            order = cursor.fetchone()
             
-            if cursor.rowcount == 0:
+            if not order:
+                connection.rollback()
                 return False, 'Order not found or unauthorized'
             
+            old_status, owner_id = order
+            
+            cursor.execute(
+                "UPDATE orders SET order_status = %s, updated_at = NOW() WHERE id = %s",
+                (status, order_id)
+            )
+            OrderStats.apply_status_change(cursor, 'orders', owner_id, old_status, status)
+            OrderEvents.record(cursor, 'orders', order_id, owner_id, old_status, status)
+            
             connection.commit()
             logger.info(f"Order {order_id} status updated to {status}")
             
@@ -360,21 +567,25 @@ class Order:
             cursor = connection.cursor(dictionary=True)
             
             cursor.execute(
-                "SELECT order_status FROM orders WHERE id = %s AND user_id = %s",
+                "SELECT order_status FROM orders WHERE id = %s AND user_id = %s FOR UPDATE",
                 (order_id, user_id)
             )
             order = cursor.fetchone()
             
             if not order:
+                connection.rollback()
                 return False, 'Order not found'
             
             if order['order_status'] not in ['pending', 'confirmed']:
+                connection.rollback()
                 return False, 'Order cannot be cancelled at this stage'
             
             cursor.execute(
                 "UPDATE orders SET order_status = 'cancelled', updated_at = NOW() WHERE id = %s",
                 (order_id,)
             )
+            OrderStats.apply_status_change(cursor, 'orders', user_id, order['order_status'], 'cancelled')
+            OrderEvents.record(cursor, 'orders', order_id, user_id, order['order_status'], 'cancelled')
             
             connection.commit()
             logger.info(f"Order {order_id} cancelled by user {user_id}")
@@ -404,48 +615,13 @@ class Order:
     
     @staticmethod
     def get_order_statistics(user_id):
-        """Get order statistics for a user"""
-        cursor = None
-        connection = None
-        
+        """Get order statistics for a user (one primary-key read of the order_stats rollup)"""
         try:
-            connection = Database.get_connection()
-            cursor = connection.cursor(dictionary=True)
-            
-            query = """
-                SELECT 
-                    COUNT(*) as total_orders,
-                    SUM(CASE WHEN order_status = 'pending' THEN 1 ELSE 0 END) as pending_orders,
-                    SUM(CASE WHEN order_status = 'confirmed' THEN 1 ELSE 0 END) as confirmed_orders,
-                    SUM(CASE WHEN order_status = 'processing' THEN 1 ELSE 0 END) as processing_orders,
-                    SUM(CASE WHEN order_status = 'ready' THEN 1 ELSE 0 END) as ready_orders,
-                    SUM(CASE WHEN order_status = 'delivered' THEN 1 ELSE 0 END) as delivered_orders,
-                    SUM(CASE WHEN order_status = 'cancelled' THEN 1 ELSE 0 END) as cancelled_orders,
-                    SUM(total) as total_spent
-                FROM orders
-                WHERE user_id = %s
-            """
-            
-            cursor.execute(query, (user_id,))
-            stats = cursor.fetchone()
-            
-            return stats
+            return OrderStats.get('orders', user_id)
             
         except Exception as e:
             logger.exception(f"Error getting order statistics: {e}")
             return None
-        
-        finally:
-            if cursor:
-                try:
-                    cursor.close()
-                except:
-                    pass
-            if connection:
-                try:
-                    connection.close()
-                except:
-                    pass
     
     @staticmethod
     def delete_order(order_id, user_id):
@@ -457,6 +633,18 @@ class Order:
             connection = Database.get_connection()
             cursor = connection.cursor()
             
+            cursor.execute(
+                "SELECT order_status, total FROM orders WHERE id = %s AND user_id = %s FOR UPDATE",
+                (order_id, user_id)
+            )
+            order = cursor.fetchone()
+            
+            if not order:
+                connection.rollback()
+                return False, 'Order not found'
+            
+            order_status, order_total = order
+            
             # Delete order items first
             cursor.execute("DELETE FROM order_items WHERE order_id = %s", (order_id,))
             
@@ -465,9 +653,7 @@ class Order:
                 "DELETE FROM orders WHERE id = %s AND user_id = %s",
                 (order_id, user_id)
             )
-            
-            if cursor.rowcount == 0:
-                return False, 'Order not found'
+            OrderStats.apply(cursor, 'orders', user_id, {order_status: -1}, orders_delta=-1, spent_delta=-order_total)
             
             connection.commit()
             logger.info(f"Order {order_id} deleted by user {user_id}")
@@ -496,8 +682,18 @@ class Order:
                     pass
     
     @staticmethod
-    def get_all_orders(limit=None, status=None):
-        """Get all orders (admin function)"""
+    def get_all_orders(limit=None, status=None, after=None, service_type=None, pincode=None, urgent=None):
+        """
+        Get all orders (admin function)
+        
+        Args:
+            limit: Page size (None returns every matching order)
+            status: Optional order_status filter
+            after: Optional (created_at, id) keyset of the last row already seen
+            service_type: Optional service type filter
+            pincode: Optional delivery PIN code filter
+            urgent: Optional True/False filter on orders with urgent items
+        """
         cursor = None
         connection = None
         
@@ -509,6 +705,7 @@ class Order:
                 SELECT 
                     o.id, o.user_id, o.subtotal, o.tax, o.total,
                     o.order_status, o.payment_status, o.delivery_date,
+                    o.service_type, o.delivery_pincode, o.urgent_items, o.normal_items,
                     o.created_at, o.updated_at,
                     u.full_name, u.email, u.phone
                 FROM orders o
@@ -522,7 +719,24 @@ class Order:
                 query += " AND o.order_status = %s"
                 params.append(status)
             
-            query += " ORDER BY o.created_at DESC"
+            if service_type:
+                query += " AND o.service_type = %s"
+                params.append(service_type)
+            
+            if pincode:
+                query += " AND o.delivery_pincode = %s"
+                params.append(pincode)
+            
+            if urgent is not None:
+                query += " AND o.urgent_items > 0" if urgent else " AND o.urgent_items = 0"
+            
+            # Keyset pagination: id breaks ties between equal timestamps
+            if after:
+                after_created_at, after_id = after
+                query += " AND (o.created_at < %s OR (o.created_at = %s AND o.id < %s))"
+                params.extend([after_created_at, after_created_at, after_id])
+            
+            query += " ORDER BY o.created_at DESC, o.id DESC"
             
             if limit:
                 query += " LIMIT %s"
@@ -556,4 +770,32 @@ class Order:
                 try:
                     connection.close()
                 except:
-                    pass
\ No newline at end of file
+                    pass
+    
+    @staticmethod
+    def iter_all_orders(status=None, batch_size=1000):
+        """
+        Stream every order (admin export) without materializing the result
+        
+        Yields:
+            Order dictionaries with raw date values, newest first
+        """
+        query = """
+            SELECT 
+                o.id, o.user_id, o.subtotal, o.tax, o.total,
+                o.order_status, o.payment_status, o.delivery_date,
+                o.service_type, o.delivery_pincode, o.urgent_items, o.normal_items,
+                o.created_at, o.updated_at,
+                u.full_name, u.email, u.phone
+            FROM orders o
+            JOIN users u ON o.user_id = u.id
+        """
+        params = None
+        
+        if status:
+            query += " WHERE o.order_status = %s"
+            params = (status,)
+        
+        query += " ORDER BY o.created_at DESC, o.id DESC"
+        
+        yield from Database.stream_query(query, params, batch_size=batch_size)
\ No newline at end of file
@@ -0,0 +1,133 @@
+# ============================================
+# ORDER EVENTS
+# Append-only log of order status changes, read
+# by the status feed endpoints
+# ============================================
+
+from BackEnd.utils.database import Database
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class OrderEvents:
+    """
+    order_events log
+    
+    Writers call record() on their own cursor, so an event exists exactly
+    when its status change commits. Each user's events are numbered by a
+    per-user seq, the feed cursor: clients ask for events with a seq above
+    the last one they saw, which is one range read on (user_id, seq).
+    
+    The seq is taken from the user's order_event_sequences row, which stays
+    locked until the writing transaction ends. A user's events therefore
+    commit in seq order and a reader never moves past one that commits
+    later (an auto-increment id is assigned at INSERT, not at COMMIT).
+    """
+    
+    @staticmethod
+    def record(cursor, scope, order_id, user_id, old_status, new_status):
+        """
+        Append a status change event
+        
+        Args:
+            cursor: Cursor of the transaction that changed the status
+            scope: 'orders' or 'dry_clean'
+            order_id: ID of the changed order
+            user_id: Owner of the order (None for anonymous dry clean orders)
+            old_status: Status before the change
+            new_status: Status after the change
+        """
+        # Nobody can follow the feed of an anonymous order
+        if old_status == new_status or user_id is None:
+            return
+        
+        cursor.execute("""
+            INSERT INTO order_event_sequences (user_id, last_seq)
+            VALUES (%s, 1)
+            ON DUPLICATE KEY UPDATE last_seq = last_seq + 1
+        """, (user_id,))
+        
+        cursor.execute("""
+            INSERT INTO order_events (user_id, seq, scope, order_id, old_status, new_status)
+            SELECT user_id, last_seq, %s, %s, %s, %s
+            FROM order_event_sequences
+            WHERE user_id = %s
+        """, (scope, order_id, old_status, new_status, user_id))
+    
+    @staticmethod
+    def _read(query, params, fetch='all'):
+        """
+        Run a feed read on its own pool connection and end its transaction
+        
+        Feed reads repeat while a long poll or stream waits. On the request
+        connection they would share one REPEATABLE READ snapshot (and never
+        see newer events) and pin that connection for the whole wait.
+        """
+        connection = Database.get_connection(scoped=False)
+        cursor = None
+        
+        try:
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute(query, params)
+            return cursor.fetchone() if fetch == 'one' else cursor.fetchall()
+        
+        finally:
+            if cursor:
+                cursor.close()
+            connection.rollback()
+            connection.close()
+    
+    @staticmethod
+    def get_events(user_id, after_seq, limit=100):
+        """
+        Events of a user with a seq above after_seq, oldest first
+        Returns: list of event dicts
+        """
+        query = """
+            SELECT seq, scope, order_id, old_status, new_status, created_at
+            FROM order_events
+            WHERE user_id = %s AND seq > %s
+            ORDER BY seq
+            LIMIT %s
+        """
+        events = OrderEvents._read(query, (user_id, after_seq, limit))
+        
+        for event in events:
+            if hasattr(event['created_at'], 'isoformat'):
+                event['created_at'] = event['created_at'].isoformat()
+        
+        return events
+    
+    @staticmethod
+    def get_latest_seq(user_id):
+        """
+        Cursor of the user's newest event (0 when there is none)
+        Returns: int
+        """
+        query = "SELECT last_seq FROM order_event_sequences WHERE user_id = %s"
+        result = OrderEvents._read(query, (user_id,), fetch='one')
+        return (result or {}).get('last_seq') or 0
+    
+    @staticmethod
+    def cleanup_old_events(retention_days=7, chunk_size=1000, pause_seconds=0.05):
+        """
+        Delete events older than retention_days in chunks
+        Run by the maintenance scheduler
+        Returns: number of deleted events
+        """
+        try:
+            deleted = Database.delete_in_chunks(
+                'order_events',
+                'created_at < NOW() - INTERVAL %s DAY',
+                params=(retention_days,),
+                chunk_size=chunk_size,
+                pause_seconds=pause_seconds
+            )
+            logger.info(f"Order events older than {retention_days} days cleaned up ({deleted} deleted)")
+            
+            return deleted
+        
+        except Exception as e:
+            logger.error(f"Error cleaning up order events: {e}")
+            return 0
\ No newline at end of file
@@ -0,0 +1,253 @@
+# ============================================
+# ORDER STATISTICS ROLLUP
+# Per-user and global order counters, kept up to
+# date with deltas inside the order transactions
+# ============================================
+
+from BackEnd.utils.database import Database
+from decimal import Decimal
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# order_stats.user_id of the global row, and of dry clean orders placed without an account
+GLOBAL_USER = 0
+ANONYMOUS_USER = -1
+
+STATUS_COLUMNS = ('pending', 'confirmed', 'processing', 'ready', 'delivered', 'completed', 'cancelled')
+
+# scope -> (source table, status column, statuses, amount column or None)
+SCOPES = {
+    'orders': ('orders', 'order_status', ('pending', 'confirmed', 'processing', 'ready', 'delivered', 'cancelled'), 'total'),
+    'dry_clean': ('dry_clean_orders', 'status', ('pending', 'confirmed', 'processing', 'completed', 'cancelled'), None)
+}
+
+COUNTER_COLUMNS = ('total_orders',) + tuple(f"{status}_orders" for status in STATUS_COLUMNS) + ('total_spent',)
+
+
+class OrderStats:
+    """
+    order_stats rollup (one row per scope and user, plus a global row)
+    
+    Writers call apply() on their own cursor, so the counters commit or roll
+    back with the order change. reconcile() recomputes the rows from the
+    order tables to repair any drift.
+    """
+    
+    @staticmethod
+    def _stats_user(user_id):
+        return int(user_id) if user_id else ANONYMOUS_USER
+    
+    @staticmethod
+    def apply(cursor, scope, user_id, status_deltas, orders_delta=0, spent_delta=0):
+        """
+        Add deltas to the user's row and the global row of scope
+        
+        Args:
+            cursor: Cursor of the transaction that changed the order
+            scope: 'orders' or 'dry_clean'
+            user_id: Owner of the order (None for anonymous dry clean orders)
+            status_deltas: {status: delta}
+            orders_delta: Change in the number of orders
+            spent_delta: Change in the summed order total
+        """
+        values = [orders_delta]
+        values += [status_deltas.get(status, 0) for status in STATUS_COLUMNS]
+        values.append(spent_delta or 0)
+        
+        placeholders = ', '.join(['%s'] * (len(COUNTER_COLUMNS) + 2))
+        query = f"""
+            INSERT INTO order_stats (scope, user_id, {', '.join(COUNTER_COLUMNS)})
+            VALUES ({placeholders}), ({placeholders})
+            ON DUPLICATE KEY UPDATE
+            {', '.join(f"{column} = {column} + VALUES({column})" for column in COUNTER_COLUMNS)}
+        """
+        
+        # Always user row first, then global row, so concurrent writers lock in the same order
+        params = [scope, OrderStats._stats_user(user_id)] + values + [scope, GLOBAL_USER] + values
+        cursor.execute(query, tuple(params))
+    
+    @staticmethod
+    def apply_status_change(cursor, scope, user_id, old_status, new_status):
+        """Move one order from old_status to new_status"""
+        if old_status == new_status:
+            return
+        OrderStats.apply(cursor, scope, user_id, {old_status: -1, new_status: 1})
+    
+    @staticmethod
+    def get(scope, user_id=GLOBAL_USER):
+        """
+        Counters for one user (or the global row) in the shape of the old
+        aggregate queries
+        Returns: dict (zeros when the row does not exist yet)
+        """
+        _, _, statuses, amount_column = SCOPES[scope]
+        
+        query = f"""
+            SELECT {', '.join(COUNTER_COLUMNS)}
+            FROM order_stats
+            WHERE scope = %s AND user_id = %s
+        """
+        row = Database.execute_query(query, (scope, user_id), fetch='one') or {}
+        
+        stats = {'total_orders': int(row.get('total_orders') or 0)}
+        for status in statuses:
+            stats[f"{status}_orders"] = int(row.get(f"{status}_orders") or 0)
+        if amount_column:
+            stats['total_spent'] = row.get('total_spent') or Decimal('0.00')
+        
+        return stats
+    
+    @staticmethod
+    def _reconcile_range(scope, low, high):
+        """
+        Recompute the user rows of scope with low <= user_id < high
+        
+        The stats rows of the range are locked first, so a writer that
+        touches them waits for this transaction and then applies its delta
+        on top of the recomputed value.
+        Returns: number of rows changed
+        """
+        table, status_column, statuses, amount_column = SCOPES[scope]
+        owner = f"COALESCE(user_id, {ANONYMOUS_USER})"
+        amount = f"COALESCE(SUM({amount_column}), 0)" if amount_column else "0"
+        
+        connection = Database.get_connection(scoped=False)
+        cursor = None
+        
+        try:
+            cursor = connection.cursor(dictionary=True)
+            
+            cursor.execute(f"""
+                SELECT user_id, {', '.join(COUNTER_COLUMNS)}
+                FROM order_stats
+                WHERE scope = %s AND user_id >= %s AND user_id < %s AND user_id <> %s
+                FOR UPDATE
+            """, (scope, low, high, GLOBAL_USER))
+            current = {row.pop('user_id'): row for row in cursor.fetchall()}
+            
+            # Plain user_id range so the user_id index is used; NULL owners
+            # (anonymous orders) belong to the first chunk
+            where = "user_id >= %s AND user_id < %s AND user_id <> %s"
+            if low <= ANONYMOUS_USER:
+                where = f"(user_id IS NULL OR ({where}))"
+            
+            cursor.execute(f"""
+                SELECT {owner} AS user_id,
+                       COUNT(*) AS total_orders,
+                       {', '.join(f"SUM({status_column} = '{status}') AS {status}_orders" for status in statuses)},
+                       {amount} AS total_spent
+                FROM {table}
+                WHERE {where}
+                GROUP BY {owner}
+            """, (low, high, GLOBAL_USER))
+            
+            actual = {}
+            for row in cursor.fetchall():
+                user_id = row.pop('user_id')
+                actual[user_id] = {column: row.get(column) or 0 for column in COUNTER_COLUMNS}
+            
+            changed = 0
+            
+            for user_id in set(current) | set(actual):
+                expected = actual.get(user_id, {column: 0 for column in COUNTER_COLUMNS})
+                stored = current.get(user_id)
+                
+                if stored is not None and all(
+                    Decimal(stored[column] or 0) == Decimal(expected[column]) for column in COUNTER_COLUMNS
+                ):
+                    continue
+                
+                cursor.execute(f"""
+                    REPLACE INTO order_stats (scope, user_id, {', '.join(COUNTER_COLUMNS)})
+                    VALUES ({', '.join(['%s'] * (len(COUNTER_COLUMNS) + 2))})
+                """, (scope, user_id) + tuple(expected[column] for column in COUNTER_COLUMNS))
+                changed += 1
+                
+                if stored is not None:
+                    logger.warning(f"order_stats drift repaired for {scope} user {user_id}")
+            
+            connection.commit()
+            return changed
+        
+        except Exception:
+            connection.rollback()
+            raise
+        
+        finally:
+            if cursor:
+                cursor.close()
+            connection.close()
+    
+    @staticmethod
+    def _reconcile_global(scope):
+        """Recompute the global row of scope from its user rows"""
+        connection = Database.get_connection(scoped=False)
+        cursor = None
+        
+        try:
+            cursor = connection.cursor()
+            
+            cursor.execute(
+                "SELECT user_id FROM order_stats WHERE scope = %s AND user_id = %s FOR UPDATE",
+                (scope, GLOBAL_USER)
+            )
+            cursor.fetchall()
+            
+            cursor.execute(f"""
+                SELECT {', '.join(f"COALESCE(SUM({column}), 0)" for column in COUNTER_COLUMNS)}
+                FROM order_stats
+                WHERE scope = %s AND user_id <> %s
+            """, (scope, GLOBAL_USER))
+            totals = cursor.fetchone()
+            
+            cursor.execute(f"""
+                REPLACE INTO order_stats (scope, user_id, {', '.join(COUNTER_COLUMNS)})
+                VALUES ({', '.join(['%s'] * (len(COUNTER_COLUMNS) + 2))})
+            """, (scope, GLOBAL_USER) + tuple(totals))
+            
+            connection.commit()
+        
+        except Exception:
+            connection.rollback()
+            raise
+        
+        finally:
+            if cursor:
+                cursor.close()
+            connection.close()
+    
+    @staticmethod
+    def reconcile(chunk_size=1000, pause_seconds=0.05):
+        """
+        Recompute the whole rollup from the order tables
+        Users are processed chunk_size ids at a time in short transactions.
+        Run by the maintenance scheduler
+        Returns: number of user rows repaired or created
+        """
+        changed = 0
+        
+        try:
+            for scope, (table, _, _, _) in SCOPES.items():
+                bounds = Database.execute_query(f"""
+                    SELECT
+                        (SELECT MAX(user_id) FROM {table}) AS max_order_user,
+                        (SELECT MAX(user_id) FROM order_stats WHERE scope = %s) AS max_stats_user
+                """, (scope,), fetch='one') or {}
+                
+                high = max(bounds.get('max_order_user') or 0, bounds.get('max_stats_user') or 0) + 1
+                
+                for low in range(ANONYMOUS_USER, high, chunk_size):
+                    changed += OrderStats._reconcile_range(scope, low, min(low + chunk_size, high))
+                    if pause_seconds:
+                        time.sleep(pause_seconds)
+                
+                OrderStats._reconcile_global(scope)
+            
+            logger.info(f"Order statistics reconciled ({changed} rows repaired)")
+            return changed
+        
+        except Exception as e:
+            logger.error(f"Error reconciling order statistics: {e}")
+            return changed
\ No newline at end of file
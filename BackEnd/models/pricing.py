@@ -4,14 +4,281 @@
 # ============================================
 
 from BackEnd.utils.database import Database
+from decimal import Decimal, ROUND_HALF_UP
+import threading
+import time
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+# Response shapes for each read method (kept identical to the SQL projections
+# these methods used before they were served from the catalog snapshot)
+CATEGORY_FIELDS = (
+    'id', 'category_name', 'category_slug', 'description',
+    'icon', 'display_order', 'is_active'
+)
+CATEGORY_LIST_FIELDS = CATEGORY_FIELDS + ('created_at',)
+ITEM_LIST_FIELDS = (
+    'id', 'category_id', 'category_name', 'category_slug', 'item_name',
+    'item_slug', 'service_type', 'price', 'gender_category', 'description',
+    'is_popular', 'display_order'
+)
+CATEGORY_ITEM_FIELDS = (
+    'id', 'item_name', 'item_slug', 'service_type', 'price',
+    'gender_category', 'description', 'is_popular', 'display_order'
+)
+FILTERED_ITEM_FIELDS = (
+    'id', 'category_id', 'category_name', 'item_name', 'item_slug',
+    'service_type', 'price', 'gender_category', 'description', 'is_popular'
+)
+POPULAR_ITEM_FIELDS = (
+    'id', 'category_id', 'category_name', 'icon', 'item_name', 'item_slug',
+    'service_type', 'price', 'gender_category', 'description'
+)
+ITEM_DETAIL_FIELDS = (
+    'id', 'category_id', 'category_name', 'category_slug', 'item_name',
+    'item_slug', 'service_type', 'price', 'gender_category', 'description',
+    'is_popular'
+)
+SEARCH_ITEM_FIELDS = POPULAR_ITEM_FIELDS + ('is_popular',)
+
+SERVICE_TYPES = ('iron', 'wash_iron', 'roll_press', 'dry_clean', 'premium_wash', 'steam_iron')
+
+
+def _project(row, fields):
+    """Copy the requested fields out of a snapshot row"""
+    return {field: row.get(field) for field in fields}
+
+
 class Pricing:
     """Pricing model for database operations"""
     
+    # In-process catalog snapshot of service_categories + pricing_items.
+    # Loaded once per worker and served from memory; once the TTL lapses a
+    # single version query decides whether the snapshot must be reloaded.
+    _catalog = None
+    _catalog_version = None
+    _catalog_checked_at = 0.0
+    _catalog_ttl = 300
+    _catalog_lock = threading.Lock()
+    _catalog_stats = {
+        'hits': 0,
+        'version_checks': 0,
+        'reloads': 0,
+        'errors': 0
+    }
+    
+    @classmethod
+    def configure_cache(cls, ttl_seconds=300):
+        """
+        Configure the catalog snapshot
+        
+        Args:
+            ttl_seconds: seconds a snapshot is served before its version is re-checked
+        """
+        cls._catalog_ttl = max(0, int(ttl_seconds))
+        logger.info(f"Pricing catalog cache TTL set to {cls._catalog_ttl}s")
+    
+    @classmethod
+    def invalidate_catalog(cls):
+        """Force the next read to reload the catalog snapshot"""
+        with cls._catalog_lock:
+            cls._catalog_version = None
+            cls._catalog_checked_at = 0.0
+        logger.info("Pricing catalog cache invalidated")
+    
+    @classmethod
+    def get_cache_stats(cls):
+        """
+        Get catalog snapshot statistics
+        Returns: dict with counters and snapshot size
+        """
+        catalog = cls._catalog
+        return {
+            'loaded': catalog is not None,
+            'ttl_seconds': cls._catalog_ttl,
+            'categories': len(catalog['categories']) if catalog else 0,
+            'items': len(catalog['items']) if catalog else 0,
+            'age_seconds': round(time.monotonic() - catalog['loaded_at'], 1) if catalog else None,
+            **cls._catalog_stats
+        }
+    
+    @staticmethod
+    def _fetch_catalog_version():
+        """
+        Get a cheap fingerprint of the catalog tables
+        Returns: tuple that changes whenever a row is added, removed or updated
+        """
+        query = """
+            SELECT
+                (SELECT COUNT(*) FROM service_categories) AS category_count,
+                (SELECT MAX(updated_at) FROM service_categories) AS category_updated_at,
+                (SELECT COUNT(*) FROM pricing_items) AS item_count,
+                (SELECT MAX(updated_at) FROM pricing_items) AS item_updated_at
+        """
+        result = Database.execute_query(query, fetch='one') or {}
+        return (
+            result.get('category_count'),
+            result.get('category_updated_at'),
+            result.get('item_count'),
+            result.get('item_updated_at')
+        )
+    
+    @staticmethod
+    def _load_catalog():
+        """
+        Load the full catalog from the database in a single round trip
+        Returns: snapshot dict with categories, items, lookup indexes and
+                 the precomputed groupings served by the grouped endpoints
+        """
+        query = """
+            SELECT
+                sc.id AS sc_id,
+                sc.category_name,
+                sc.category_slug,
+                sc.description AS sc_description,
+                sc.icon,
+                sc.display_order AS sc_display_order,
+                sc.is_active AS sc_is_active,
+                sc.created_at AS sc_created_at,
+                pi.id,
+                pi.item_name,
+                pi.item_slug,
+                pi.service_type,
+                pi.price,
+                pi.gender_category,
+                pi.description,
+                pi.is_popular,
+                pi.display_order
+            FROM service_categories sc
+            LEFT JOIN pricing_items pi
+                ON pi.category_id = sc.id AND pi.is_active = TRUE
+            ORDER BY sc.display_order ASC, sc.id ASC, pi.display_order ASC
+        """
+        rows = Database.execute_query(query, fetch='all') or []
+        
+        categories = []
+        categories_by_id = {}
+        items = []
+        
+        for row in rows:
+            category = categories_by_id.get(row['sc_id'])
+            if category is None:
+                category = {
+                    'id': row['sc_id'],
+                    'category_name': row['category_name'],
+                    'category_slug': row['category_slug'],
+                    'description': row['sc_description'],
+                    'icon': row['icon'],
+                    'display_order': row['sc_display_order'],
+                    'is_active': row['sc_is_active'],
+                    'created_at': row['sc_created_at']
+                }
+                categories_by_id[category['id']] = category
+                categories.append(category)
+            
+            # LEFT JOIN row for a category without active items
+            if row['id'] is None:
+                continue
+            
+            items.append({
+                'id': row['id'],
+                'category_id': category['id'],
+                'category_name': category['category_name'],
+                'category_slug': category['category_slug'],
+                'icon': category['icon'],
+                'category_active': bool(category['is_active']),
+                'item_name': row['item_name'],
+                'item_slug': row['item_slug'],
+                'service_type': row['service_type'],
+                'price': row['price'],
+                'gender_category': row['gender_category'],
+                'description': row['description'],
+                'is_popular': row['is_popular'],
+                'display_order': row['display_order']
+            })
+        
+        # Precompute the grouped endpoint payloads once per snapshot
+        grouped_by_category = {}
+        for category in categories:
+            if category['is_active']:
+                grouped_by_category[category['category_slug']] = {
+                    'category': _project(category, CATEGORY_LIST_FIELDS),
+                    'items': []
+                }
+        
+        grouped_by_service_type = {service_type: [] for service_type in SERVICE_TYPES}
+        for item in items:
+            group = grouped_by_category.get(item['category_slug'])
+            if group is not None:
+                group['items'].append(_project(item, CATEGORY_ITEM_FIELDS))
+            if item['category_active'] and item['service_type'] in grouped_by_service_type:
+                grouped_by_service_type[item['service_type']].append(_project(item, FILTERED_ITEM_FIELDS))
+        
+        return {
+            'categories': categories,
+            'categories_by_id': categories_by_id,
+            'categories_by_slug': {category['category_slug']: category for category in categories},
+            'items': items,
+            'items_by_id': {item['id']: item for item in items},
+            'grouped_by_category': grouped_by_category,
+            'grouped_by_service_type': {
+                service_type: service_items
+                for service_type, service_items in grouped_by_service_type.items()
+                if service_items
+            },
+            'loaded_at': time.monotonic()
+        }
+    
+    @classmethod
+    def get_catalog(cls):
+        """
+        Get the current catalog snapshot, reloading it if it changed
+        Returns: snapshot dict (shared - callers must not mutate it)
+        """
+        catalog = cls._catalog
+        if catalog is not None and time.monotonic() - cls._catalog_checked_at < cls._catalog_ttl:
+            cls._catalog_stats['hits'] += 1
+            return catalog
+        
+        with cls._catalog_lock:
+            # Another thread may have refreshed the snapshot while we waited
+            catalog = cls._catalog
+            if catalog is not None and time.monotonic() - cls._catalog_checked_at < cls._catalog_ttl:
+                cls._catalog_stats['hits'] += 1
+                return catalog
+            
+            try:
+                version = Pricing._fetch_catalog_version()
+                cls._catalog_stats['version_checks'] += 1
+                
+                if catalog is None or version != cls._catalog_version:
+                    catalog = Pricing._load_catalog()
+                    cls._catalog = catalog
+                    cls._catalog_version = version
+                    cls._catalog_stats['reloads'] += 1
+                    logger.info(
+                        f"Pricing catalog loaded: {len(catalog['categories'])} categories, "
+                        f"{len(catalog['items'])} items"
+                    )
+                
+                cls._catalog_checked_at = time.monotonic()
+                return catalog
+            
+            except Exception as e:
+                cls._catalog_stats['errors'] += 1
+                if catalog is None:
+                    raise
+                # Serve the stale snapshot rather than failing catalog reads
+                logger.warning(f"Pricing catalog refresh failed, serving stale snapshot: {e}")
+                return catalog
+    
+    @staticmethod
+    def _active_items(catalog):
+        """Items whose category is active, in display order"""
+        return [item for item in catalog['items'] if item['category_active']]
+    
     @staticmethod
     def get_all_categories():
         """
@@ -19,15 +286,12 @@ class Pricing:
         Returns: list of categories
         """
         try:
-            query = """
-                SELECT id, category_name, category_slug, description, 
-                       icon, display_order, is_active, created_at
-                FROM service_categories
-                WHERE is_active = TRUE
-                ORDER BY display_order ASC
-            """
-            result = Database.execute_query(query, fetch='all')
-            return result if result else []
+            catalog = Pricing.get_catalog()
+            return [
+                _project(category, CATEGORY_LIST_FIELDS)
+                for category in catalog['categories']
+                if category['is_active']
+            ]
         except Exception as e:
             logger.error(f"Error getting categories: {e}")
             return []
@@ -39,14 +303,10 @@ class Pricing:
         Returns: category dict or None
         """
         try:
-            query = """
-                SELECT id, category_name, category_slug, description, 
-                       icon, display_order, is_active
-                FROM service_categories
-                WHERE id = %s AND is_active = TRUE
-            """
-            result = Database.execute_query(query, (category_id,), fetch='one')
-            return result
+            category = Pricing.get_catalog()['categories_by_id'].get(category_id)
+            if not category or not category['is_active']:
+                return None
+            return _project(category, CATEGORY_FIELDS)
         except Exception as e:
             logger.error(f"Error getting category by ID: {e}")
             return None
@@ -58,14 +318,10 @@ class Pricing:
         Returns: category dict or None
         """
         try:
-            query = """
-                SELECT id, category_name, category_slug, description, 
-                       icon, display_order, is_active
-                FROM service_categories
-                WHERE category_slug = %s AND is_active = TRUE
-            """
-            result = Database.execute_query(query, (slug,), fetch='one')
-            return result
+            category = Pricing.get_catalog()['categories_by_slug'].get(slug)
+            if not category or not category['is_active']:
+                return None
+            return _project(category, CATEGORY_FIELDS)
         except Exception as e:
             logger.error(f"Error getting category by slug: {e}")
             return None
@@ -77,27 +333,8 @@ class Pricing:
         Returns: list of pricing items
         """
         try:
-            query = """
-                SELECT 
-                    pi.id,
-                    pi.category_id,
-                    sc.category_name,
-                    sc.category_slug,
-                    pi.item_name,
-                    pi.item_slug,
-                    pi.service_type,
-                    pi.price,
-                    pi.gender_category,
-                    pi.description,
-                    pi.is_popular,
-                    pi.display_order
-                FROM pricing_items pi
-                JOIN service_categories sc ON pi.category_id = sc.id
-                WHERE pi.is_active = TRUE AND sc.is_active = TRUE
-                ORDER BY sc.display_order ASC, pi.display_order ASC
-            """
-            result = Database.execute_query(query, fetch='all')
-            return result if result else []
+            catalog = Pricing.get_catalog()
+            return [_project(item, ITEM_LIST_FIELDS) for item in Pricing._active_items(catalog)]
         except Exception as e:
             logger.error(f"Error getting all pricing items: {e}")
             return []
@@ -109,16 +346,12 @@ class Pricing:
         Returns: list of pricing items
         """
         try:
-            query = """
-                SELECT 
-                    id, item_name, item_slug, service_type, price,
-                    gender_category, description, is_popular, display_order
-                FROM pricing_items
-                WHERE category_id = %s AND is_active = TRUE
-                ORDER BY display_order ASC
-            """
-            result = Database.execute_query(query, (category_id,), fetch='all')
-            return result if result else []
+            catalog = Pricing.get_catalog()
+            return [
+                _project(item, CATEGORY_ITEM_FIELDS)
+                for item in catalog['items']
+                if item['category_id'] == category_id
+            ]
         except Exception as e:
             logger.error(f"Error getting items by category: {e}")
             return []
@@ -130,25 +363,12 @@ class Pricing:
         Returns: list of pricing items
         """
         try:
-            query = """
-                SELECT 
-                    pi.id,
-                    pi.category_id,
-                    sc.category_name,
-                    pi.item_name,
-                    pi.item_slug,
-                    pi.service_type,
-                    pi.price,
-                    pi.gender_category,
-                    pi.description,
-                    pi.is_popular
-                FROM pricing_items pi
-                JOIN service_categories sc ON pi.category_id = sc.id
-                WHERE pi.service_type = %s AND pi.is_active = TRUE AND sc.is_active = TRUE
-                ORDER BY sc.display_order ASC, pi.display_order ASC
-            """
-            result = Database.execute_query(query, (service_type,), fetch='all')
-            return result if result else []
+            catalog = Pricing.get_catalog()
+            return [
+                _project(item, FILTERED_ITEM_FIELDS)
+                for item in Pricing._active_items(catalog)
+                if item['service_type'] == service_type
+            ]
         except Exception as e:
             logger.error(f"Error getting items by service type: {e}")
             return []
@@ -160,25 +380,12 @@ class Pricing:
         Returns: list of pricing items
         """
         try:
-            query = """
-                SELECT 
-                    pi.id,
-                    pi.category_id,
-                    sc.category_name,
-                    pi.item_name,
-                    pi.item_slug,
-                    pi.service_type,
-                    pi.price,
-                    pi.gender_category,
-                    pi.description,
-                    pi.is_popular
-                FROM pricing_items pi
-                JOIN service_categories sc ON pi.category_id = sc.id
-                WHERE pi.gender_category = %s AND pi.is_active = TRUE AND sc.is_active = TRUE
-                ORDER BY sc.display_order ASC, pi.display_order ASC
-            """
-            result = Database.execute_query(query, (gender_category,), fetch='all')
-            return result if result else []
+            catalog = Pricing.get_catalog()
+            return [
+                _project(item, FILTERED_ITEM_FIELDS)
+                for item in Pricing._active_items(catalog)
+                if item['gender_category'] == gender_category
+            ]
         except Exception as e:
             logger.error(f"Error getting items by gender: {e}")
             return []
@@ -190,26 +397,10 @@ class Pricing:
         Returns: list of popular items
         """
         try:
-            query = """
-                SELECT 
-                    pi.id,
-                    pi.category_id,
-                    sc.category_name,
-                    sc.icon,
-                    pi.item_name,
-                    pi.item_slug,
-                    pi.service_type,
-                    pi.price,
-                    pi.gender_category,
-                    pi.description
-                FROM pricing_items pi
-                JOIN service_categories sc ON pi.category_id = sc.id
-                WHERE pi.is_popular = TRUE AND pi.is_active = TRUE AND sc.is_active = TRUE
-                ORDER BY pi.price ASC
-                LIMIT 10
-            """
-            result = Database.execute_query(query, fetch='all')
-            return result if result else []
+            catalog = Pricing.get_catalog()
+            popular = [item for item in Pricing._active_items(catalog) if item['is_popular']]
+            popular.sort(key=lambda item: item['price'])
+            return [_project(item, POPULAR_ITEM_FIELDS) for item in popular[:10]]
         except Exception as e:
             logger.error(f"Error getting popular items: {e}")
             return []
@@ -221,25 +412,8 @@ class Pricing:
         Returns: item dict or None
         """
         try:
-            query = """
-                SELECT 
-                    pi.id,
-                    pi.category_id,
-                    sc.category_name,
-                    sc.category_slug,
-                    pi.item_name,
-                    pi.item_slug,
-                    pi.service_type,
-                    pi.price,
-                    pi.gender_category,
-                    pi.description,
-                    pi.is_popular
-                FROM pricing_items pi
-                JOIN service_categories sc ON pi.category_id = sc.id
-                WHERE pi.id = %s AND pi.is_active = TRUE
-            """
-            result = Database.execute_query(query, (item_id,), fetch='one')
-            return result
+            item = Pricing.get_catalog()['items_by_id'].get(item_id)
+            return _project(item, ITEM_DETAIL_FIELDS) if item else None
         except Exception as e:
             logger.error(f"Error getting item by ID: {e}")
             return None
@@ -251,29 +425,17 @@ class Pricing:
         Returns: list of matching items
         """
         try:
-            search_pattern = f"%{search_term}%"
-            query = """
-                SELECT 
-                    pi.id,
-                    pi.category_id,
-                    sc.category_name,
-                    sc.icon,
-                    pi.item_name,
-                    pi.item_slug,
-                    pi.service_type,
-                    pi.price,
-                    pi.gender_category,
-                    pi.description,
-                    pi.is_popular
-                FROM pricing_items pi
-                JOIN service_categories sc ON pi.category_id = sc.id
-                WHERE (pi.item_name LIKE %s OR pi.description LIKE %s)
-                AND pi.is_active = TRUE AND sc.is_active = TRUE
-                ORDER BY pi.is_popular DESC, pi.price ASC
-                LIMIT 20
-            """
-            result = Database.execute_query(query, (search_pattern, search_pattern), fetch='all')
-            return result if result else []
+            catalog = Pricing.get_catalog()
+            term = search_term.casefold()
+            
+            matches = [
+                item for item in Pricing._active_items(catalog)
+                if term in item['item_name'].casefold()
+                or term in (item['description'] or '').casefold()
+            ]
+            matches.sort(key=lambda item: (not item['is_popular'], item['price']))
+            
+            return [_project(item, SEARCH_ITEM_FIELDS) for item in matches[:20]]
         except Exception as e:
             logger.error(f"Error searching items: {e}")
             return []
@@ -285,19 +447,17 @@ class Pricing:
         Returns: dict with summary data
         """
         try:
-            query = """
-                SELECT 
-                    COUNT(*) as total_items,
-                    COUNT(DISTINCT category_id) as total_categories,
-                    MIN(price) as min_price,
-                    MAX(price) as max_price,
-                    AVG(price) as avg_price,
-                    SUM(CASE WHEN is_popular = TRUE THEN 1 ELSE 0 END) as popular_items_count
-                FROM pricing_items
-                WHERE is_active = TRUE
-            """
-            result = Database.execute_query(query, fetch='one')
-            return result
+            items = Pricing.get_catalog()['items']
+            prices = [item['price'] for item in items]
+            
+            return {
+                'total_items': len(items),
+                'total_categories': len({item['category_id'] for item in items}),
+                'min_price': min(prices) if prices else None,
+                'max_price': max(prices) if prices else None,
+                'avg_price': (sum(prices, Decimal('0')) / len(prices)).quantize(Decimal('0.000001')) if prices else None,
+                'popular_items_count': sum(1 for item in items if item['is_popular'])
+            }
         except Exception as e:
             logger.error(f"Error getting pricing summary: {e}")
             return None
@@ -307,24 +467,10 @@ class Pricing:
         """
         Get all items grouped by category
         Returns: dict with categories as keys and items as values
+                 (precomputed snapshot data - callers must not mutate it)
         """
         try:
-            # Get all categories
-            categories = Pricing.get_all_categories()
-            
-            if not categories:
-                return {}
-            
-            # Get items for each category
-            result = {}
-            for category in categories:
-                items = Pricing.get_items_by_category(category['id'])
-                result[category['category_slug']] = {
-                    'category': category,
-                    'items': items
-                }
-            
-            return result
+            return Pricing.get_catalog()['grouped_by_category']
             
         except Exception as e:
             logger.error(f"Error getting items grouped by category: {e}")
@@ -335,22 +481,62 @@ class Pricing:
         """
         Get all items grouped by service type
         Returns: dict with service types as keys and items as values
+                 (precomputed snapshot data - callers must not mutate it)
         """
         try:
-            service_types = ['iron', 'wash_iron', 'roll_press', 'dry_clean', 'premium_wash', 'steam_iron']
-            
-            result = {}
-            for service_type in service_types:
-                items = Pricing.get_items_by_service_type(service_type)
-                if items:
-                    result[service_type] = items
-            
-            return result
+            return Pricing.get_catalog()['grouped_by_service_type']
             
         except Exception as e:
             logger.error(f"Error getting items grouped by service type: {e}")
             return {}
     
+    @staticmethod
+    def get_items_by_ids(item_ids):
+        """
+        Get several pricing items in one lookup
+        Duplicate IDs are coalesced; unknown or inactive IDs are left out
+        Returns: dict of item_id -> item dict
+        """
+        unique_ids = list(dict.fromkeys(item_ids))
+        
+        if not unique_ids:
+            return {}
+        
+        try:
+            items_by_id = Pricing.get_catalog()['items_by_id']
+            return {
+                item_id: _project(items_by_id[item_id], ITEM_DETAIL_FIELDS)
+                for item_id in unique_ids
+                if item_id in items_by_id
+            }
+        except Exception as e:
+            logger.warning(f"Catalog snapshot unavailable, using batched query: {e}")
+        
+        try:
+            placeholders = ', '.join(['%s'] * len(unique_ids))
+            query = f"""
+                SELECT 
+                    pi.id,
+                    pi.category_id,
+                    sc.category_name,
+                    sc.category_slug,
+                    pi.item_name,
+                    pi.item_slug,
+                    pi.service_type,
+                    pi.price,
+                    pi.gender_category,
+                    pi.description,
+                    pi.is_popular
+                FROM pricing_items pi
+                JOIN service_categories sc ON pi.category_id = sc.id
+                WHERE pi.id IN ({placeholders}) AND pi.is_active = TRUE
+            """
+            result = Database.execute_query(query, tuple(unique_ids), fetch='all')
+            return {item['id']: item for item in result or []}
+        except Exception as e:
+            logger.error(f"Error getting items by IDs: {e}")
+            return {}
+    
     @staticmethod
     def calculate_total_price(items_list):
         """
@@ -359,20 +545,35 @@ class Pricing:
         Returns: (success, total_price or error_message)
         """
         try:
-            total_price = 0.0
+            lines = []
             
             for item_data in items_list:
                 item_id = item_data.get('item_id')
                 quantity = item_data.get('quantity', 1)
                 
-                # Get item details
-                item = Pricing.get_item_by_id(item_id)
+                try:
+                    lookup_id = int(item_id)
+                except (TypeError, ValueError):
+                    return False, f"Item with ID {item_id} not found"
+                
+                if isinstance(quantity, bool) or not isinstance(quantity, (int, float)):
+                    return False, f"Invalid quantity for item {item_id}"
+                
+                lines.append((item_id, lookup_id, Decimal(str(quantity))))
+            
+            # One lookup for the whole basket, regardless of its size
+            items = Pricing.get_items_by_ids(lookup_id for _, lookup_id, _ in lines)
+            
+            total_price = Decimal('0')
+            
+            for item_id, lookup_id, quantity in lines:
+                item = items.get(lookup_id)
                 if not item:
                     return False, f"Item with ID {item_id} not found"
                 
-                total_price += float(item['price']) * quantity
+                total_price += Decimal(item['price']) * quantity
             
-            return True, round(total_price, 2)
+            return True, float(total_price.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
             
         except Exception as e:
             logger.error(f"Error calculating total price: {e}")
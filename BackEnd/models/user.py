@@ -1,7 +1,14 @@
-import bcrypt
 from datetime import datetime
 from BackEnd.utils.database import Database
+from BackEnd.services.password_service import PasswordService, PasswordServiceBusy
+from BackEnd.services.rate_limiter import RateLimiter
+from BackEnd.services.write_behind import WriteBehindBuffer
+from BackEnd.services.cache_invalidation import InvalidationChannel
+from collections import OrderedDict
+import threading
 import logging
+import math
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -9,21 +16,152 @@ logger = logging.getLogger(__name__)
 class User:
     """User model for database operations"""
     
+    # Login identifiers that matched no user, kept briefly so repeated
+    # guesses at unknown accounts skip the database. Per worker; entries
+    # are dropped when a user with that email/username is created, here
+    # and, with a shared store, on the other workers.
+    _unknown_logins = OrderedDict()  # lowercased identifier -> expires at
+    _unknown_ttl = 30
+    _unknown_max_size = 10000
+    _unknown_lock = threading.Lock()
+    _login_lookup_stats = {
+        'queries': 0,
+        'negative_hits': 0
+    }
+    
+    # Per-worker LRU of the safe profile projection (get_user_by_id).
+    # Writes through this model invalidate locally and, with a shared
+    # store, on the other workers; the TTL bounds staleness otherwise.
+    _profiles = OrderedDict()  # user_id -> (expires at, row)
+    _profile_ttl = 60
+    _profile_max_size = 5000
+    _profile_generation = 0  # bumped on every invalidation
+    _profile_lock = threading.Lock()
+    _profile_stats = {
+        'hits': 0,
+        'misses': 0,
+        'evictions': 0,
+        'invalidations': 0
+    }
+    
+    @classmethod
+    def configure_profile_cache(cls, ttl_seconds=60, max_size=5000):
+        """
+        Configure the profile cache
+        
+        Args:
+            ttl_seconds: seconds a cached profile is served (0 disables)
+            max_size: profiles kept per worker
+        """
+        with cls._profile_lock:
+            cls._profile_ttl = max(0, int(ttl_seconds))
+            cls._profile_max_size = max(1, int(max_size))
+            cls._profiles.clear()
+        
+        InvalidationChannel.subscribe('user', cls._drop_profile)
+        logger.info(f"User profile cache: {cls._profile_max_size} entries, TTL {cls._profile_ttl}s")
+    
+    @classmethod
+    def _drop_profile(cls, user_id):
+        with cls._profile_lock:
+            cls._profile_generation += 1
+            if cls._profiles.pop(user_id, None) is not None:
+                cls._profile_stats['invalidations'] += 1
+    
+    @classmethod
+    def invalidate_user(cls, user_id):
+        """
+        Drop a cached profile here and on the other workers
+        
+        Called straight away and again once the request transaction commits,
+        so a concurrent read cannot re-cache the old row in between.
+        """
+        cls._drop_profile(user_id)
+        
+        def after_commit():
+            cls._drop_profile(user_id)
+            InvalidationChannel.publish('user', user_id)
+        
+        Database.on_commit(after_commit)
+    
+    @classmethod
+    def get_profile_cache_stats(cls):
+        with cls._profile_lock:
+            stats = dict(cls._profile_stats)
+            stats['size'] = len(cls._profiles)
+            stats['max_size'] = cls._profile_max_size
+            stats['ttl_seconds'] = cls._profile_ttl
+        
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['invalidation_channel'] = InvalidationChannel.get_stats()
+        return stats
+    
+    @classmethod
+    def configure_login_cache(cls, ttl_seconds=30, max_size=10000):
+        """
+        Configure the unknown-identifier cache
+        
+        Args:
+            ttl_seconds: seconds an unknown identifier is remembered (0 disables)
+            max_size: identifiers kept per worker
+        """
+        with cls._unknown_lock:
+            cls._unknown_ttl = max(0, int(ttl_seconds))
+            cls._unknown_max_size = max(1, int(max_size))
+            cls._unknown_logins.clear()
+        
+        InvalidationChannel.subscribe('unknown_login', cls._drop_unknown_logins)
+    
+    @classmethod
+    def _drop_unknown_logins(cls, keys):
+        with cls._unknown_lock:
+            for key in keys:
+                cls._unknown_logins.pop(key, None)
+    
+    @classmethod
+    def forget_unknown_login(cls, *identifiers):
+        """
+        Drop identifiers from the unknown-identifier cache here and on the
+        other workers
+        
+        Like invalidate_user, dropped straight away and again once the
+        request transaction commits, so a login racing the new account
+        cannot re-cache the identifier as unknown in between.
+        """
+        keys = [identifier.strip().lower() for identifier in identifiers if identifier]
+        if not keys:
+            return
+        
+        cls._drop_unknown_logins(keys)
+        
+        def after_commit():
+            cls._drop_unknown_logins(keys)
+            InvalidationChannel.publish('unknown_login', keys)
+        
+        Database.on_commit(after_commit)
+    
+    @classmethod
+    def get_login_cache_stats(cls):
+        with cls._unknown_lock:
+            return {
+                'ttl_seconds': cls._unknown_ttl,
+                'unknown_identifiers': len(cls._unknown_logins),
+                **cls._login_lookup_stats
+            }
+    
     @staticmethod
     def hash_password(password):
-        """Hash password using bcrypt"""
-        salt = bcrypt.gensalt()
-        hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-        return hashed.decode('utf-8')
+        """Hash password using bcrypt (runs on the password worker pool)"""
+        return PasswordService.hash_password(password)
     
     @staticmethod
     def verify_password(password, hashed_password):
-        """Verify password against hash"""
+        """Verify password against hash (runs on the password worker pool)"""
         try:
-            return bcrypt.checkpw(
-                password.encode('utf-8'), 
-                hashed_password.encode('utf-8')
-            )
+            return PasswordService.verify_password(password, hashed_password)
+        except PasswordServiceBusy:
+            raise
         except Exception as e:
             logger.error(f"Error verifying password: {e}")
             return False
@@ -61,6 +199,61 @@ class User:
             logger.error(f"Error checking phone existence: {e}")
             return False
     
+    @staticmethod
+    def find_conflicts(email=None, username=None, phone=None):
+        """
+        Check email, username and phone uniqueness in one query
+        Returns: list of the given fields already taken, e.g. ['email', 'phone']
+        """
+        fields = [(name, value) for name, value in (('email', email), ('username', username), ('phone', phone)) if value]
+        
+        if not fields:
+            return []
+        
+        try:
+            flags = ', '.join(f"MAX({name} = %s) AS {name}_taken" for name, _ in fields)
+            where = ' OR '.join(f"{name} = %s" for name, _ in fields)
+            values = [value for _, value in fields]
+            
+            query = f"SELECT {flags} FROM users WHERE {where}"
+            result = Database.execute_query(query, tuple(values + values), fetch='one')
+            
+            if not result:
+                return []
+            return [name for name, _ in fields if result[f"{name}_taken"]]
+        except Exception as e:
+            logger.error(f"Error checking user conflicts: {e}")
+            return []
+    
+    @staticmethod
+    def pick_available_username(base_username, batch_size=10):
+        """
+        First free username out of base, base1, base2, ...
+        Candidates are checked batch_size at a time with one IN (...) query.
+        """
+        offset = 0
+        
+        while True:
+            candidates = [
+                base_username if n == 0 else f"{base_username}{n}"
+                for n in range(offset, offset + batch_size)
+            ]
+            placeholders = ', '.join(['%s'] * len(candidates))
+            
+            try:
+                query = f"SELECT username FROM users WHERE username IN ({placeholders})"
+                rows = Database.execute_query(query, tuple(candidates), fetch='all') or []
+            except Exception as e:
+                logger.error(f"Error checking username candidates: {e}")
+                return candidates[0]
+            
+            taken = {row['username'].lower() for row in rows}
+            for candidate in candidates:
+                if candidate.lower() not in taken:
+                    return candidate
+            
+            offset += batch_size
+    
     @staticmethod
     def create_user(user_data):
         """
@@ -71,18 +264,18 @@ class User:
         cursor = None
         
         try:
-            # Check if email exists
-            if User.email_exists(user_data['email']):
+            # Check email, username and phone in one query
+            conflicts = User.find_conflicts(user_data['email'], user_data['username'], user_data['phone'])
+            
+            if 'email' in conflicts:
                 logger.warning(f"Email already exists: {user_data['email']}")
                 return False, "Email already registered"
             
-            # Check if username exists
-            if User.username_exists(user_data['username']):
+            if 'username' in conflicts:
                 logger.warning(f"Username already exists: {user_data['username']}")
                 return False, "Username already taken"
             
-            # Check if phone exists
-            if User.phone_exists(user_data['phone']):
+            if 'phone' in conflicts:
                 logger.warning(f"Phone already exists: {user_data['phone']}")
                 return False, "Phone number already registered"
             
@@ -132,6 +325,7 @@ class User:
             user_id = cursor.lastrowid
             
             if user_id and user_id > 0:
+                User.forget_unknown_login(user_data['email'], user_data['username'])
                 logger.info(f"User created successfully with ID {user_id}: {user_data['email']}")
                 return True, user_id
             else:
@@ -160,13 +354,14 @@ class User:
         cursor = None
         
         try:
-            # Check if email exists
-            if User.email_exists(user_data['email']):
+            # Check email and username in one query
+            conflicts = User.find_conflicts(user_data['email'], user_data['username'])
+            
+            if 'email' in conflicts:
                 logger.warning(f"Email already exists: {user_data['email']}")
                 return False, "Email already registered"
             
-            # Check if username exists
-            if User.username_exists(user_data['username']):
+            if 'username' in conflicts:
                 logger.warning(f"Username already exists: {user_data['username']}")
                 return False, "Username already taken"
             
@@ -210,6 +405,7 @@ class User:
             user_id = cursor.lastrowid
             
             if user_id and user_id > 0:
+                User.forget_unknown_login(user_data['email'], user_data['username'])
                 logger.info(f"Google user created successfully with ID {user_id}: {user_data['email']}")
                 return True, user_id
             else:
@@ -228,9 +424,19 @@ class User:
             if connection:
                 connection.close()
     
-    @staticmethod
-    def get_user_by_id(user_id):
-        """Get user by ID"""
+    @classmethod
+    def get_user_by_id(cls, user_id):
+        """Get user by ID (served from the profile cache when fresh)"""
+        if cls._profile_ttl:
+            with cls._profile_lock:
+                entry = cls._profiles.get(user_id)
+                if entry is not None and entry[0] > time.monotonic():
+                    cls._profiles.move_to_end(user_id)
+                    cls._profile_stats['hits'] += 1
+                    return dict(entry[1])
+                cls._profile_stats['misses'] += 1
+                generation = cls._profile_generation
+        
         try:
             query = """
                 SELECT id, email, username, phone, full_name, address, 
@@ -241,10 +447,21 @@ class User:
                 WHERE id = %s
             """
             result = Database.execute_query(query, (user_id,), fetch='one')
-            return result
         except Exception as e:
             logger.error(f"Error getting user by ID: {e}")
             return None
+        
+        # Don't cache rows this request has written but not yet committed
+        if result is not None and cls._profile_ttl and not Database.has_pending_writes():
+            with cls._profile_lock:
+                if generation == cls._profile_generation:
+                    cls._profiles[user_id] = (time.monotonic() + cls._profile_ttl, dict(result))
+                    cls._profiles.move_to_end(user_id)
+                    if len(cls._profiles) > cls._profile_max_size:
+                        cls._profiles.popitem(last=False)
+                        cls._profile_stats['evictions'] += 1
+        
+        return result
     
     @staticmethod
     def get_user_by_email(email):
@@ -345,6 +562,7 @@ class User:
             
             cursor.execute(query, tuple(values))
             connection.commit()
+            User.invalidate_user(user_id)
             
             logger.info(f"User {user_id} updated successfully")
             return True, "User updated successfully"
@@ -379,6 +597,7 @@ class User:
             query = "UPDATE users SET password_hash = %s WHERE id = %s"
             cursor.execute(query, (password_hash, user_id))
             connection.commit()
+            User.invalidate_user(user_id)
             
             logger.info(f"Password updated for user {user_id}")
             return True, "Password updated successfully"
@@ -404,6 +623,7 @@ class User:
         try:
             query = "UPDATE users SET is_active = FALSE WHERE id = %s"
             Database.execute_query(query, (user_id,))
+            User.invalidate_user(user_id)
             
             logger.info(f"User {user_id} deactivated")
             return True, "User deactivated successfully"
@@ -421,6 +641,7 @@ class User:
         try:
             query = "UPDATE users SET is_active = TRUE WHERE id = %s"
             Database.execute_query(query, (user_id,))
+            User.invalidate_user(user_id)
             
             logger.info(f"User {user_id} activated")
             return True, "User activated successfully"
@@ -438,6 +659,7 @@ class User:
         try:
             query = "DELETE FROM users WHERE id = %s"
             Database.execute_query(query, (user_id,))
+            User.invalidate_user(user_id)
             
             logger.info(f"User {user_id} deleted permanently")
             return True, "User deleted successfully"
@@ -459,6 +681,57 @@ class User:
                 del user['password_hash']
         return user
     
+    @classmethod
+    def get_user_for_login(cls, email_or_username):
+        """
+        Get user by email or username in one query
+        
+        Both columns are indexed and use a case-insensitive collation, so the
+        OR is served by an index merge. An email match wins over a username
+        match, as it did when they were looked up one after the other.
+        """
+        key = email_or_username.strip().lower()
+        
+        if cls._unknown_ttl:
+            with cls._unknown_lock:
+                expires_at = cls._unknown_logins.get(key)
+                if expires_at is not None:
+                    if expires_at > time.monotonic():
+                        cls._login_lookup_stats['negative_hits'] += 1
+                        return None
+                    del cls._unknown_logins[key]
+        
+        try:
+            query = """
+                SELECT id, email, username, password_hash, phone, full_name,
+                       address, city, pincode, service_type,
+                       communication_preference, subscribe_newsletter,
+                       profile_picture, is_active, email_verified,
+                       created_at, updated_at
+                FROM users 
+                WHERE email = %s OR username = %s
+                ORDER BY email = %s DESC
+                LIMIT 1
+            """
+            result = Database.execute_query(
+                query,
+                (email_or_username, email_or_username, email_or_username),
+                fetch='one'
+            )
+            cls._login_lookup_stats['queries'] += 1
+        except Exception as e:
+            logger.error(f"Error getting user for login: {e}")
+            return None
+        
+        if result is None and cls._unknown_ttl:
+            with cls._unknown_lock:
+                cls._unknown_logins[key] = time.monotonic() + cls._unknown_ttl
+                cls._unknown_logins.move_to_end(key)
+                if len(cls._unknown_logins) > cls._unknown_max_size:
+                    cls._unknown_logins.popitem(last=False)
+        
+        return result
+    
     @staticmethod
     def authenticate(email_or_username, password):
         """
@@ -466,12 +739,7 @@ class User:
         Returns: (success, user_data/error_message)
         """
         try:
-            # Try to find user by email first
-            user = User.get_user_by_email(email_or_username)
-            
-            # If not found, try username
-            if not user:
-                user = User.get_user_by_username(email_or_username)
+            user = User.get_user_for_login(email_or_username)
             
             if not user:
                 return False, "Invalid credentials"
@@ -484,28 +752,52 @@ class User:
             if not User.verify_password(password, user['password_hash']):
                 return False, "Invalid credentials"
             
+            # Upgrade hashes made with a different cost factor while we have the password
+            if PasswordService.needs_rehash(user['password_hash']):
+                User._rehash_password(user['id'], password)
+            
             # Remove password hash from response
             del user['password_hash']
             
             logger.info(f"User authenticated: {user['email']}")
             return True, user
             
+        except PasswordServiceBusy:
+            raise
         except Exception as e:
             logger.error(f"Error authenticating user: {e}")
             return False, "Authentication failed"
     
+    @staticmethod
+    def _rehash_password(user_id, password):
+        """Store a hash at the current cost factor (failures only logged)"""
+        try:
+            query = "UPDATE users SET password_hash = %s WHERE id = %s"
+            Database.execute_query(query, (User.hash_password(password), user_id), fetch=None)
+            User.invalidate_user(user_id)
+            logger.info(f"Password rehashed for user {user_id}")
+        except Exception as e:
+            logger.warning(f"Password rehash failed for user {user_id}: {e}")
+    
     @staticmethod
     def record_login_attempt(email, ip_address, success):
         """
         Record login attempt for security monitoring
+        Failures count towards the email and IP lockout windows straight away;
+        the login_attempts row is written behind in a batch as an audit trail.
         Returns: (success, message)
         """
         try:
-            query = """
-                INSERT INTO login_attempts (email, ip_address, success)
-                VALUES (%s, %s, %s)
-            """
-            Database.execute_query(query, (email, ip_address, success))
+            if not success:
+                RateLimiter.hit('login_email', email)
+                if ip_address:
+                    RateLimiter.hit('login_ip', ip_address)
+            
+            WriteBehindBuffer.record(
+                'login_attempts',
+                ('email', 'ip_address', 'success'),
+                (email, ip_address, success)
+            )
             return True, "Login attempt recorded"
         except Exception as e:
             logger.error(f"Error recording login attempt: {e}")
@@ -514,12 +806,15 @@ class User:
     @staticmethod
     def get_recent_login_attempts(email, minutes=15):
         """
-        Get recent failed login attempts for rate limiting
+        Get recent failed login attempts from the audit trail (reporting only;
+        lockout decisions use the rate limiter)
         Returns: count of failed attempts
         """
         try:
             from datetime import datetime, timedelta
             time_ago = datetime.now() - timedelta(minutes=minutes)
+            WriteBehindBuffer.flush('login_attempts')
+            
             
             query = """
                 SELECT COUNT(*) as count
@@ -535,16 +830,40 @@ class User:
             return 0
     
     @staticmethod
-    def is_account_locked(email, max_attempts=5, lockout_minutes=15):
+    def cleanup_login_attempts(retention_days=30, chunk_size=1000, pause_seconds=0.05):
+        """
+        Delete login attempts older than retention_days in chunks
+        Run by the maintenance scheduler
+        Returns: number of deleted rows
+        """
+        try:
+            deleted = Database.delete_in_chunks(
+                'login_attempts',
+                'attempt_time < NOW() - INTERVAL %s DAY',
+                (int(retention_days),),
+                chunk_size=chunk_size,
+                pause_seconds=pause_seconds
+            )
+            logger.info(f"Login attempts older than {retention_days} days cleaned up ({deleted} deleted)")
+            return deleted
+        except Exception as e:
+            logger.error(f"Error cleaning up login attempts: {e}")
+            return 0
+    
+    @staticmethod
+    def is_account_locked(email, max_attempts=5, lockout_minutes=15, ip_address=None):
         """
-        Check if account is temporarily locked due to failed login attempts
+        Check if account (or client IP) is temporarily locked due to failed login attempts
         Returns: (is_locked, remaining_time_minutes)
         """
         try:
-            failed_attempts = User.get_recent_login_attempts(email, lockout_minutes)
+            allowed, retry_after = RateLimiter.check('login_email', email, max_attempts, lockout_minutes * 60)
+            
+            if allowed and ip_address:
+                allowed, retry_after = RateLimiter.check('login_ip', ip_address)
             
-            if failed_attempts >= max_attempts:
-                return True, lockout_minutes
+            if not allowed:
+                return True, max(1, math.ceil(retry_after / 60))
             
             return False, 0
         except Exception as e:
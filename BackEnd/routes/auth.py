@@ -2,10 +2,14 @@ from flask import Blueprint, request, jsonify
 from BackEnd.models.user import User
 from BackEnd.services.otp_service import OTPService
 from BackEnd.services.email_service import EmailService
-from BackEnd.services.jwt_service import JWTService, token_required
+from BackEnd.services.jwt_service import JWTService, TokenCache, token_required
 from BackEnd.services.google_oauth_service import GoogleOAuthService
 from BackEnd.services.password_reset_service import PasswordResetService
 from BackEnd.services.session_service import SessionService
+from BackEnd.services.refresh_token_service import RefreshTokenService
+from BackEnd.services.rate_limiter import RateLimiter
+from BackEnd.services.write_behind import WriteBehindBuffer
+from BackEnd.services.password_service import PasswordServiceBusy
 from BackEnd.utils.validators import Validators
 from BackEnd.utils.database import Database
 import logging
@@ -19,9 +23,14 @@ def init_auth_routes(app, config):
 
     email_service = EmailService(config)
     jwt_service = JWTService(config.JWT_SECRET_KEY, config.JWT_ALGORITHM)
-    google_oauth_service = GoogleOAuthService(config.GOOGLE_CLIENT_ID)
+    google_oauth_service = GoogleOAuthService(config.GOOGLE_CLIENT_ID, config.GOOGLE_CERTS_URL)
 
     app.config['JWT_SERVICE'] = jwt_service
+    TokenCache.configure(
+        max_size=config.JWT_CACHE_SIZE,
+        revocation_ttl_seconds=config.JWT_REFRESH_TOKEN_EXPIRES * 24 * 3600
+    )
+    User.configure_login_cache(config.LOGIN_NEGATIVE_CACHE_SECONDS)
 
     # ---------- SEND OTP ----------
     @auth_bp.route('/send-otp', methods=['POST', 'OPTIONS'])
@@ -71,7 +80,8 @@ def init_auth_routes(app, config):
                 email, 
                 'registration',
                 config.OTP_MAX_ATTEMPTS,
-                config.OTP_EXPIRY_MINUTES
+                config.OTP_EXPIRY_MINUTES,
+                request.remote_addr
             )
 
             if not can_request:
@@ -301,7 +311,8 @@ def init_auth_routes(app, config):
             is_locked, remaining_time = User.is_account_locked(
                 email_or_username,
                 config.MAX_LOGIN_ATTEMPTS,
-                config.LOGIN_LOCKOUT_MINUTES
+                config.LOGIN_LOCKOUT_MINUTES,
+                ip_address
             )
 
             if is_locked:
@@ -325,10 +336,11 @@ def init_auth_routes(app, config):
                 expires_in_hours=config.JWT_ACCESS_TOKEN_EXPIRES
             )
 
-            refresh_token = jwt_service.generate_refresh_token(
-                user['id'],
-                user['email'],
-                expires_in_days=config.JWT_REFRESH_TOKEN_EXPIRES
+            refresh_token = RefreshTokenService.issue(
+                jwt_service,
+                user,
+                expires_in_days=config.JWT_REFRESH_TOKEN_EXPIRES,
+                ip_address=ip_address
             )
 
             SessionService.create_session(
@@ -349,10 +361,56 @@ def init_auth_routes(app, config):
                 expires_in=config.JWT_ACCESS_TOKEN_EXPIRES * 3600
             ), 200
 
+        except PasswordServiceBusy as e:
+            # Not a failed attempt: the password was never checked
+            return jsonify(success=False, message=str(e)), 503, {'Retry-After': '1'}
+
         except Exception as e:
             logger.exception("Login error")
             return jsonify(success=False, message='Internal server error'), 500
 
+    # ---------- REFRESH TOKEN ----------
+    @auth_bp.route('/token/refresh', methods=['POST', 'OPTIONS'])
+    def refresh_access_token():
+        """Exchange a refresh token for a new access token (no password check)"""
+        
+        # Handle CORS preflight
+        if request.method == 'OPTIONS':
+            return jsonify(success=True), 200
+
+        try:
+            data = request.get_json(silent=True)
+
+            if not data or not data.get('refresh_token'):
+                return jsonify(
+                    success=False,
+                    message='Refresh token is required'
+                ), 400
+
+            success, result = RefreshTokenService.rotate(
+                jwt_service,
+                data['refresh_token'],
+                config,
+                ip_address=request.remote_addr,
+                user_agent=request.headers.get('User-Agent', '')
+            )
+
+            if not success:
+                return jsonify(success=False, message=result), 401
+
+            return jsonify(
+                success=True,
+                message='Token refreshed',
+                access_token=result['access_token'],
+                refresh_token=result['refresh_token'],
+                token_type='Bearer',
+                expires_in=result['expires_in']
+            ), 200
+
+        except Exception as e:
+            logger.exception("Token refresh error")
+            return jsonify(success=False, message='Internal server error'), 500
+
     # ---------- FORGOT PASSWORD ----------
     @auth_bp.route('/forgot-password', methods=['POST', 'OPTIONS'])
     def forgot_password():
@@ -480,6 +538,7 @@ def init_auth_routes(app, config):
             
             PasswordResetService.mark_token_as_used(token)
             SessionService.delete_user_sessions(user['id'])
+            RefreshTokenService.revoke_user_tokens(user['id'])
             
             logger.info(f"Password reset successful for: {email}")
             
@@ -537,7 +596,14 @@ def init_auth_routes(app, config):
     @auth_bp.route('/health-auth', methods=['GET', 'OPTIONS'])
     def auth_health():
         """Health check for auth routes"""
-        return jsonify(status='ok'), 200
+        return jsonify(
+            status='ok',
+            token_cache=TokenCache.get_stats(),
+            rate_limiter=RateLimiter.get_stats(),
+            write_behind=WriteBehindBuffer.get_stats(),
+            login_lookup=User.get_login_cache_stats(),
+            google_certs=google_oauth_service.cert_cache.get_stats()
+        ), 200
 
     # Register blueprint
     app.register_blueprint(auth_bp)
\ No newline at end of file
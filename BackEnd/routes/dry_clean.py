@@ -4,8 +4,11 @@
 # ============================================
 
 from flask import Blueprint, request, jsonify
-from BackEnd.models.dry_clean import DryClean
-from BackEnd.services.jwt_service import optional_token, token_required
+from BackEnd.models.dry_clean import DryClean, EXPORT_FIELDS
+from BackEnd.services.jwt_service import optional_token, token_required, admin_required
+from BackEnd.services.idempotency import idempotent
+from BackEnd.utils.pagination import Pagination
+from BackEnd.utils.export import Export, EXPORT_FORMATS
 import logging
 
 logger = logging.getLogger(__name__)
@@ -20,6 +23,7 @@ def init_dry_clean_routes(app):
     # ========================================
     @dry_clean_bp.route('/orders', methods=['POST', 'OPTIONS'])
     @optional_token
+    @idempotent('dry_clean_orders')
     def create_dry_clean_order():
         """Create a new dry clean order"""
         
@@ -102,14 +106,35 @@ def init_dry_clean_routes(app):
             status = request.args.get('status')
             limit = request.args.get('limit', type=int)
             email = request.args.get('email')
+            cursor = request.args.get('cursor')
+            
+            if limit is not None and limit <= 0:
+                return jsonify({
+                    'success': False,
+                    'message': 'Limit must be a positive number'
+                }), 400
+            
+            # Always page; use /orders/export for the full history
+            limit = Pagination.page_size(limit)
+            after = None
+            
+            if cursor:
+                try:
+                    after = Pagination.decode_cursor(cursor)
+                except ValueError:
+                    return jsonify({
+                        'success': False,
+                        'message': 'Invalid cursor'
+                    }), 400
             
             # Get orders
-            orders = DryClean.get_all_orders(status=status, limit=limit, email=email)
+            orders = DryClean.get_all_orders(status=status, limit=limit, email=email, after=after)
             
             return jsonify({
                 'success': True,
                 'orders': orders,
-                'count': len(orders)
+                'count': len(orders),
+                'next_cursor': Pagination.next_cursor(orders, limit)
             }), 200
             
         except Exception as e:
@@ -119,6 +144,34 @@ def init_dry_clean_routes(app):
                 'message': 'Failed to fetch orders'
             }), 500
     
+    # ========================================
+    # EXPORT DRY CLEAN ORDERS (ADMIN)
+    # ========================================
+    @dry_clean_bp.route('/orders/export', methods=['GET', 'OPTIONS'])
+    @token_required
+    @admin_required
+    def export_dry_clean_orders():
+        """Stream every dry clean order as NDJSON (default) or CSV"""
+        
+        export_format = request.args.get('format', 'ndjson').lower()
+        status = request.args.get('status')
+        email = request.args.get('email')
+        
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({
+                'success': False,
+                'message': f'Format must be one of: {", ".join(EXPORT_FORMATS)}'
+            }), 400
+        
+        logger.info(f"Streaming {export_format} dry clean export for {request.current_user.get('email')}")
+        
+        return Export.response(
+            DryClean.iter_all_orders(status=status, email=email),
+            export_format,
+            'dry_clean_orders',
+            EXPORT_FIELDS
+        )
+    
     # ========================================
     # GET DRY CLEAN ORDER BY ID
     # ========================================
@@ -3,75 +3,62 @@
 # API endpoints for order management
 # ============================================
 
-from flask import Blueprint, request, jsonify
-from BackEnd.models.order import Order
-from functools import wraps
+from flask import Blueprint, Response, request, jsonify
+from BackEnd.models.order import Order, ADMIN_ORDER_FIELDS
+from BackEnd.models.order_events import OrderEvents
+from BackEnd.services.jwt_service import token_required, admin_required
+from BackEnd.services.idempotency import idempotent
+from BackEnd.utils.pagination import Pagination
+from BackEnd.utils.export import Export, EXPORT_FORMATS
+import threading
 import logging
+import json
+import time
 
 logger = logging.getLogger(__name__)
 
 order_bp = Blueprint('order', __name__, url_prefix='/api/orders')
 
+# Largest page /my-orders returns when paginating
+MAX_ORDERS_PAGE_SIZE = 100
+
+# Status feed: events per read, and seconds between SSE keepalive comments
+ORDER_EVENTS_BATCH_SIZE = 100
+ORDER_EVENTS_KEEPALIVE_SECONDS = 15
+
+
+def _event_cursor(value):
+    """Parse a feed cursor (Last-Event-ID / after); None when absent or invalid"""
+    try:
+        cursor = int(value)
+    except (TypeError, ValueError):
+        return None
+    return cursor if cursor >= 0 else None
+
 
 def init_order_routes(app):
     """Initialize order routes"""
     
-    # Get JWT service from app config
-    jwt_service = app.config.get('JWT_SERVICE')
+    poll_seconds = app.config.get('ORDER_EVENTS_POLL_SECONDS', 2)
+    stream_seconds = app.config.get('ORDER_EVENTS_STREAM_SECONDS', 300)
+    long_poll_seconds = app.config.get('ORDER_EVENTS_LONG_POLL_SECONDS', 25)
+    short_poll_seconds = app.config.get('ORDER_EVENTS_SHORT_POLL_SECONDS', 10)
     
-    # Define token_required decorator
-    def token_required(f):
-        @wraps(f)
-        def decorated(*args, **kwargs):
-            token = None
-            
-            # Handle OPTIONS request
-            if request.method == 'OPTIONS':
-                return jsonify(success=True), 200
-            
-            # Get token from header
-            auth_header = request.headers.get('Authorization')
-            
-            if auth_header and auth_header.startswith('Bearer '):
-                token = auth_header.split(' ')[1]
-            
-            if not token:
-                logger.warning("No token provided")
-                return jsonify({
-                    'success': False,
-                    'message': 'Token is missing'
-                }), 401
-            
-            try:
-                # Verify token
-                is_valid, payload = jwt_service.verify_token(token)
-                
-                if not is_valid:
-                    logger.warning(f"Invalid token: {payload}")
-                    return jsonify({
-                        'success': False,
-                        'message': 'Invalid or expired token'
-                    }), 401
-                
-                # Add user info to request
-                request.current_user = payload
-                
-            except Exception as e:
-                logger.exception(f"Token verification error: {e}")
-                return jsonify({
-                    'success': False,
-                    'message': 'Token verification failed'
-                }), 401
-            
-            return f(*args, **kwargs)
-        
-        return decorated
+    # A waiting long poll or open stream holds a request thread, so both share
+    # one cap sized from the worker's threads (WORKER_THREADS); with sync
+    # workers it is 0 and the feed only answers short polls
+    max_waiting = max(0, app.config.get('ORDER_EVENTS_MAX_WAITING', 0))
+    waiting_slots = threading.BoundedSemaphore(max_waiting) if max_waiting else None
+    
+    def take_waiting_slot():
+        return waiting_slots is not None and waiting_slots.acquire(blocking=False)
     
     # ========================================
     # CREATE ORDER
     # ========================================
     @order_bp.route('', methods=['POST', 'OPTIONS'])
     @token_required
+    @idempotent('orders')
     def create_order():
         """Create a new order"""
         
@@ -108,11 +95,20 @@ def init_order_routes(app):
             user_id = request.current_user.get('user_id') or request.current_user.get('id')
             
             logger.info(f"Creating order for user {user_id}")
-            logger.info(f"Order data: Service={data.get('service_type')}, Items={data.get('total_items')}, Amount={data.get('total_amount')}")
-            logger.info(f"Urgent items: {data.get('urgent_items')}, Normal items: {data.get('normal_items')}")
+            logger.debug(f"Order data: Service={data.get('service_type')}, Items={data.get('total_items')}, Amount={data.get('total_amount')}")
+            logger.debug(f"Urgent items: {data.get('urgent_items')}, Normal items: {data.get('normal_items')}")
+            
+            # Price the basket against the catalog (client prices are not trusted)
+            success, priced_items = Order.price_items(data['items'], data.get('service_type') or 'iron')
+            
+            if not success:
+                return jsonify({
+                    'success': False,
+                    'message': priced_items
+                }), 400
             
             # Create order in database
-            success, result = Order.create_order(user_id, data)
+            success, result = Order.create_order(user_id, data, priced_items)
             
             if success:
                 order_id = result
@@ -155,16 +151,31 @@ def init_order_routes(app):
             # Get query parameters
             limit = request.args.get('limit', type=int)
             status = request.args.get('status', type=str)
+            before_id = request.args.get('before_id', type=int)
+            
+            if limit is not None and limit <= 0:
+                return jsonify({
+                    'success': False,
+                    'message': 'Limit must be a positive number'
+                }), 400
+            
+            # Paginated requests are capped so every page has bounded cost
+            if before_id is not None or limit is not None:
+                limit = min(limit or MAX_ORDERS_PAGE_SIZE, MAX_ORDERS_PAGE_SIZE)
             
             logger.info(f"Fetching orders for user {user_id}")
             
             # Get orders from database
-            orders = Order.get_user_orders(user_id, limit=limit, status=status)
+            orders = Order.get_user_orders(user_id, limit=limit, status=status, before_id=before_id)
+            
+            # Cursor for the next page (None when this was the last page)
+            next_before_id = orders[-1]['id'] if limit and len(orders) == limit else None
             
             return jsonify({
                 'success': True,
                 'orders': orders,
-                'count': len(orders)
+                'count': len(orders),
+                'next_before_id': next_before_id
             }), 200
         
         except Exception as e:
@@ -353,6 +364,226 @@ def init_order_routes(app):
                 'message': f'Internal server error: {str(e)}'
             }), 500
     
+    # ========================================
+    # GET ALL ORDERS (ADMIN)
+    # ========================================
+    @order_bp.route('/all', methods=['GET', 'OPTIONS'])
+    @token_required
+    @admin_required
+    def get_all_orders():
+        """List every order, newest first, one keyset page at a time"""
+        
+        try:
+            status = request.args.get('status', type=str)
+            limit = request.args.get('limit', type=int)
+            cursor = request.args.get('cursor')
+            service_type = request.args.get('service_type', type=str)
+            pincode = request.args.get('pincode', type=str)
+            urgent = request.args.get('urgent', type=str)
+            
+            if urgent is not None:
+                urgent = urgent.lower() in ('true', '1', 'yes')
+            
+            if limit is not None and limit <= 0:
+                return jsonify({
+                    'success': False,
+                    'message': 'Limit must be a positive number'
+                }), 400
+            
+            limit = Pagination.page_size(limit)
+            after = None
+            
+            if cursor:
+                try:
+                    after = Pagination.decode_cursor(cursor)
+                except ValueError:
+                    return jsonify({
+                        'success': False,
+                        'message': 'Invalid cursor'
+                    }), 400
+            
+            orders = Order.get_all_orders(
+                limit=limit,
+                status=status,
+                after=after,
+                service_type=service_type,
+                pincode=pincode,
+                urgent=urgent
+            )
+            
+            return jsonify({
+                'success': True,
+                'orders': orders,
+                'count': len(orders),
+                'next_cursor': Pagination.next_cursor(orders, limit)
+            }), 200
+        
+        except Exception as e:
+            logger.exception(f"Error in get_all_orders: {e}")
+            return jsonify({
+                'success': False,
+                'message': f'Internal server error: {str(e)}'
+            }), 500
+    
+    # ========================================
+    # EXPORT ORDERS (ADMIN)
+    # ========================================
+    @order_bp.route('/export', methods=['GET', 'OPTIONS'])
+    @token_required
+    @admin_required
+    def export_orders():
+        """Stream every order as NDJSON (default) or CSV"""
+        
+        export_format = request.args.get('format', 'ndjson').lower()
+        status = request.args.get('status', type=str)
+        
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({
+                'success': False,
+                'message': f'Format must be one of: {", ".join(EXPORT_FORMATS)}'
+            }), 400
+        
+        logger.info(f"Streaming {export_format} order export for {request.current_user.get('email')}")
+        
+        return Export.response(
+            Order.iter_all_orders(status=status),
+            export_format,
+            'orders',
+            ADMIN_ORDER_FIELDS
+        )
+    
+    # ========================================
+    # ORDER STATUS FEED (LONG POLL)
+    # ========================================
+    @order_bp.route('/events', methods=['GET', 'OPTIONS'])
+    @token_required
+    def get_order_events():
+        """
+        Status changes of the user's orders after a cursor
+        
+        Waits up to `wait` seconds for the first event. Without `after` the
+        current cursor is returned immediately, to start following from now.
+        When this worker has no thread to spare for waiting, it answers at
+        once; `poll_after` tells the client how many seconds to wait before
+        the next call (0: call again right away).
+        """
+        
+        try:
+            user_id = request.current_user.get('user_id') or request.current_user.get('id')
+            after = _event_cursor(request.args.get('after'))
+            wait = min(max(request.args.get('wait', long_poll_seconds, type=int), 0), long_poll_seconds)
+            
+            if after is None:
+                return jsonify({
+                    'success': True,
+                    'events': [],
+                    'cursor': OrderEvents.get_latest_seq(user_id),
+                    'poll_after': 0
+                }), 200
+            
+            events = OrderEvents.get_events(user_id, after, ORDER_EVENTS_BATCH_SIZE)
+            poll_after = 0
+            
+            if not events and wait > 0:
+                if take_waiting_slot():
+                    try:
+                        deadline = time.monotonic() + wait
+                        while not events and time.monotonic() < deadline:
+                            time.sleep(min(poll_seconds, max(0, deadline - time.monotonic())))
+                            events = OrderEvents.get_events(user_id, after, ORDER_EVENTS_BATCH_SIZE)
+                    finally:
+                        waiting_slots.release()
+                else:
+                    poll_after = short_poll_seconds
+            
+            return jsonify({
+                'success': True,
+                'events': events,
+                'cursor': events[-1]['seq'] if events else after,
+                'poll_after': poll_after
+            }), 200
+        
+        except Exception as e:
+            logger.exception(f"Error in get_order_events: {e}")
+            return jsonify({
+                'success': False,
+                'message': f'Internal server error: {str(e)}'
+            }), 500
+    
+    # ========================================
+    # ORDER STATUS FEED (SERVER-SENT EVENTS)
+    # ========================================
+    @order_bp.route('/events/stream', methods=['GET', 'OPTIONS'])
+    @token_required
+    def stream_order_events():
+        """
+        Stream status changes of the user's orders as Server-Sent Events
+        
+        Resumes after Last-Event-ID (or `after`), otherwise starts from now.
+        The stream closes after ORDER_EVENTS_STREAM_SECONDS and the client
+        reconnects with its Last-Event-ID. Streams share the waiting cap with
+        long polls; without a free slot clients get 503 and should use
+        /events. Needs the Authorization header, so it is for API clients:
+        browsers (EventSource cannot send it) use the /events long poll.
+        """
+        
+        if not take_waiting_slot():
+            return jsonify({
+                'success': False,
+                'message': 'No event stream available, use /api/orders/events'
+            }), 503, {'Retry-After': str(short_poll_seconds)}
+        
+        try:
+            user_id = request.current_user.get('user_id') or request.current_user.get('id')
+            cursor = _event_cursor(request.headers.get('Last-Event-ID'))
+            if cursor is None:
+                cursor = _event_cursor(request.args.get('after'))
+            if cursor is None:
+                cursor = OrderEvents.get_latest_seq(user_id)
+        except Exception as e:
+            waiting_slots.release()
+            logger.exception(f"Error opening order event stream: {e}")
+            return jsonify({
+                'success': False,
+                'message': f'Internal server error: {str(e)}'
+            }), 500
+        
+        def generate(cursor):
+            # Runs outside the request context, so every read checks a
+            # connection out of the pool only for that query
+            deadline = time.monotonic() + stream_seconds
+            last_sent = time.monotonic()
+            
+            yield f"retry: {poll_seconds * 1000}\nid: {cursor}\nevent: ready\ndata: {json.dumps({'cursor': cursor})}\n\n"
+            
+            try:
+                while time.monotonic() < deadline:
+                    events = OrderEvents.get_events(user_id, cursor, ORDER_EVENTS_BATCH_SIZE)
+                    
+                    for event in events:
+                        cursor = event['seq']
+                        yield f"id: {cursor}\nevent: order_status\ndata: {json.dumps(event, default=str)}\n\n"
+                    
+                    if events:
+                        last_sent = time.monotonic()
+                        if len(events) == ORDER_EVENTS_BATCH_SIZE:
+                            continue
+                    elif time.monotonic() - last_sent >= ORDER_EVENTS_KEEPALIVE_SECONDS:
+                        last_sent = time.monotonic()
+                        yield ": keepalive\n\n"
+                    
+                    time.sleep(poll_seconds)
+            
+            except Exception as e:
+                logger.error(f"Order event stream for user {user_id} ended: {e}")
+        
+        response = Response(generate(cursor), mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'
+        response.call_on_close(waiting_slots.release)
+        
+        return response
+    
     # ========================================
     # HEALTH CHECK
     # ========================================
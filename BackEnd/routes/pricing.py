@@ -16,6 +16,9 @@ pricing_bp = Blueprint('pricing', __name__, url_prefix='/api/pricing')
 def init_pricing_routes(app):
     """Initialize pricing routes"""
     
+    # Catalog reads are served from an in-process snapshot
+    Pricing.configure_cache(app.config.get('PRICING_CACHE_TTL_SECONDS', 300))
+    
     # ========================================
     # GET ALL CATEGORIES
     # ========================================
@@ -454,7 +457,8 @@ def init_pricing_routes(app):
             return jsonify({
                 'status': 'healthy',
                 'message': 'Pricing API is operational',
-                'categories_count': len(categories)
+                'categories_count': len(categories),
+                'catalog_cache': Pricing.get_cache_stats()
             }), 200
             
         except Exception as e:
@@ -18,6 +18,9 @@ def init_user_routes(app, config):
     email_service = EmailService(config)
     image_upload_service = ImageUploadService(config.UPLOAD_FOLDER)
     
+    # Profile reads are served from a per-worker cache
+    User.configure_profile_cache(config.USER_CACHE_TTL_SECONDS, config.USER_CACHE_SIZE)
+    
     # ---------- GET USER PROFILE ----------
     @user_bp.route('/user/<int:user_id>', methods=['GET', 'OPTIONS'])
     @token_required
@@ -429,7 +432,8 @@ def init_user_routes(app, config):
         # No authentication required for health check
         return jsonify(
             status='ok',
-            message='User routes are working'
+            message='User routes are working',
+            profile_cache=User.get_profile_cache_stats()
         ), 200
     
     # Register blueprint
@@ -3,5 +3,7 @@
 from .email_service import EmailService
 from .otp_service import OTPService
 from .image_upload_service import ImageUploadService
+from .password_service import PasswordService
+from .rate_limiter import RateLimiter
 
-__all__ = ['EmailService', 'OTPService', 'ImageUploadService']
\ No newline at end of file
+__all__ = ['EmailService', 'OTPService', 'ImageUploadService', 'PasswordService', 'RateLimiter']
\ No newline at end of file
@@ -0,0 +1,144 @@
+# ============================================
+# CACHE INVALIDATION CHANNEL
+# Tells the other workers to drop per-worker cache
+# entries, over Redis pub/sub when configured
+# ============================================
+
+import threading
+import logging
+import socket
+import json
+import time
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidationChannel:
+    """
+    Cross-worker cache invalidation
+    
+    Without SHARED_STORE_URL this is a no-op and per-worker caches rely on
+    their TTLs. With it, publish(topic, key) reaches every other worker,
+    whose handler for that topic drops the key.
+    """
+    
+    CHANNEL = 'quick_laundry:invalidate'
+    
+    _url = None
+    _client = None
+    _subscriber = None  # separate client without a read timeout for the listener
+    _handlers = {}  # topic -> callable(key)
+    _thread = None
+    _pid = None
+    _lock = threading.Lock()
+    _stats = {'published': 0, 'received': 0, 'errors': 0}
+    
+    @classmethod
+    def configure(cls, url):
+        """Use the shared store at url (None keeps invalidation per worker)"""
+        cls._url = url
+        cls._client = None
+        cls._subscriber = None
+        
+        if not url:
+            return
+        
+        try:
+            import redis  # optional dependency, only needed with SHARED_STORE_URL
+            
+            cls._client = redis.Redis.from_url(url, socket_timeout=1)
+            cls._client.ping()
+            # The listener idles between messages; a 1s read timeout there
+            # would turn every quiet second into a dropped subscription
+            cls._subscriber = redis.Redis.from_url(url, socket_timeout=None, health_check_interval=30)
+            logger.info("Cache invalidation channel connected")
+        except Exception as e:
+            cls._client = None
+            cls._subscriber = None
+            logger.warning(f"Cache invalidation channel unavailable, caches rely on TTLs: {e}")
+    
+    @classmethod
+    def subscribe(cls, topic, handler):
+        """Call handler(key) when another worker publishes on topic"""
+        cls._handlers[topic] = handler
+        cls._ensure_listening()
+    
+    @classmethod
+    def _origin(cls):
+        return f"{socket.gethostname()}:{os.getpid()}"
+    
+    @classmethod
+    def publish(cls, topic, key):
+        """Tell the other workers to drop key from their topic cache"""
+        if cls._client is None:
+            return
+        
+        cls._ensure_listening()
+        
+        try:
+            cls._client.publish(cls.CHANNEL, json.dumps({
+                'topic': topic,
+                'key': key,
+                'origin': cls._origin()
+            }))
+            cls._stats['published'] += 1
+        except Exception as e:
+            cls._stats['errors'] += 1
+            logger.error(f"Could not publish {topic} invalidation for {key}: {e}")
+    
+    @classmethod
+    def _ensure_listening(cls):
+        """Start the subscriber thread for this PID (threads do not survive a fork)"""
+        if cls._client is None or not cls._handlers:
+            return
+        if cls._pid == os.getpid() and cls._thread is not None and cls._thread.is_alive():
+            return
+        
+        with cls._lock:
+            if cls._pid == os.getpid() and cls._thread is not None and cls._thread.is_alive():
+                return
+            
+            cls._pid = os.getpid()
+            cls._thread = threading.Thread(target=cls._listen, name='cache-invalidation', daemon=True)
+            cls._thread.start()
+    
+    @classmethod
+    def _listen(cls):
+        origin = cls._origin()
+        
+        while True:
+            pubsub = None
+            try:
+                pubsub = cls._subscriber.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(cls.CHANNEL)
+                
+                while True:
+                    # None after an idle second; only real errors reconnect
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is None:
+                        continue
+                    
+                    payload = json.loads(message['data'])
+                    if payload.get('origin') == origin:
+                        continue
+                    
+                    handler = cls._handlers.get(payload.get('topic'))
+                    if handler is not None:
+                        cls._stats['received'] += 1
+                        handler(payload.get('key'))
+            except Exception as e:
+                cls._stats['errors'] += 1
+                logger.error(f"Cache invalidation listener error, reconnecting: {e}")
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+                time.sleep(5)
+    
+    @classmethod
+    def get_stats(cls):
+        return {
+            'shared': cls._client is not None,
+            **cls._stats
+        }
\ No newline at end of file
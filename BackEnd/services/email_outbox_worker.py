@@ -0,0 +1,197 @@
+# ============================================
+# EMAIL OUTBOX WORKER
+# Background threads that drain email_outbox over
+# a reused SMTP connection
+# ============================================
+
+from BackEnd.models.email_outbox import EmailOutbox
+import threading
+import smtplib
+import socket
+import atexit
+import logging
+import time
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPSession:
+    """One authenticated SMTP connection, reopened when dropped or idle"""
+    
+    def __init__(self, email_service, idle_timeout):
+        self._email_service = email_service
+        self._idle_timeout = idle_timeout
+        self._server = None
+        self._last_used = 0
+    
+    def send(self, message):
+        """Send over the open connection, reconnecting once if it was dropped"""
+        for attempt in (1, 2):
+            if self._server is None:
+                self._server = self._email_service._create_smtp_connection()
+            
+            try:
+                self._server.send_message(message)
+                self._last_used = time.monotonic()
+                return
+            except (smtplib.SMTPServerDisconnected, ConnectionError) as e:
+                self.close()
+                if attempt == 2:
+                    raise
+                logger.info(f"SMTP connection dropped ({e}), reconnecting")
+    
+    def close_if_idle(self):
+        if self._server is not None and time.monotonic() - self._last_used > self._idle_timeout:
+            self.close()
+    
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                pass
+            self._server = None
+
+
+class EmailOutboxWorker:
+    """Drains email_outbox in background threads (one set per process)"""
+    
+    _email_service = None
+    _settings = {
+        'workers': 1,
+        'batch_size': 20,
+        'poll_seconds': 5,
+        'max_attempts': 6,
+        'retry_seconds': 30,
+        'idle_timeout': 60,
+        'stale_seconds': 300
+    }
+    
+    _threads = []
+    _pid = None
+    _lock = threading.Lock()
+    _wake = threading.Event()
+    _stop = threading.Event()
+    
+    @classmethod
+    def configure(cls, email_service, config):
+        """Apply outbox settings (call once at startup)"""
+        cls._email_service = email_service
+        cls._settings = {
+            'workers': max(1, config.EMAIL_OUTBOX_WORKERS),
+            'batch_size': config.EMAIL_OUTBOX_BATCH_SIZE,
+            'poll_seconds': config.EMAIL_OUTBOX_POLL_SECONDS,
+            'max_attempts': config.EMAIL_OUTBOX_MAX_ATTEMPTS,
+            'retry_seconds': config.EMAIL_OUTBOX_RETRY_SECONDS,
+            'idle_timeout': config.MAIL_IDLE_TIMEOUT_SECONDS,
+            'stale_seconds': config.EMAIL_OUTBOX_STALE_SECONDS
+        }
+    
+    @classmethod
+    def start(cls):
+        """Start the worker threads for this process (no-op if already running)"""
+        with cls._lock:
+            if cls._email_service is None:
+                return
+            if cls._pid == os.getpid() and any(thread.is_alive() for thread in cls._threads):
+                return
+            
+            cls._stop.clear()
+            cls._pid = os.getpid()
+            cls._threads = []
+            
+            for index in range(cls._settings['workers']):
+                thread = threading.Thread(
+                    target=cls._run,
+                    args=(index,),
+                    name=f"email-outbox-{index}",
+                    daemon=True
+                )
+                thread.start()
+                cls._threads.append(thread)
+        
+        logger.info(f"📬 Email outbox started with {cls._settings['workers']} worker(s)")
+    
+    @classmethod
+    def wake(cls):
+        """Nudge the workers after an email was queued"""
+        # Worker threads do not survive a fork (e.g. gunicorn preload)
+        if cls._pid != os.getpid():
+            cls.start()
+        cls._wake.set()
+    
+    @classmethod
+    def stop(cls, timeout=5):
+        """Stop the workers, letting an in-flight batch finish"""
+        cls._stop.set()
+        cls._wake.set()
+        for thread in cls._threads:
+            thread.join(timeout)
+    
+    @classmethod
+    def _run(cls, index):
+        settings = cls._settings
+        worker_id = f"{socket.gethostname()}:{os.getpid()}:{index}"
+        session = SMTPSession(cls._email_service, settings['idle_timeout'])
+        next_stale_check = 0
+        
+        try:
+            while not cls._stop.is_set():
+                try:
+                    if index == 0 and time.monotonic() >= next_stale_check:
+                        EmailOutbox.release_stale(settings['stale_seconds'])
+                        next_stale_check = time.monotonic() + settings['stale_seconds']
+                    
+                    batch = EmailOutbox.claim_batch(worker_id, settings['batch_size'])
+                except Exception as e:
+                    logger.error(f"Outbox worker {worker_id} error: {e}")
+                    batch = []
+                
+                if not batch:
+                    session.close_if_idle()
+                    cls._wake.wait(settings['poll_seconds'])
+                    cls._wake.clear()
+                    continue
+                
+                cls._deliver(batch, session)
+        finally:
+            session.close()
+    
+    @classmethod
+    def _deliver(cls, batch, session):
+        """Send one claimed batch over the shared SMTP session"""
+        settings = cls._settings
+        sent_ids = []
+        
+        for row in batch:
+            try:
+                message = cls._email_service._build_message(
+                    row['to_email'], row['subject'], row['html_body'], row['text_body']
+                )
+                session.send(message)
+                sent_ids.append(row['id'])
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                
+                try:
+                    if row['attempts'] >= settings['max_attempts']:
+                        logger.error(f"❌ Giving up on email {row['id']} to {row['to_email']}: {error}")
+                        EmailOutbox.mark_failed(row['id'], error)
+                    else:
+                        delay = min(settings['retry_seconds'] * 2 ** (row['attempts'] - 1), 3600)
+                        logger.warning(f"Email {row['id']} failed (attempt {row['attempts']}), retrying in {delay}s: {error}")
+                        EmailOutbox.mark_retry(row['id'], error, delay)
+                except Exception as mark_error:
+                    logger.error(f"Could not record failure for email {row['id']}: {mark_error}")
+        
+        if sent_ids:
+            try:
+                EmailOutbox.mark_sent(sent_ids)
+                logger.info(f"✅ Sent {len(sent_ids)} queued email(s)")
+            except Exception as e:
+                # Rows stay 'sending' and are requeued by release_stale
+                logger.error(f"Could not mark emails {sent_ids} as sent: {e}")
+
+
+atexit.register(EmailOutboxWorker.stop)
\ No newline at end of file
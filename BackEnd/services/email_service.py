@@ -2,6 +2,9 @@ import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
+from BackEnd.models.email_outbox import EmailOutbox
+from BackEnd.services.email_outbox_worker import EmailOutboxWorker
+from BackEnd.utils.database import Database
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,6 +20,9 @@ class EmailService:
         self.username = config.MAIL_USERNAME
         self.password = config.MAIL_PASSWORD
         self.sender = config.MAIL_DEFAULT_SENDER
+        self.use_tls = config.MAIL_USE_TLS
+        self.use_ssl = config.MAIL_USE_SSL
+        self.use_outbox = config.EMAIL_OUTBOX_ENABLED
         self.app_name = config.APP_NAME
         self.app_url = config.APP_URL
         
@@ -31,10 +37,10 @@ class EmailService:
         logger.info(f"App Name: {self.app_name}")
         logger.info("="*50)
         
-        # ⚠️ CRITICAL: Check if email credentials are missing
+        # ⚠️ Without credentials SMTP login is skipped (fine for a local relay only)
         if not self.username or not self.password:
-            logger.error("❌ CRITICAL: Email credentials are MISSING!")
-            logger.error("Please set MAIL_USERNAME and MAIL_PASSWORD in Render Environment Variables")
+            logger.warning("⚠️ Email credentials are not set - SMTP login will be skipped")
+            logger.warning("Set MAIL_USERNAME and MAIL_PASSWORD in Render Environment Variables for Gmail")
     
     def _create_smtp_connection(self):
         """Create and return SMTP connection"""
@@ -43,18 +49,20 @@ class EmailService:
             logger.info(f"📧 Using username: {self.username}")
             logger.info(f"🔑 Password configured: {bool(self.password)}")
             
-            # Check credentials before attempting connection
-            if not self.username or not self.password:
-                raise ValueError("Email credentials not configured. Please set MAIL_USERNAME and MAIL_PASSWORD in environment variables.")
-            
-            server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=10)
+            if self.use_ssl:
+                server = smtplib.SMTP_SSL(self.smtp_server, self.smtp_port, timeout=10)
+            else:
+                server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=10)
             logger.info("✅ SMTP connection established")
             
-            server.starttls()
-            logger.info("✅ TLS started")
+            if self.use_tls and not self.use_ssl:
+                server.starttls()
+                logger.info("✅ TLS started")
             
-            server.login(self.username, self.password)
-            logger.info("✅ SMTP authentication successful")
+            # Unauthenticated relays (e.g. a local test SMTP server) need no login
+            if self.username and self.password:
+                server.login(self.username, self.password)
+                logger.info("✅ SMTP authentication successful")
             
             return server
             
@@ -70,9 +78,46 @@ class EmailService:
             logger.error(f"Error type: {type(e).__name__}")
             raise
     
+    def _build_message(self, to_email, subject, html_content, text_content=None):
+        """Build the MIME message for an email"""
+        message = MIMEMultipart('alternative')
+        message['Subject'] = subject
+        message['From'] = self.sender
+        message['To'] = to_email
+        
+        # Add text version (fallback)
+        if text_content:
+            text_part = MIMEText(text_content, 'plain')
+            message.attach(text_part)
+        
+        # Add HTML version
+        html_part = MIMEText(html_content, 'html')
+        message.attach(html_part)
+        
+        return message
+    
     def send_email(self, to_email, subject, html_content, text_content=None):
         """
-        Send email with HTML content
+        Queue email for background delivery (falls back to sending inline
+        when the outbox is disabled or unavailable)
+        Returns: (success, message)
+        """
+        if self.use_outbox:
+            success, result = EmailOutbox.enqueue(to_email, subject, html_content, text_content)
+            
+            if success:
+                # Wake the workers once the queued row is committed
+                Database.on_commit(EmailOutboxWorker.wake)
+                logger.info(f"📬 Email to {to_email} queued ({subject})")
+                return True, "Email queued for delivery"
+            
+            logger.warning(f"⚠️ Outbox unavailable, sending inline: {result}")
+        
+        return self.deliver(to_email, subject, html_content, text_content)
+    
+    def deliver(self, to_email, subject, html_content, text_content=None):
+        """
+        Send email with HTML content over a new SMTP connection
         Returns: (success, message)
         """
         try:
@@ -80,19 +125,7 @@ class EmailService:
             logger.info(f"📋 Subject: {subject}")
             
             # Create message
-            message = MIMEMultipart('alternative')
-            message['Subject'] = subject
-            message['From'] = self.sender
-            message['To'] = to_email
-            
-            # Add text version (fallback)
-            if text_content:
-                text_part = MIMEText(text_content, 'plain')
-                message.attach(text_part)
-            
-            # Add HTML version
-            html_part = MIMEText(html_content, 'html')
-            message.attach(html_part)
+            message = self._build_message(to_email, subject, html_content, text_content)
             
             logger.info("📧 Email message created, attempting to send...")
             
@@ -0,0 +1,211 @@
+# ============================================
+# GOOGLE CERTIFICATE CACHE
+# Google's token signing certificates, cached per
+# worker and refreshed ahead of expiry
+# ============================================
+
+from google.auth import transport
+from google.auth.transport.requests import Request as GoogleRequest
+from requests.adapters import HTTPAdapter
+import requests
+import threading
+import logging
+import time
+import re
+import os
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_CERTS_URL = 'https://www.googleapis.com/oauth2/v1/certs'
+
+_MAX_AGE_RE = re.compile(r'max-age=(\d+)')
+
+
+class CachedResponse(transport.Response):
+    """Stored certificate response, replayed to google.auth"""
+    
+    def __init__(self, status, headers, data):
+        self._status = status
+        self._headers = headers
+        self._data = data
+    
+    @property
+    def status(self):
+        return self._status
+    
+    @property
+    def headers(self):
+        return self._headers
+    
+    @property
+    def data(self):
+        return self._data
+
+
+class GoogleCertCache(transport.Request):
+    """
+    google.auth transport that serves the certificate URL from memory
+    
+    The response is kept for its Cache-Control max-age (minus Age) and
+    refreshed by a background thread at REFRESH_AHEAD of that lifetime, so
+    sign-ins only fetch inline on a cold start or after a failed refresh.
+    Every other URL goes through one pooled requests.Session.
+    """
+    
+    DEFAULT_MAX_AGE = 3600
+    MIN_MAX_AGE = 60
+    REFRESH_AHEAD = 0.8
+    RETRY_SECONDS = 60
+    MIN_FORCED_REFRESH_AGE = 60  # unknown key ids refetch at most this often
+    TIMEOUT = 5
+    
+    _shared = None
+    _shared_lock = threading.Lock()
+    
+    def __init__(self, certs_url=GOOGLE_CERTS_URL):
+        self.certs_url = certs_url
+        
+        session = requests.Session()
+        session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        self._http = GoogleRequest(session=session)
+        
+        self._response = None
+        self._fetched_at = 0.0
+        self._expires_at = 0.0
+        self._refresh_at = 0.0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stats = {'hits': 0, 'fetches': 0, 'fetch_errors': 0, 'background_refreshes': 0, 'forced_refreshes_skipped': 0}
+    
+    @classmethod
+    def shared(cls, certs_url=GOOGLE_CERTS_URL):
+        """Process-wide cache for certs_url"""
+        with cls._shared_lock:
+            if cls._shared is None or cls._shared.certs_url != certs_url:
+                cls._shared = cls(certs_url)
+            return cls._shared
+    
+    def __call__(self, url, method='GET', body=None, headers=None, timeout=None, **kwargs):
+        if url == self.certs_url and method == 'GET':
+            return self.get()
+        return self._http(url, method=method, body=body, headers=headers, timeout=timeout or self.TIMEOUT, **kwargs)
+    
+    def get(self):
+        """Certificate response, fetched inline only when missing or expired"""
+        response = self._response
+        if response is not None and time.monotonic() < self._expires_at:
+            self._stats['hits'] += 1
+            self._ensure_refresher()
+            return response
+        
+        with self._lock:
+            # Another thread may have fetched while we waited
+            if self._response is not None and time.monotonic() < self._expires_at:
+                self._stats['hits'] += 1
+                return self._response
+            
+            response = self._fetch()
+        
+        self._ensure_refresher()
+        return response
+    
+    def invalidate(self):
+        """Drop the cached certificates"""
+        with self._lock:
+            self._response = None
+            self._expires_at = 0.0
+    
+    def invalidate_if_stale(self):
+        """
+        Drop the cached certificates after an unknown key id, unless they were
+        fetched less than MIN_FORCED_REFRESH_AGE ago
+        
+        Tokens with made-up key ids cost nothing to send, so they may force
+        at most one refetch per interval; Google publishes new keys well
+        before signing with them, so a fresh cache already holds any real one.
+        Returns: True if the certificates were dropped (retry worth it)
+        """
+        with self._lock:
+            if self._response is not None and time.monotonic() - self._fetched_at < self.MIN_FORCED_REFRESH_AGE:
+                self._stats['forced_refreshes_skipped'] += 1
+                return False
+            
+            self._response = None
+            self._expires_at = 0.0
+            return True
+    
+    def _fetch(self):
+        """Fetch and store the certificates (caller holds the lock)"""
+        try:
+            response = self._http(self.certs_url, method='GET', timeout=self.TIMEOUT)
+        except Exception:
+            self._stats['fetch_errors'] += 1
+            raise
+        
+        self._stats['fetches'] += 1
+        
+        if response.status != 200:
+            # Hand the failure to google.auth without caching it
+            self._stats['fetch_errors'] += 1
+            logger.warning(f"Google certificate fetch returned HTTP {response.status}")
+            return response
+        
+        max_age = self._max_age(response.headers)
+        now = time.monotonic()
+        
+        self._response = CachedResponse(response.status, dict(response.headers), response.data)
+        self._fetched_at = now
+        self._expires_at = now + max_age
+        self._refresh_at = now + max_age * self.REFRESH_AHEAD
+        
+        logger.info(f"Google certificates cached for {max_age}s")
+        return self._response
+    
+    def _max_age(self, headers):
+        """Cache-Control max-age minus Age, within sane bounds"""
+        headers = {key.lower(): value for key, value in (headers or {}).items()}
+        match = _MAX_AGE_RE.search(headers.get('cache-control', ''))
+        max_age = int(match.group(1)) if match else self.DEFAULT_MAX_AGE
+        
+        try:
+            max_age -= int(headers.get('age', 0))
+        except ValueError:
+            pass
+        
+        return max(self.MIN_MAX_AGE, max_age)
+    
+    def _ensure_refresher(self):
+        """Start the refresh thread for this PID (threads do not survive a fork)"""
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._refresh_loop, name='google-certs', daemon=True)
+            self._thread.start()
+    
+    def _refresh_loop(self):
+        while True:
+            time.sleep(max(1.0, self._refresh_at - time.monotonic()))
+            
+            try:
+                with self._lock:
+                    self._fetch()
+                self._stats['background_refreshes'] += 1
+            except Exception as e:
+                logger.warning(f"Background Google certificate refresh failed: {e}")
+            
+            if time.monotonic() >= self._refresh_at:
+                self._refresh_at = time.monotonic() + self.RETRY_SECONDS
+    
+    def get_stats(self):
+        return {
+            'cached': self._response is not None,
+            'expires_in_seconds': round(max(0.0, self._expires_at - time.monotonic()), 1),
+            **self._stats
+        }
\ No newline at end of file
@@ -1,6 +1,6 @@
 from google.oauth2 import id_token
-from google.auth.transport import requests
 from BackEnd.models.user import User
+from BackEnd.services.google_cert_cache import GoogleCertCache, GOOGLE_CERTS_URL
 import logging
 
 logger = logging.getLogger(__name__)
@@ -9,8 +9,31 @@ logger = logging.getLogger(__name__)
 class GoogleOAuthService:
     """Google OAuth authentication service"""
     
-    def __init__(self, client_id):
+    def __init__(self, client_id, certs_url=GOOGLE_CERTS_URL):
         self.client_id = client_id
+        self.cert_cache = GoogleCertCache.shared(certs_url)
+    
+    def _verify(self, token):
+        """Verify signature and audience against the cached certificates"""
+        try:
+            return id_token.verify_token(
+                token,
+                self.cert_cache,
+                audience=self.client_id,
+                certs_url=self.cert_cache.certs_url
+            )
+        except ValueError as e:
+            # Google rotated its keys since the certificates were cached;
+            # recently fetched certificates are not refetched (forged key ids)
+            if 'key id' not in str(e) or not self.cert_cache.invalidate_if_stale():
+                raise
+            logger.info("Unknown Google key id, refreshing certificates")
+            return id_token.verify_token(
+                token,
+                self.cert_cache,
+                audience=self.client_id,
+                certs_url=self.cert_cache.certs_url
+            )
     
     def verify_google_token(self, token):
         """
@@ -18,12 +41,8 @@ class GoogleOAuthService:
         Returns: (success, user_info/error_message)
         """
         try:
-            # Verify the token
-            idinfo = id_token.verify_oauth2_token(
-                token, 
-                requests.Request(), 
-                self.client_id
-            )
+            # Verify the token (certificates come from the shared cache)
+            idinfo = self._verify(token)
             
             # Verify the issuer
             if idinfo['iss'] not in ['accounts.google.com', 'https://accounts.google.com']:
@@ -158,6 +177,7 @@ class GoogleOAuthService:
             """
             
             Database.execute_query(query, tuple(values))
+            User.invalidate_user(user_id)
             logger.info(f"Google account linked for user {user_id}")
             
             return True
@@ -183,15 +203,8 @@ class GoogleOAuthService:
         if len(base_username) < 3:
             base_username = 'user' + base_username
         
-        # Check if username exists
-        username = base_username
-        counter = 1
-        
-        while User.username_exists(username):
-            username = f"{base_username}{counter}"
-            counter += 1
-        
-        return username
+        # First free candidate (base, base1, base2, ...), checked in batches
+        return User.pick_available_username(base_username)
     
     def unlink_google_account(self, user_id):
         """
@@ -0,0 +1,314 @@
+# ============================================
+# IDEMPOTENCY KEYS
+# Replays the stored response of a retried POST
+# instead of running it again
+# ============================================
+
+from flask import request, jsonify, current_app, make_response
+from BackEnd.utils.database import Database
+from collections import OrderedDict
+from functools import wraps
+import threading
+import hashlib
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyStore:
+    """
+    Stored responses for Idempotency-Key requests
+    
+    The first request with a key claims it with INSERT IGNORE on the unique
+    key_hash column (no locks held while the handler runs); a concurrent
+    duplicate loses the claim and gets 409 until the response is stored.
+    Finished responses are kept in the table for KEY_TTL and in a small
+    per-worker LRU for CACHE_TTL, so a retry is replayed without touching
+    the order tables.
+    """
+    
+    _key_ttl = 24 * 3600
+    _cache_ttl = 300
+    _cache_size = 1000
+    _claim_timeout = 60
+    
+    _cache = OrderedDict()  # key_hash -> (request_hash, status_code, body, expires_at)
+    _lock = threading.Lock()
+    _stats = {'claims': 0, 'cache_hits': 0, 'replays': 0, 'conflicts': 0, 'mismatches': 0, 'errors': 0}
+    
+    @classmethod
+    def configure(cls, config):
+        """Apply TTLs and cache size from config (call once at startup)"""
+        cls._key_ttl = config.IDEMPOTENCY_KEY_TTL_SECONDS
+        cls._cache_ttl = min(config.IDEMPOTENCY_CACHE_TTL_SECONDS, cls._key_ttl)
+        cls._cache_size = config.IDEMPOTENCY_CACHE_SIZE
+        cls._claim_timeout = config.IDEMPOTENCY_CLAIM_TIMEOUT_SECONDS
+        
+        with cls._lock:
+            cls._cache.clear()
+    
+    @staticmethod
+    def key_hash(scope, identity, key):
+        return hashlib.sha256(f"{scope}:{identity}:{key}".encode('utf-8')).hexdigest()
+    
+    @classmethod
+    def _cached(cls, key_hash):
+        with cls._lock:
+            entry = cls._cache.get(key_hash)
+            if entry is None:
+                return None
+            if entry[3] <= time.monotonic():
+                del cls._cache[key_hash]
+                return None
+            cls._cache.move_to_end(key_hash)
+            return entry
+    
+    @classmethod
+    def _remember(cls, key_hash, request_hash, status_code, body):
+        if cls._cache_ttl <= 0 or cls._cache_size <= 0:
+            return
+        
+        with cls._lock:
+            cls._cache[key_hash] = (request_hash, status_code, body, time.monotonic() + cls._cache_ttl)
+            cls._cache.move_to_end(key_hash)
+            while len(cls._cache) > cls._cache_size:
+                cls._cache.popitem(last=False)
+    
+    @classmethod
+    def _execute(cls, query, params):
+        """Run one statement on its own connection; returns (rowcount, first row)"""
+        connection = Database.get_connection(scoped=False)
+        cursor = None
+        
+        try:
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute(query, params)
+            row = cursor.fetchone() if cursor.with_rows else None
+            rowcount = cursor.rowcount
+            connection.commit()
+            return rowcount, row
+        finally:
+            if cursor:
+                cursor.close()
+            connection.close()
+    
+    @classmethod
+    def claim(cls, key_hash, request_hash):
+        """
+        Claim a key for this request
+        Returns: ('claimed', None) or ('stored', (request_hash, status_code, body))
+                 or ('in_progress', request_hash)
+        """
+        entry = cls._cached(key_hash)
+        if entry is not None:
+            cls._stats['cache_hits'] += 1
+            return 'stored', entry[:3]
+        
+        for _ in range(2):
+            rowcount, _ = cls._execute("""
+                INSERT IGNORE INTO idempotency_keys (key_hash, request_hash, expires_at)
+                VALUES (%s, %s, UTC_TIMESTAMP() + INTERVAL %s SECOND)
+            """, (key_hash, request_hash, cls._key_ttl))
+            
+            if rowcount == 1:
+                cls._stats['claims'] += 1
+                return 'claimed', None
+            
+            _, row = cls._execute("""
+                SELECT request_hash, status_code, response_body,
+                       expires_at < UTC_TIMESTAMP() AS expired,
+                       claimed_at < NOW() - INTERVAL %s SECOND AS abandoned
+                FROM idempotency_keys
+                WHERE key_hash = %s
+            """, (cls._claim_timeout, key_hash))
+            
+            if row is None:
+                continue  # Purged between the two statements
+            
+            if row['expired']:
+                cls._execute(
+                    "DELETE FROM idempotency_keys WHERE key_hash = %s AND expires_at < UTC_TIMESTAMP()",
+                    (key_hash,)
+                )
+                continue
+            
+            if row['status_code'] is not None:
+                stored = (row['request_hash'], row['status_code'], row['response_body'])
+                cls._remember(key_hash, *stored)
+                return 'stored', stored
+            
+            if row['abandoned'] and row['request_hash'] == request_hash:
+                # The first attempt died without storing a response: take it over
+                rowcount, _ = cls._execute("""
+                    UPDATE idempotency_keys SET claimed_at = NOW()
+                    WHERE key_hash = %s AND status_code IS NULL
+                    AND claimed_at < NOW() - INTERVAL %s SECOND
+                """, (key_hash, cls._claim_timeout))
+                if rowcount == 1:
+                    cls._stats['claims'] += 1
+                    return 'claimed', None
+            
+            return 'in_progress', row['request_hash']
+        
+        return 'in_progress', request_hash
+    
+    @classmethod
+    def complete(cls, key_hash, request_hash, status_code, body):
+        """Store the response of a claimed key (5xx releases the key for a retry)"""
+        if status_code >= 500:
+            cls.release(key_hash)
+            return
+        
+        cls._execute("""
+            UPDATE idempotency_keys SET status_code = %s, response_body = %s
+            WHERE key_hash = %s
+        """, (status_code, body, key_hash))
+        cls._remember(key_hash, request_hash, status_code, body)
+    
+    @classmethod
+    def release(cls, key_hash):
+        """Drop an unfinished claim so the client can retry"""
+        cls._execute(
+            "DELETE FROM idempotency_keys WHERE key_hash = %s AND status_code IS NULL",
+            (key_hash,)
+        )
+    
+    @classmethod
+    def cleanup_expired_keys(cls, chunk_size=1000, pause_seconds=0.05):
+        """
+        Delete expired idempotency keys in chunks
+        Run by the maintenance scheduler
+        Returns: number of deleted keys
+        """
+        try:
+            deleted = Database.delete_in_chunks(
+                'idempotency_keys',
+                'expires_at < UTC_TIMESTAMP()',
+                chunk_size=chunk_size,
+                pause_seconds=pause_seconds
+            )
+            logger.info(f"Expired idempotency keys cleaned up ({deleted} deleted)")
+            
+            return deleted
+        
+        except Exception as e:
+            logger.error(f"Error cleaning up idempotency keys: {e}")
+            return 0
+    
+    @classmethod
+    def get_stats(cls):
+        return {
+            'cached': len(cls._cache),
+            'cache_ttl_seconds': cls._cache_ttl,
+            'key_ttl_seconds': cls._key_ttl,
+            **cls._stats
+        }
+
+
+def _key_reused():
+    IdempotencyStore._stats['mismatches'] += 1
+    return jsonify({
+        'success': False,
+        'message': f'{IDEMPOTENCY_HEADER} was already used for a different request'
+    }), 422
+
+
+def _replay(status_code, body):
+    response = current_app.response_class(body, status=status_code, mimetype='application/json')
+    response.headers[REPLAYED_HEADER] = 'true'
+    return response
+
+
+def idempotent(scope):
+    """
+    Decorator for POST routes that create records
+    Usage: @idempotent('orders') below the auth decorator
+    
+    Requests without an Idempotency-Key header run as before. With one, the
+    first response for (scope, user, key) is stored and replayed to every
+    retry; reusing a key with a different body is rejected.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            
+            if request.method == 'OPTIONS' or not key:
+                return f(*args, **kwargs)
+            
+            if len(key) > MAX_KEY_LENGTH:
+                return jsonify({
+                    'success': False,
+                    'message': f'{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters'
+                }), 400
+            
+            current_user = getattr(request, 'current_user', None) or {}
+            identity = current_user.get('user_id') or 'anonymous'
+            key_hash = IdempotencyStore.key_hash(scope, identity, key)
+            request_hash = hashlib.sha256(request.get_data()).hexdigest()
+            
+            try:
+                state, stored = IdempotencyStore.claim(key_hash, request_hash)
+            except Exception as e:
+                # Without the table the request still goes through, just unprotected
+                IdempotencyStore._stats['errors'] += 1
+                logger.error(f"Idempotency claim failed for {scope}, running request unprotected: {e}")
+                return f(*args, **kwargs)
+            
+            if state == 'stored':
+                stored_request_hash, status_code, body = stored
+                if stored_request_hash != request_hash:
+                    return _key_reused()
+                
+                IdempotencyStore._stats['replays'] += 1
+                logger.info(f"Replaying stored {scope} response for {IDEMPOTENCY_HEADER}")
+                return _replay(status_code, body)
+            
+            if state == 'in_progress':
+                if stored != request_hash:
+                    return _key_reused()
+                
+                IdempotencyStore._stats['conflicts'] += 1
+                return jsonify({
+                    'success': False,
+                    'message': 'A request with this Idempotency-Key is still being processed'
+                }), 409, {'Retry-After': '1'}
+            
+            try:
+                response = make_response(f(*args, **kwargs))
+            except Exception:
+                IdempotencyStore.release(key_hash)
+                raise
+            
+            status_code, body = response.status_code, response.get_data(as_text=True)
+            
+            def store():
+                try:
+                    IdempotencyStore.complete(key_hash, request_hash, status_code, body)
+                except Exception as e:
+                    IdempotencyStore._stats['errors'] += 1
+                    logger.error(f"Could not store {scope} response for {IDEMPOTENCY_HEADER}: {e}")
+            
+            def release():
+                try:
+                    IdempotencyStore.release(key_hash)
+                except Exception as e:
+                    IdempotencyStore._stats['errors'] += 1
+                    logger.error(f"Could not release {scope} {IDEMPOTENCY_HEADER}: {e}")
+            
+            # The response is only stored once the order it describes has
+            # committed; if the request transaction rolls back (or fails to
+            # commit and the client gets 500), the key is released instead
+            Database.on_rollback(release)
+            Database.on_commit(store)
+            
+            return response
+        
+        return decorated
+    
+    return decorator
\ No newline at end of file
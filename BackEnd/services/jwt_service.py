@@ -1,12 +1,170 @@
 import jwt
 from datetime import datetime, timedelta
 from functools import wraps
-from flask import request, jsonify
+from collections import OrderedDict
+from flask import request, jsonify, current_app
+from BackEnd.services.cache_invalidation import InvalidationChannel
+import threading
+import hashlib
+import uuid
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
 
+class TokenCache:
+    """
+    Process-wide LRU of verified token payloads keyed by SHA-256 of the token
+    
+    Entries live until the token's exp, so a client polling with the same
+    token skips signature verification. Revoked tokens (and tokens issued to
+    a user before a revoke_user call) are rejected even when cached.
+    Revocations are published to the other workers through InvalidationChannel.
+    """
+    
+    _max_size = 10000
+    _entries = OrderedDict()  # digest -> payload
+    _revoked_tokens = {}      # digest -> exp (kept until the token would expire anyway)
+    _revoked_users = {}       # user_id -> (cutoff time, expires)
+    _lock = threading.Lock()
+    _stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'revoked_rejections': 0}
+    
+    # How long a revoke_user cutoff is kept (longest token lifetime)
+    _revocation_ttl = 30 * 24 * 3600
+    
+    @classmethod
+    def configure(cls, max_size=10000, revocation_ttl_seconds=None):
+        with cls._lock:
+            cls._max_size = max_size
+            if revocation_ttl_seconds:
+                cls._revocation_ttl = revocation_ttl_seconds
+            while len(cls._entries) > cls._max_size:
+                cls._entries.popitem(last=False)
+        
+        InvalidationChannel.subscribe('revoked_token', lambda key: cls._revoke_digest(*key))
+        InvalidationChannel.subscribe('revoked_user', lambda key: cls._revoke_user_until(*key))
+    
+    @staticmethod
+    def digest(token):
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+    
+    @classmethod
+    def get(cls, digest):
+        """Cached payload for a token digest, or None"""
+        now = time.time()
+        with cls._lock:
+            payload = cls._entries.get(digest)
+            
+            if payload is None:
+                cls._stats['misses'] += 1
+                return None
+            
+            if payload['exp'] <= now:
+                del cls._entries[digest]
+                cls._stats['misses'] += 1
+                return None
+            
+            cls._entries.move_to_end(digest)
+            cls._stats['hits'] += 1
+            return payload
+    
+    @classmethod
+    def put(cls, digest, payload):
+        """Cache a verified payload (tokens without a numeric exp are not cached)"""
+        if not isinstance(payload.get('exp'), (int, float)):
+            return
+        
+        with cls._lock:
+            cls._entries[digest] = payload
+            cls._entries.move_to_end(digest)
+            
+            if len(cls._entries) > cls._max_size:
+                cls._entries.popitem(last=False)
+                cls._stats['evictions'] += 1
+    
+    @classmethod
+    def is_revoked(cls, digest, payload=None):
+        """Whether a token was revoked, by digest or by its user's cutoff"""
+        now = time.time()
+        with cls._lock:
+            exp = cls._revoked_tokens.get(digest)
+            if exp is not None:
+                if exp > now:
+                    cls._stats['revoked_rejections'] += 1
+                    return True
+                del cls._revoked_tokens[digest]
+            
+            if payload and cls._revoked_users:
+                entry = cls._revoked_users.get(payload.get('user_id'))
+                if entry is not None:
+                    cutoff, expires = entry
+                    if expires <= now:
+                        del cls._revoked_users[payload.get('user_id')]
+                    elif payload.get('iat', 0) <= cutoff:
+                        cls._stats['revoked_rejections'] += 1
+                        return True
+        
+        return False
+    
+    @classmethod
+    def revoke(cls, token):
+        """Reject this token from now on, here and on the other workers"""
+        digest = cls.digest(token)
+        
+        try:
+            exp = jwt.decode(token, options={'verify_signature': False}).get('exp')
+        except jwt.InvalidTokenError:
+            exp = None
+        
+        if not isinstance(exp, (int, float)):
+            exp = time.time() + cls._revocation_ttl
+        
+        cls._revoke_digest(digest, exp)
+        InvalidationChannel.publish('revoked_token', [digest, exp])
+    
+    @classmethod
+    def _revoke_digest(cls, digest, exp):
+        with cls._lock:
+            cls._entries.pop(digest, None)
+            cls._revoked_tokens[digest] = exp
+    
+    @classmethod
+    def revoke_user(cls, user_id):
+        """
+        Reject every token issued to user_id up to now, here and on the other workers
+        
+        The cutoff keeps its fraction of a second: access tokens carry a
+        fractional iat, so a login right after the revocation is accepted
+        even within the same second.
+        """
+        now = time.time()
+        cls._revoke_user_until(user_id, now, now + cls._revocation_ttl)
+        InvalidationChannel.publish('revoked_user', [user_id, now, now + cls._revocation_ttl])
+    
+    @classmethod
+    def _revoke_user_until(cls, user_id, cutoff, expires):
+        with cls._lock:
+            current = cls._revoked_users.get(user_id)
+            if current is None or current[0] < cutoff:
+                cls._revoked_users[user_id] = (cutoff, expires)
+            for digest in [d for d, payload in cls._entries.items() if payload.get('user_id') == user_id]:
+                del cls._entries[digest]
+    
+    @classmethod
+    def get_stats(cls):
+        with cls._lock:
+            stats = dict(cls._stats)
+            stats['size'] = len(cls._entries)
+            stats['max_size'] = cls._max_size
+            stats['revoked_tokens'] = len(cls._revoked_tokens)
+            stats['revoked_users'] = len(cls._revoked_users)
+        
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
+
+
 class JWTService:
     """JWT token management service"""
     
@@ -24,7 +182,8 @@ class JWTService:
                 'user_id': user_id,
                 'email': email,
                 'username': username,
-                'iat': datetime.utcnow(),
+                'iat': time.time(),  # fractional, compared with revoke_user cutoffs
+                'jti': uuid.uuid4().hex,
                 'exp': datetime.utcnow() + timedelta(hours=expires_in_hours)
             }
             
@@ -37,9 +196,10 @@ class JWTService:
             logger.error(f"Error generating token: {e}")
             return None
     
-    def generate_refresh_token(self, user_id, email, expires_in_days=30):
+    def generate_refresh_token(self, user_id, email, expires_in_days=30, jti=None, family_id=None):
         """
         Generate refresh token for extended sessions
+        jti/family_id tie the token to its refresh_tokens row for rotation
         Returns: refresh token string
         """
         try:
@@ -51,6 +211,10 @@ class JWTService:
                 'exp': datetime.utcnow() + timedelta(days=expires_in_days)
             }
             
+            if jti:
+                payload['jti'] = jti
+                payload['family'] = family_id
+            
             token = jwt.encode(payload, self.secret_key, algorithm=self.algorithm)
             logger.info(f"Refresh token generated for user: {email}")
             
@@ -62,12 +226,24 @@ class JWTService:
     
     def verify_token(self, token):
         """
-        Verify JWT token
+        Verify JWT token (verified payloads are cached until they expire)
         Returns: (is_valid, payload/error_message)
         """
         try:
-            payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
-            return True, payload
+            digest = TokenCache.digest(token)
+            payload = TokenCache.get(digest)
+            cached = payload is not None
+            
+            if not cached:
+                payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+            
+            if TokenCache.is_revoked(digest, payload):
+                return False, "Token has been revoked"
+            
+            if not cached:
+                TokenCache.put(digest, payload)
+            
+            return True, dict(payload)
             
         except jwt.ExpiredSignatureError:
             return False, "Token has expired"
@@ -87,6 +263,7 @@ class JWTService:
                 'email': email,
                 'type': 'password_reset',
                 'iat': datetime.utcnow(),
+                'jti': uuid.uuid4().hex,
                 'exp': datetime.utcnow() + timedelta(hours=expires_in_hours)
             }
             
@@ -121,6 +298,59 @@ class JWTService:
             return False, str(e)
 
 
+def _get_bearer_token():
+    """
+    Token from the Authorization header
+    Returns: (token or None, malformed: bool)
+    """
+    auth_header = request.headers.get('Authorization')
+    
+    if not auth_header:
+        return None, False
+    
+    parts = auth_header.split(" ")
+    if len(parts) < 2 or not parts[1]:
+        return None, True
+    
+    return parts[1], False  # Bearer <token>
+
+
+def _authenticate_request():
+    """
+    Shared auth layer for the decorators below
+    Returns: (payload or None, error message or None, status code)
+    """
+    token, malformed = _get_bearer_token()
+    
+    if malformed:
+        logger.warning("Invalid token format in Authorization header")
+        return None, 'Invalid token format', 401
+    
+    if not token:
+        return None, 'Authentication token is missing', 401
+    
+    jwt_service = current_app.config.get('JWT_SERVICE')
+    
+    if not jwt_service:
+        logger.error("JWT_SERVICE not configured in app config")
+        return None, 'JWT service not configured', 500
+    
+    try:
+        is_valid, payload = jwt_service.verify_token(token)
+    except Exception as e:
+        logger.exception(f"Token verification error: {e}")
+        return None, 'Invalid or expired token', 401
+    
+    if not is_valid:
+        return None, payload, 401  # payload is the error message
+    
+    # Refresh and reset tokens are signed with the same key but are not access tokens
+    if payload.get('type') in ('refresh', 'password_reset'):
+        return None, 'Invalid token type', 401
+    
+    return payload, None, 200
+
+
 def token_required(f):
     """
     Decorator to protect routes that require authentication
@@ -135,59 +365,18 @@ def token_required(f):
         if request.method == 'OPTIONS':
             return jsonify({'success': True}), 200
         
-        token = None
-        
-        # Get token from header
-        if 'Authorization' in request.headers:
-            auth_header = request.headers['Authorization']
-            try:
-                token = auth_header.split(" ")[1]  # Bearer <token>
-            except IndexError:
-                logger.warning("Invalid token format in Authorization header")
-                return jsonify({
-                    'success': False,
-                    'message': 'Invalid token format'
-                }), 401
-        
-        if not token:
-            logger.warning(f"Missing authentication token for {request.method} {request.path}")
-            return jsonify({
-                'success': False,
-                'message': 'Authentication token is missing'
-            }), 401
+        payload, error, status = _authenticate_request()
         
-        try:
-            # Get JWT service from app config
-            from flask import current_app
-            jwt_service = current_app.config.get('JWT_SERVICE')
-            
-            if not jwt_service:
-                logger.error("JWT_SERVICE not configured in app config")
-                return jsonify({
-                    'success': False,
-                    'message': 'JWT service not configured'
-                }), 500
-            
-            # Verify token
-            is_valid, payload = jwt_service.verify_token(token)
-            
-            if not is_valid:
-                logger.warning(f"Token verification failed: {payload}")
-                return jsonify({
-                    'success': False,
-                    'message': payload  # Error message
-                }), 401
-            
-            # Add user info to request
-            request.current_user = payload
-            logger.debug(f"Authenticated user {payload.get('user_id')} for {request.method} {request.path}")
-            
-        except Exception as e:
-            logger.exception(f"Token verification error: {e}")
+        if payload is None:
+            logger.warning(f"Authentication failed for {request.method} {request.path}: {error}")
             return jsonify({
                 'success': False,
-                'message': 'Invalid or expired token'
-            }), 401
+                'message': error
+            }), status
+        
+        # Add user info to request
+        request.current_user = payload
+        logger.debug(f"Authenticated user {payload.get('user_id')} for {request.method} {request.path}")
         
         return f(*args, **kwargs)
     
@@ -208,31 +397,38 @@ def optional_token(f):
         if request.method == 'OPTIONS':
             return jsonify({'success': True}), 200
         
-        token = None
-        
-        # Get token from header
-        if 'Authorization' in request.headers:
-            auth_header = request.headers['Authorization']
-            try:
-                token = auth_header.split(" ")[1]
-            except IndexError:
-                logger.debug("Invalid token format in optional_token")
-                pass
-        
-        if token:
-            try:
-                from flask import current_app
-                jwt_service = current_app.config.get('JWT_SERVICE')
-                
-                if jwt_service:
-                    is_valid, payload = jwt_service.verify_token(token)
-                    if is_valid:
-                        request.current_user = payload
-                        logger.debug(f"Optional token validated for user {payload.get('user_id')}")
-            except Exception as e:
-                logger.debug(f"Optional token verification error: {e}")
-                # Continue without authentication
-                pass
+        payload, error, status = _authenticate_request()
+        
+        if payload is not None:
+            request.current_user = payload
+            logger.debug(f"Optional token validated for user {payload.get('user_id')}")
+        
+        return f(*args, **kwargs)
+    
+    return decorated
+
+
+def admin_required(f):
+    """
+    Decorator for admin-only routes
+    Usage: @token_required followed by @admin_required
+    
+    The authenticated email must be listed in the ADMIN_EMAILS setting
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if request.method == 'OPTIONS':
+            return jsonify({'success': True}), 200
+        
+        current_user = getattr(request, 'current_user', None) or {}
+        email = (current_user.get('email') or '').lower()
+        
+        if not email or email not in current_app.config.get('ADMIN_EMAILS', []):
+            logger.warning(f"Non-admin user {current_user.get('user_id')} denied {request.method} {request.path}")
+            return jsonify({
+                'success': False,
+                'message': 'Admin access required'
+            }), 403
         
         return f(*args, **kwargs)
     
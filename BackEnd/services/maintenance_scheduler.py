@@ -0,0 +1,228 @@
+# ============================================
+# MAINTENANCE SCHEDULER
+# Periodic expiry/retention purges, run by one
+# elected worker across all processes
+# ============================================
+
+from BackEnd.utils.database import Database
+from BackEnd.models.user import User
+from BackEnd.models.order_stats import OrderStats
+from BackEnd.models.order_events import OrderEvents
+from BackEnd.services.otp_service import OTPService
+from BackEnd.services.session_service import SessionService
+from BackEnd.services.password_reset_service import PasswordResetService
+from BackEnd.services.refresh_token_service import RefreshTokenService
+from BackEnd.services.idempotency import IdempotencyStore
+from BackEnd.setup_orders_db import backfill_order_metadata
+from BackEnd.setup_auth_db import migrate_token_digests
+from datetime import datetime
+import threading
+import atexit
+import logging
+import time
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class MaintenanceScheduler:
+    """
+    Runs the cleanup jobs every `interval_seconds`
+    
+    Every process starts a scheduler thread, but only the one holding the
+    MySQL named lock (GET_LOCK) runs jobs. The lock lives on a dedicated
+    connection, so when the leader dies the server drops the lock and
+    another worker takes over on its next tick.
+    """
+    
+    LOCK_NAME = 'quick_laundry_maintenance'
+    
+    _settings = {
+        'interval_seconds': 3600,
+        'chunk_size': 1000,
+        'pause_seconds': 0.05,
+        'login_attempts_retention_days': 30,
+        'order_events_retention_days': 7
+    }
+    
+    _lock_connection = None
+    _thread = None
+    _pid = None
+    _lock = threading.Lock()
+    _stop = threading.Event()
+    _last_run = None
+    
+    @classmethod
+    def configure(cls, config):
+        """Apply maintenance settings (call once at startup)"""
+        cls._settings = {
+            'interval_seconds': max(60, config.MAINTENANCE_INTERVAL_SECONDS),
+            'chunk_size': max(1, config.MAINTENANCE_DELETE_CHUNK_SIZE),
+            'pause_seconds': config.MAINTENANCE_DELETE_PAUSE_SECONDS,
+            'login_attempts_retention_days': config.LOGIN_ATTEMPTS_RETENTION_DAYS,
+            'order_events_retention_days': config.ORDER_EVENTS_RETENTION_DAYS
+        }
+    
+    @classmethod
+    def _jobs(cls):
+        """(name, callable returning rows deleted or repaired) pairs, in run order"""
+        chunk = {
+            'chunk_size': cls._settings['chunk_size'],
+            'pause_seconds': cls._settings['pause_seconds']
+        }
+        return [
+            ('expired_otps', lambda: OTPService.cleanup_expired_otps(**chunk)),
+            ('expired_sessions', lambda: SessionService.cleanup_expired_sessions(**chunk)),
+            ('expired_password_resets', lambda: PasswordResetService.cleanup_expired_tokens(**chunk)),
+            ('expired_refresh_tokens', lambda: RefreshTokenService.cleanup_expired_tokens(**chunk)),
+            ('expired_idempotency_keys', lambda: IdempotencyStore.cleanup_expired_keys(**chunk)),
+            ('login_attempts_retention', lambda: User.cleanup_login_attempts(
+                cls._settings['login_attempts_retention_days'], **chunk
+            )),
+            ('order_events_retention', lambda: OrderEvents.cleanup_old_events(
+                cls._settings['order_events_retention_days'], **chunk
+            )),
+            ('order_metadata_backfill', lambda: backfill_order_metadata(
+                batch_size=chunk['chunk_size'], pause_seconds=chunk['pause_seconds']
+            )),
+            ('order_stats_reconcile', lambda: OrderStats.reconcile(**chunk)),
+            ('token_digest_migration', lambda: migrate_token_digests(**chunk))
+        ]
+    
+    @classmethod
+    def start(cls):
+        """Start the scheduler thread for this process (no-op if already running)"""
+        with cls._lock:
+            if cls._pid == os.getpid() and cls._thread is not None and cls._thread.is_alive():
+                return
+            
+            # A lock connection inherited over fork belongs to the parent
+            cls._lock_connection = None
+            cls._stop.clear()
+            cls._pid = os.getpid()
+            cls._thread = threading.Thread(target=cls._run, name='maintenance', daemon=True)
+            cls._thread.start()
+        
+        logger.info(f"🧹 Maintenance scheduler started (every {cls._settings['interval_seconds']}s)")
+    
+    @classmethod
+    def stop(cls, timeout=5):
+        """Stop the scheduler and give up leadership"""
+        if cls._pid != os.getpid():
+            return
+        
+        cls._stop.set()
+        if cls._thread is not None:
+            cls._thread.join(timeout)
+        cls._release_leadership()
+    
+    @classmethod
+    def is_leader(cls):
+        """
+        Hold or try to take the maintenance lock
+        Returns: True when this process should run the jobs
+        """
+        if cls._lock_connection is not None:
+            try:
+                cls._lock_connection.ping(reconnect=False)
+                return True
+            except Exception:
+                logger.warning("Lost the maintenance lock connection")
+                cls._release_leadership()
+        
+        connection = None
+        try:
+            connection = Database.open_dedicated_connection()
+            cursor = connection.cursor()
+            cursor.execute("SELECT GET_LOCK(%s, 0)", (cls.LOCK_NAME,))
+            acquired = cursor.fetchone()[0] == 1
+            cursor.close()
+        except Exception as e:
+            logger.error(f"Maintenance leader election failed: {e}")
+            acquired = False
+        
+        if acquired:
+            cls._lock_connection = connection
+            logger.info(f"Process {os.getpid()} is the maintenance leader")
+        elif connection is not None:
+            try:
+                connection.close()
+            except Exception:
+                pass
+        
+        return acquired
+    
+    @classmethod
+    def _release_leadership(cls):
+        connection, cls._lock_connection = cls._lock_connection, None
+        if connection is None:
+            return
+        
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (cls.LOCK_NAME,))
+            cursor.fetchall()
+            cursor.close()
+        except Exception:
+            pass
+        
+        try:
+            connection.close()
+        except Exception:
+            pass
+    
+    @classmethod
+    def _run(cls):
+        # Let the app finish starting before the first pass
+        if cls._stop.wait(min(60, cls._settings['interval_seconds'])):
+            return
+        
+        while not cls._stop.is_set():
+            try:
+                if cls.is_leader():
+                    cls.run_once()
+            except Exception as e:
+                logger.exception(f"Maintenance run failed: {e}")
+            
+            cls._stop.wait(cls._settings['interval_seconds'])
+    
+    @classmethod
+    def run_once(cls):
+        """
+        Run every job once and record rows deleted and time taken per job
+        Returns: run summary dict
+        """
+        started_at = datetime.now()
+        started = time.perf_counter()
+        results = []
+        
+        for name, job in cls._jobs():
+            if cls._stop.is_set():
+                break
+            
+            job_started = time.perf_counter()
+            rows = job()
+            seconds = round(time.perf_counter() - job_started, 3)
+            
+            results.append({'job': name, 'rows': rows, 'seconds': seconds})
+            logger.info(f"🧹 {name}: {rows} rows in {seconds}s")
+        
+        cls._last_run = {
+            'started_at': started_at.isoformat(),
+            'seconds': round(time.perf_counter() - started, 3),
+            'rows': sum(result['rows'] for result in results),
+            'jobs': results
+        }
+        return cls._last_run
+    
+    @classmethod
+    def get_status(cls):
+        return {
+            'running': cls._thread is not None and cls._thread.is_alive(),
+            'leader': cls._lock_connection is not None,
+            'settings': dict(cls._settings),
+            'last_run': cls._last_run
+        }
+
+
+atexit.register(MaintenanceScheduler.stop)
\ No newline at end of file
@@ -2,6 +2,7 @@ import random
 import string
 from datetime import datetime, timedelta
 from BackEnd.utils.database import Database
+from BackEnd.services.rate_limiter import RateLimiter
 import logging
 
 logger = logging.getLogger(__name__)
@@ -159,25 +160,29 @@ class OTPService:
             return False
     
     @staticmethod
-    def cleanup_expired_otps():
+    def cleanup_expired_otps(chunk_size=1000, pause_seconds=0.05):
         """
-        Delete expired OTPs from database
-        Should be run periodically (e.g., daily cron job)
+        Delete expired OTPs from database in chunks
+        Run by the maintenance scheduler
+        Returns: number of deleted OTPs
         """
         try:
             logger.info("🧹 Cleaning up expired OTPs...")
             
-            query = """
-                DELETE FROM otp_verification 
-                WHERE expires_at < NOW()
-            """
-            Database.execute_query(query)
+            deleted = Database.delete_in_chunks(
+                'otp_verification',
+                'expires_at < NOW()',
+                chunk_size=chunk_size,
+                pause_seconds=pause_seconds
+            )
             
-            logger.info(f"✅ Expired OTPs cleaned up successfully")
+            logger.info(f"✅ Expired OTPs cleaned up successfully ({deleted} deleted)")
+            return deleted
             
         except Exception as e:
             logger.error(f"❌ Error cleaning up expired OTPs: {e}")
             logger.exception("Full error traceback:")
+            return 0
     
     @staticmethod
     def get_otp_attempts(email, purpose='registration', minutes=10):
@@ -213,21 +218,32 @@ class OTPService:
             return 0
     
     @staticmethod
-    def can_request_otp(email, purpose='registration', max_attempts=5, window_minutes=10):
+    def can_request_otp(email, purpose='registration', max_attempts=5, window_minutes=10, ip_address=None):
         """
         Check if user can request another OTP (rate limiting)
+        Counts the request when it is allowed. Limits are tracked by the
+        in-memory rate limiter, keyed by email and, when given, client IP.
         Returns: (can_request, message)
         """
-        logger.info(f"🚦 Checking rate limit for {email} (max: {max_attempts} in {window_minutes} min)")
+        window_seconds = window_minutes * 60
+        
+        if ip_address:
+            allowed, _ = RateLimiter.check('otp_ip', ip_address)
+            if not allowed:
+                logger.warning(f"⚠️ OTP rate limit exceeded for IP {ip_address}")
+                return False, f"Too many OTP requests. Please try again after {window_minutes} minutes"
         
-        attempts = OTPService.get_otp_attempts(email, purpose, window_minutes)
+        allowed, _ = RateLimiter.consume('otp', f"{purpose}:{email}", max_attempts, window_seconds)
         
-        if attempts >= max_attempts:
-            logger.warning(f"⚠️ Rate limit exceeded for {email}: {attempts}/{max_attempts} attempts")
+        if not allowed:
+            logger.warning(f"⚠️ Rate limit exceeded for {email}: {max_attempts} requests in {window_minutes} minutes")
             return False, f"Too many OTP requests. Please try again after {window_minutes} minutes"
         
-        logger.info(f"✅ Rate limit OK for {email}: {attempts}/{max_attempts} attempts used")
-        return True, f"Can request OTP ({attempts}/{max_attempts} attempts used)"
+        if ip_address:
+            RateLimiter.hit('otp_ip', ip_address)
+        
+        logger.info(f"✅ Rate limit OK for {email}")
+        return True, "Can request OTP"
     
     @staticmethod
     def resend_otp(email, purpose='registration', expiry_minutes=10):
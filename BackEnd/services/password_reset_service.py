@@ -1,5 +1,6 @@
 from datetime import datetime, timedelta
 from BackEnd.utils.database import Database
+from BackEnd.services.jwt_service import TokenCache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -27,13 +28,13 @@ class PasswordResetService:
             # Insert new reset request
             insert_query = """
                 INSERT INTO password_reset_tokens 
-                (email, token, expires_at)
-                VALUES (%s, %s, %s)
+                (email, token, token_hash, expires_at)
+                VALUES (%s, %s, %s, %s)
             """
             
             reset_id = Database.execute_query(
                 insert_query,
-                (email, token, expires_at)
+                (email, token, TokenCache.digest(token), expires_at)
             )
             
             if reset_id:
@@ -49,17 +50,17 @@ class PasswordResetService:
     @staticmethod
     def verify_reset_token(token):
         """
-        Verify password reset token
+        Verify password reset token (unique index probe on the token digest)
         Returns: (is_valid, email/error_message)
         """
         try:
             query = """
                 SELECT id, email, token, expires_at, is_used
                 FROM password_reset_tokens
-                WHERE token = %s
+                WHERE token_hash = %s
             """
             
-            result = Database.execute_query(query, (token,), fetch='one')
+            result = Database.execute_query(query, (TokenCache.digest(token),), fetch='one')
             
             if not result:
                 return False, "Invalid reset token"
@@ -88,10 +89,10 @@ class PasswordResetService:
             query = """
                 UPDATE password_reset_tokens
                 SET is_used = TRUE, used_at = NOW()
-                WHERE token = %s
+                WHERE token_hash = %s
             """
             
-            Database.execute_query(query, (token,))
+            Database.execute_query(query, (TokenCache.digest(token),))
             logger.info("Reset token marked as used")
             
             return True, "Token marked as used"
@@ -137,22 +138,26 @@ class PasswordResetService:
         return True, f"Can request reset ({attempts}/{max_attempts} attempts used)"
     
     @staticmethod
-    def cleanup_expired_tokens():
+    def cleanup_expired_tokens(chunk_size=1000, pause_seconds=0.05):
         """
-        Delete expired reset tokens from database
-        Should be run periodically (e.g., daily cron job)
+        Delete expired reset tokens from database in chunks
+        Run by the maintenance scheduler
+        Returns: number of deleted tokens
         """
         try:
-            query = """
-                DELETE FROM password_reset_tokens
-                WHERE expires_at < NOW()
-            """
+            deleted = Database.delete_in_chunks(
+                'password_reset_tokens',
+                'expires_at < NOW()',
+                chunk_size=chunk_size,
+                pause_seconds=pause_seconds
+            )
+            logger.info(f"Expired password reset tokens cleaned up ({deleted} deleted)")
             
-            Database.execute_query(query)
-            logger.info("Expired password reset tokens cleaned up")
+            return deleted
             
         except Exception as e:
             logger.error(f"Error cleaning up expired tokens: {e}")
+            return 0
     
     @staticmethod
     def delete_user_reset_tokens(email):
@@ -0,0 +1,183 @@
+# ============================================
+# PASSWORD SERVICE
+# bcrypt hashing and verification on a bounded
+# worker process pool
+# ============================================
+
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import threading
+import bcrypt
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+def _hash_password(password, rounds):
+    """Runs in a worker process"""
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _verify_password(password, hashed_password):
+    """Runs in a worker process"""
+    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+
+def _warm_up():
+    """Runs in a worker process; submitted once per worker to fork it"""
+    return os.getpid()
+
+
+class PasswordServiceBusy(Exception):
+    """Raised when the password queue is full or a result takes too long"""
+    
+    def __init__(self, message='Server is busy, please try again shortly'):
+        super().__init__(message)
+
+
+class PasswordService:
+    """
+    Runs bcrypt in a small process pool so auth bursts use at most
+    `workers` cores, and rejects work once `max_queue` calls are waiting
+    instead of letting request threads pile up behind it
+    """
+    
+    _rounds = 12
+    _workers = 2
+    _max_queue = 32
+    _timeout = 10
+    
+    _executor = None
+    _executor_pid = None
+    _slots = threading.BoundedSemaphore(_workers + _max_queue)
+    _lock = threading.Lock()
+    
+    @classmethod
+    def configure(cls, rounds=12, workers=2, max_queue=32, timeout=10):
+        """
+        Apply settings and fork the worker pool (call once at startup,
+        before any background thread is started)
+        
+        Args:
+            rounds: bcrypt cost factor for new hashes
+            workers: Worker processes; 0 hashes inline on the request thread
+            max_queue: Calls allowed to wait for a worker before failing fast
+            timeout: Seconds to wait for a result
+        """
+        with cls._lock:
+            cls._rounds = rounds
+            cls._workers = max(0, workers)
+            cls._max_queue = max(0, max_queue)
+            cls._timeout = timeout
+            cls._slots = threading.BoundedSemaphore(max(1, cls._workers) + cls._max_queue)
+            cls._shutdown_executor()
+            if cls._workers:
+                cls._start_executor()
+        
+        logger.info(f"Password service configured (rounds={rounds}, workers={cls._workers}, queue={cls._max_queue})")
+    
+    @classmethod
+    def _start_executor(cls):
+        """
+        Create the process pool and fork every worker now (caller holds _lock)
+        
+        fork: the BackEnd package builds the app on import, so spawn or
+        forkserver workers would re-run create_app(). Forking is only safe
+        while this process has no other threads, so the workers are all
+        started here rather than on the first hash.
+        """
+        cls._executor = ProcessPoolExecutor(
+            max_workers=cls._workers,
+            mp_context=multiprocessing.get_context('fork')
+        )
+        cls._executor_pid = os.getpid()
+        
+        warm_ups = [cls._executor.submit(_warm_up) for _ in range(cls._workers)]
+        for future in warm_ups:
+            future.result()
+    
+    @classmethod
+    def _get_executor(cls):
+        """Process pool for this PID"""
+        with cls._lock:
+            if cls._executor is None or cls._executor_pid != os.getpid():
+                # Only after a broken pool or a fork of a configured process;
+                # threads may be running by now, so say so
+                logger.warning("Password worker pool started after startup")
+                cls._start_executor()
+            return cls._executor
+    
+    @classmethod
+    def _shutdown_executor(cls):
+        if cls._executor is not None and cls._executor_pid == os.getpid():
+            cls._executor.shutdown(wait=False, cancel_futures=True)
+        cls._executor = None
+        cls._executor_pid = None
+    
+    @classmethod
+    def _run(cls, func, *args):
+        """Run func in the pool, bounded by the queue-depth semaphore"""
+        slots = cls._slots
+        
+        if not slots.acquire(blocking=False):
+            logger.warning("Password queue full, rejecting request")
+            raise PasswordServiceBusy()
+        
+        if cls._workers == 0:
+            try:
+                return func(*args)
+            finally:
+                slots.release()
+        
+        try:
+            future = cls._get_executor().submit(func, *args)
+        except BrokenProcessPool:
+            slots.release()
+            logger.error("Password worker pool broke, recreating it")
+            with cls._lock:
+                cls._executor = None
+            raise
+        except Exception:
+            slots.release()
+            raise
+        
+        # The slot is held until the worker is done with the call, not
+        # until this thread stops waiting, so the queue bound holds on timeouts
+        future.add_done_callback(lambda _: slots.release())
+        
+        try:
+            return future.result(timeout=cls._timeout)
+        except FutureTimeoutError:
+            future.cancel()  # Frees the slot now if the call never reached a worker
+            logger.warning(f"Password hashing did not finish within {cls._timeout}s")
+            raise PasswordServiceBusy()
+        except BrokenProcessPool:
+            logger.error("Password worker pool broke, recreating it")
+            with cls._lock:
+                cls._executor = None
+            raise
+    
+    @classmethod
+    def hash_password(cls, password):
+        """Hash password with the configured cost factor"""
+        return cls._run(_hash_password, password, cls._rounds)
+    
+    @classmethod
+    def verify_password(cls, password, hashed_password):
+        """Verify password against hash"""
+        return cls._run(_verify_password, password, hashed_password)
+    
+    @classmethod
+    def get_rounds(cls, hashed_password):
+        """Cost factor encoded in a bcrypt hash ($2b$12$...), or None"""
+        try:
+            return int(hashed_password.split('$')[2])
+        except (AttributeError, IndexError, ValueError):
+            return None
+    
+    @classmethod
+    def needs_rehash(cls, hashed_password):
+        """True when hashed_password was made with a different cost factor"""
+        return cls.get_rounds(hashed_password) != cls._rounds
\ No newline at end of file
@@ -0,0 +1,226 @@
+# ============================================
+# RATE LIMITER
+# Sliding-window counters for login lockout and
+# OTP requests, in process or in a shared store
+# ============================================
+
+from collections import deque
+import threading
+import logging
+import uuid
+import time
+
+logger = logging.getLogger(__name__)
+
+# name -> (limit, window_seconds); overridden from config in RateLimiter.configure
+DEFAULT_RULES = {
+    'login_email': (5, 15 * 60),
+    'login_ip': (50, 15 * 60),
+    'otp': (5, 10 * 60),
+    'otp_ip': (20, 10 * 60)
+}
+
+
+class MemoryBackend:
+    """
+    Per-process sliding-window log
+    
+    Each key keeps at most `limit` timestamps, so a check is O(1) no matter
+    how many attempts a burst makes.
+    """
+    
+    # Drop keys idle for longer than their window every this many seconds
+    PURGE_INTERVAL = 60
+    
+    def __init__(self):
+        self._events = {}  # key -> (deque of timestamps, window_seconds)
+        self._lock = threading.Lock()
+        self._next_purge = time.monotonic() + self.PURGE_INTERVAL
+    
+    @staticmethod
+    def _trim(events, window_seconds, now):
+        while events and events[0] <= now - window_seconds:
+            events.popleft()
+    
+    def _purge(self, now):
+        """Forget keys with no events left in their window (lock held)"""
+        if now < self._next_purge:
+            return
+        
+        self._next_purge = now + self.PURGE_INTERVAL
+        for key in [k for k, (events, window) in self._events.items() if not events or events[-1] <= now - window]:
+            del self._events[key]
+    
+    def check(self, key, limit, window_seconds):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._events.get(key)
+            if entry is None:
+                return True, 0
+            
+            events = entry[0]
+            self._trim(events, window_seconds, now)
+            
+            if len(events) < limit:
+                return True, 0
+            return False, events[-limit] + window_seconds - now
+    
+    def hit(self, key, limit, window_seconds):
+        now = time.monotonic()
+        with self._lock:
+            self._purge(now)
+            
+            entry = self._events.get(key)
+            if entry is None or entry[0].maxlen != limit:
+                entry = (deque(entry[0] if entry else (), maxlen=limit), window_seconds)
+                self._events[key] = entry
+            
+            entry[0].append(now)
+    
+    def reset(self, key):
+        with self._lock:
+            self._events.pop(key, None)
+    
+    def size(self):
+        with self._lock:
+            return len(self._events)
+
+
+class RedisBackend:
+    """Sliding-window log in a Redis sorted set, shared by every worker"""
+    
+    def __init__(self, url):
+        import redis  # optional dependency, only needed with SHARED_STORE_URL
+        
+        self._client = redis.Redis.from_url(url, socket_timeout=1)
+        self._client.ping()
+    
+    @staticmethod
+    def _key(key):
+        return f"ratelimit:{key}"
+    
+    def check(self, key, limit, window_seconds):
+        now = time.time()
+        redis_key = self._key(key)
+        
+        pipe = self._client.pipeline()
+        pipe.zremrangebyscore(redis_key, 0, now - window_seconds)
+        pipe.zrevrange(redis_key, limit - 1, limit - 1, withscores=True)
+        _, nth_newest = pipe.execute()
+        
+        if not nth_newest:
+            return True, 0
+        return False, nth_newest[0][1] + window_seconds - now
+    
+    def hit(self, key, limit, window_seconds):
+        now = time.time()
+        redis_key = self._key(key)
+        
+        pipe = self._client.pipeline()
+        pipe.zadd(redis_key, {f"{now}:{uuid.uuid4().hex[:8]}": now})
+        pipe.zremrangebyrank(redis_key, 0, -(limit + 1))  # keep the newest `limit` events
+        pipe.expire(redis_key, int(window_seconds) + 1)
+        pipe.execute()
+    
+    def reset(self, key):
+        self._client.delete(self._key(key))
+    
+    def size(self):
+        return None
+
+
+class RateLimiter:
+    """
+    Sliding-window rate limiter keyed by rule name and key (email, IP)
+    
+    Usage:
+        allowed, retry_after = RateLimiter.check('login_email', email)
+        RateLimiter.hit('login_email', email)
+    """
+    
+    _backend = MemoryBackend()
+    _rules = dict(DEFAULT_RULES)
+    
+    @classmethod
+    def configure(cls, config):
+        """Apply limits from config and pick the backend (call once at startup)"""
+        window = config.LOGIN_LOCKOUT_MINUTES * 60
+        cls._rules = {
+            'login_email': (config.MAX_LOGIN_ATTEMPTS, window),
+            'login_ip': (config.MAX_LOGIN_ATTEMPTS_PER_IP, window),
+            'otp': (config.OTP_MAX_ATTEMPTS, config.OTP_EXPIRY_MINUTES * 60),
+            'otp_ip': (config.OTP_MAX_REQUESTS_PER_IP, config.OTP_EXPIRY_MINUTES * 60)
+        }
+        
+        if config.SHARED_STORE_URL:
+            try:
+                cls._backend = RedisBackend(config.SHARED_STORE_URL)
+                logger.info("🚦 Rate limiter using shared store")
+                return
+            except Exception as e:
+                logger.warning(f"Shared store unavailable, rate limits are per process: {e}")
+        
+        cls._backend = MemoryBackend()
+    
+    @classmethod
+    def _resolve(cls, name, key, limit, window_seconds):
+        default_limit, default_window = cls._rules[name]
+        return (
+            f"{name}:{str(key).lower()}",
+            limit or default_limit,
+            window_seconds or default_window
+        )
+    
+    @classmethod
+    def check(cls, name, key, limit=None, window_seconds=None):
+        """
+        Whether another event is allowed for key under rule `name`
+        Returns: (allowed, retry_after_seconds)
+        """
+        key, limit, window_seconds = cls._resolve(name, key, limit, window_seconds)
+        
+        try:
+            return cls._backend.check(key, limit, window_seconds)
+        except Exception as e:
+            # Fail open: a limiter outage should not lock everyone out
+            logger.error(f"Rate limiter check failed for {key}: {e}")
+            return True, 0
+    
+    @classmethod
+    def hit(cls, name, key, limit=None, window_seconds=None):
+        """Record one event for key under rule `name`"""
+        key, limit, window_seconds = cls._resolve(name, key, limit, window_seconds)
+        
+        try:
+            cls._backend.hit(key, limit, window_seconds)
+        except Exception as e:
+            logger.error(f"Rate limiter hit failed for {key}: {e}")
+    
+    @classmethod
+    def consume(cls, name, key, limit=None, window_seconds=None):
+        """
+        Check and record in one call (the event counts only when allowed)
+        Returns: (allowed, retry_after_seconds)
+        """
+        allowed, retry_after = cls.check(name, key, limit, window_seconds)
+        if allowed:
+            cls.hit(name, key, limit, window_seconds)
+        return allowed, retry_after
+    
+    @classmethod
+    def reset(cls, name, key):
+        """Forget every event for key under rule `name`"""
+        key = f"{name}:{str(key).lower()}"
+        
+        try:
+            cls._backend.reset(key)
+        except Exception as e:
+            logger.error(f"Rate limiter reset failed for {key}: {e}")
+    
+    @classmethod
+    def get_stats(cls):
+        return {
+            'backend': type(cls._backend).__name__,
+            'tracked_keys': cls._backend.size(),
+            'rules': {name: {'limit': limit, 'window_seconds': window} for name, (limit, window) in cls._rules.items()}
+        }
\ No newline at end of file
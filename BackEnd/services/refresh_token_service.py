@@ -0,0 +1,237 @@
+# ============================================
+# REFRESH TOKEN SERVICE
+# Single-use refresh tokens with rotation and
+# reuse detection
+# ============================================
+
+from datetime import datetime, timedelta
+from BackEnd.utils.database import Database
+from BackEnd.services.session_service import SessionService
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshTokenService:
+    """
+    Refresh tokens are JWTs carrying a jti (one row in refresh_tokens) and a
+    family id shared by every token rotated from the same login. Each one
+    can be exchanged once; presenting an already-used token means it was
+    copied, so the whole family is revoked and the user must log in again.
+    
+    The exception is a token re-presented within REFRESH_TOKEN_REUSE_GRACE_SECONDS
+    of its rotation while its successor is still unused, which is what two
+    tabs refreshing at once look like: that request gets the same successor.
+    """
+    
+    @staticmethod
+    def issue(jwt_service, user, expires_in_days=30, family_id=None, ip_address=None):
+        """
+        Mint a refresh token and record it
+        Returns: refresh token string or None
+        """
+        try:
+            jti = uuid.uuid4().hex
+            family_id = family_id or uuid.uuid4().hex
+            
+            token = jwt_service.generate_refresh_token(
+                user['id'],
+                user['email'],
+                expires_in_days=expires_in_days,
+                jti=jti,
+                family_id=family_id
+            )
+            
+            query = """
+                INSERT INTO refresh_tokens (jti, family_id, user_id, expires_at, ip_address)
+                VALUES (%s, %s, %s, %s, %s)
+            """
+            expires_at = datetime.utcnow() + timedelta(days=expires_in_days)
+            Database.execute_query(query, (jti, family_id, user['id'], expires_at, ip_address), fetch=None)
+            
+            return token
+        
+        except Exception as e:
+            logger.error(f"Error issuing refresh token for user {user.get('id')}: {e}")
+            return None
+    
+    @staticmethod
+    def rotate(jwt_service, refresh_token, config, ip_address=None, user_agent=None):
+        """
+        Exchange a refresh token for a new access token and refresh token
+        Returns: (success, tokens dict/error_message)
+        """
+        is_valid, payload = jwt_service.verify_token(refresh_token)
+        
+        if not is_valid:
+            return False, payload
+        
+        if payload.get('type') != 'refresh' or not payload.get('jti'):
+            return False, "Invalid refresh token"
+        
+        jti = payload['jti']
+        family_id = payload.get('family')
+        new_jti = uuid.uuid4().hex
+        
+        connection = None
+        cursor = None
+        
+        try:
+            connection = Database.get_connection()
+            cursor = connection.cursor(dictionary=True)
+            
+            # Claim the token: only one exchange can flip used_at
+            cursor.execute("""
+                UPDATE refresh_tokens
+                SET used_at = NOW(), replaced_by = %s
+                WHERE jti = %s AND used_at IS NULL AND revoked_at IS NULL
+                AND expires_at > UTC_TIMESTAMP()
+            """, (new_jti, jti))
+            claimed = cursor.rowcount == 1
+            
+            if not claimed:
+                # Locking read: sees the rotation that made the claim fail
+                # even if this transaction already has an older snapshot
+                cursor.execute("""
+                    SELECT t.family_id, t.used_at, t.revoked_at, t.replaced_by,
+                           t.used_at > NOW() - INTERVAL %s SECOND AS in_grace,
+                           s.used_at IS NULL AND s.revoked_at IS NULL
+                           AND s.expires_at > UTC_TIMESTAMP() AS successor_unused
+                    FROM refresh_tokens t
+                    LEFT JOIN refresh_tokens s ON s.jti = t.replaced_by
+                    WHERE t.jti = %s
+                    FOR UPDATE
+                """, (config.REFRESH_TOKEN_REUSE_GRACE_SECONDS, jti))
+                row = cursor.fetchone()
+                
+                if row and row['revoked_at'] is None and row['in_grace'] and row['successor_unused']:
+                    # Concurrent refresh of the same token: hand out its successor
+                    new_jti = row['replaced_by']
+                    logger.info(f"Concurrent refresh for user {payload.get('user_id')}, returning the rotated token")
+                
+                elif row and row['used_at'] is not None and row['revoked_at'] is None:
+                    # Reuse of a rotated token: revoke the whole family
+                    cursor.execute("""
+                        UPDATE refresh_tokens SET revoked_at = NOW()
+                        WHERE family_id = %s AND revoked_at IS NULL
+                    """, (row['family_id'],))
+                    connection.commit()
+                    logger.warning(f"Refresh token reuse detected for user {payload.get('user_id')}, family revoked")
+                    return False, "Refresh token has already been used. Please log in again"
+                
+                else:
+                    connection.commit()
+                    return False, "Refresh token is no longer valid. Please log in again"
+            
+            # Read uncached: the profile cache (get_user_by_id) could still
+            # show a just-deactivated account as active
+            cursor.execute(
+                "SELECT id, email, username, is_active FROM users WHERE id = %s",
+                (payload['user_id'],)
+            )
+            user = cursor.fetchone()
+            
+            if not user or not user['is_active']:
+                connection.rollback()
+                return False, "Account is not active"
+            
+            expires_in_days = config.JWT_REFRESH_TOKEN_EXPIRES
+            if claimed:
+                cursor.execute("""
+                    INSERT INTO refresh_tokens (jti, family_id, user_id, expires_at, ip_address)
+                    VALUES (%s, %s, %s, %s, %s)
+                """, (new_jti, family_id or jti, user['id'], datetime.utcnow() + timedelta(days=expires_in_days), ip_address))
+            connection.commit()
+        
+        except Exception as e:
+            logger.exception(f"Error rotating refresh token: {e}")
+            if connection:
+                try:
+                    connection.rollback()
+                except:
+                    pass
+            return False, "Could not refresh token"
+        
+        finally:
+            if cursor:
+                try:
+                    cursor.close()
+                except:
+                    pass
+            if connection:
+                try:
+                    connection.close()
+                except:
+                    pass
+        
+        access_token = jwt_service.generate_token(
+            user['id'],
+            user['email'],
+            user['username'],
+            expires_in_hours=config.JWT_ACCESS_TOKEN_EXPIRES
+        )
+        new_refresh_token = jwt_service.generate_refresh_token(
+            user['id'],
+            user['email'],
+            expires_in_days=expires_in_days,
+            jti=new_jti,
+            family_id=family_id or jti
+        )
+        
+        SessionService.create_session(
+            user['id'],
+            access_token,
+            ip_address,
+            user_agent,
+            config.JWT_ACCESS_TOKEN_EXPIRES
+        )
+        
+        logger.info(f"Refresh token rotated for user {user['id']}")
+        return True, {
+            'access_token': access_token,
+            'refresh_token': new_refresh_token,
+            'expires_in': config.JWT_ACCESS_TOKEN_EXPIRES * 3600
+        }
+    
+    @staticmethod
+    def revoke_user_tokens(user_id):
+        """
+        Revoke every refresh token of a user (password reset, logout everywhere)
+        Returns: (success, message)
+        """
+        try:
+            query = """
+                UPDATE refresh_tokens SET revoked_at = NOW()
+                WHERE user_id = %s AND revoked_at IS NULL
+            """
+            Database.execute_query(query, (user_id,), fetch=None)
+            
+            logger.info(f"Refresh tokens revoked for user {user_id}")
+            return True, "Refresh tokens revoked"
+        
+        except Exception as e:
+            logger.error(f"Error revoking refresh tokens: {e}")
+            return False, str(e)
+    
+    @staticmethod
+    def cleanup_expired_tokens(chunk_size=1000, pause_seconds=0.05):
+        """
+        Delete expired refresh tokens in chunks
+        Run by the maintenance scheduler
+        Returns: number of deleted tokens
+        """
+        try:
+            deleted = Database.delete_in_chunks(
+                'refresh_tokens',
+                'expires_at < UTC_TIMESTAMP()',
+                chunk_size=chunk_size,
+                pause_seconds=pause_seconds
+            )
+            logger.info(f"Expired refresh tokens cleaned up ({deleted} deleted)")
+            
+            return deleted
+        
+        except Exception as e:
+            logger.error(f"Error cleaning up refresh tokens: {e}")
+            return 0
\ No newline at end of file
@@ -1,5 +1,7 @@
 from datetime import datetime, timedelta
 from BackEnd.utils.database import Database
+from BackEnd.services.jwt_service import TokenCache
+from BackEnd.services.write_behind import WriteBehindBuffer
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,27 +14,20 @@ class SessionService:
     def create_session(user_id, token, ip_address=None, user_agent=None, expires_in_hours=24):
         """
         Create a new session in database
-        Returns: (success, session_id/error_message)
+        The row is buffered and inserted with the next write-behind batch.
+        Returns: (success, message)
         """
         try:
             expires_at = datetime.now() + timedelta(hours=expires_in_hours)
             
-            query = """
-                INSERT INTO user_sessions 
-                (user_id, token, ip_address, user_agent, expires_at)
-                VALUES (%s, %s, %s, %s, %s)
-            """
-            
-            session_id = Database.execute_query(
-                query,
-                (user_id, token, ip_address, user_agent, expires_at)
+            WriteBehindBuffer.record(
+                'user_sessions',
+                ('user_id', 'token', 'token_hash', 'ip_address', 'user_agent', 'expires_at'),
+                (user_id, token, TokenCache.digest(token), ip_address, user_agent, expires_at)
             )
             
-            if session_id:
-                logger.info(f"Session created for user {user_id}")
-                return True, session_id
-            else:
-                return False, "Failed to create session"
+            logger.info(f"Session created for user {user_id}")
+            return True, "Session created"
                 
         except Exception as e:
             logger.error(f"Error creating session: {e}")
@@ -41,18 +36,20 @@ class SessionService:
     @staticmethod
     def get_session_by_token(token):
         """
-        Get session by token
+        Get session by token (unique index probe on the token digest)
         Returns: session record or None
         """
         try:
+            WriteBehindBuffer.flush('user_sessions')
+            
             query = """
                 SELECT id, user_id, token, ip_address, user_agent, 
                        expires_at, created_at
                 FROM user_sessions
-                WHERE token = %s AND expires_at > NOW()
+                WHERE token_hash = %s AND expires_at > NOW()
             """
             
-            result = Database.execute_query(query, (token,), fetch='one')
+            result = Database.execute_query(query, (TokenCache.digest(token),), fetch='one')
             return result
             
         except Exception as e:
@@ -111,8 +108,11 @@ class SessionService:
         Returns: (success, message)
         """
         try:
-            query = "DELETE FROM user_sessions WHERE token = %s"
-            Database.execute_query(query, (token,))
+            WriteBehindBuffer.flush('user_sessions')
+            
+            query = "DELETE FROM user_sessions WHERE token_hash = %s"
+            Database.execute_query(query, (TokenCache.digest(token),))
+            TokenCache.revoke(token)
             
             logger.info(f"Session deleted")
             return True, "Session deleted successfully"
@@ -128,6 +128,8 @@ class SessionService:
         Returns: (success, message)
         """
         try:
+            WriteBehindBuffer.flush('user_sessions')
+            
             query = "DELETE FROM user_sessions WHERE id = %s"
             Database.execute_query(query, (session_id,))
             
@@ -145,8 +147,11 @@ class SessionService:
         Returns: (success, message)
         """
         try:
+            WriteBehindBuffer.flush('user_sessions')
+            
             query = "DELETE FROM user_sessions WHERE user_id = %s"
             Database.execute_query(query, (user_id,))
+            TokenCache.revoke_user(user_id)
             
             logger.info(f"All sessions deleted for user {user_id}")
             return True, "All sessions deleted successfully"
@@ -162,15 +167,17 @@ class SessionService:
         Returns: (success, message)
         """
         try:
+            WriteBehindBuffer.flush('user_sessions')
+            
             new_expires_at = datetime.now() + timedelta(hours=additional_hours)
             
             query = """
                 UPDATE user_sessions 
                 SET expires_at = %s
-                WHERE token = %s
+                WHERE token_hash = %s
             """
             
-            Database.execute_query(query, (new_expires_at, token))
+            Database.execute_query(query, (new_expires_at, TokenCache.digest(token)))
             
             logger.info(f"Session extended")
             return True, "Session extended successfully"
@@ -180,26 +187,26 @@ class SessionService:
             return False, str(e)
     
     @staticmethod
-    def cleanup_expired_sessions():
+    def cleanup_expired_sessions(chunk_size=1000, pause_seconds=0.05):
         """
-        Delete all expired sessions from database
-        Should be run periodically (e.g., daily cron job)
+        Delete all expired sessions from database in chunks
+        Run by the maintenance scheduler
         Returns: number of deleted sessions
         """
         try:
-            query = """
-                DELETE FROM user_sessions 
-                WHERE expires_at < NOW()
-            """
-            
-            Database.execute_query(query)
-            logger.info("Expired sessions cleaned up")
+            deleted = Database.delete_in_chunks(
+                'user_sessions',
+                'expires_at < NOW()',
+                chunk_size=chunk_size,
+                pause_seconds=pause_seconds
+            )
+            logger.info(f"Expired sessions cleaned up ({deleted} deleted)")
             
-            return True
+            return deleted
             
         except Exception as e:
             logger.error(f"Error cleaning up expired sessions: {e}")
-            return False
+            return 0
     
     @staticmethod
     def get_session_count_by_user(user_id):
@@ -208,6 +215,8 @@ class SessionService:
         Returns: count
         """
         try:
+            WriteBehindBuffer.flush('user_sessions')
+            
             query = """
                 SELECT COUNT(*) as count
                 FROM user_sessions
@@ -0,0 +1,217 @@
+# ============================================
+# WRITE-BEHIND BUFFER
+# Audit and bookkeeping rows inserted in batches
+# off the request thread
+# ============================================
+
+from BackEnd.utils.database import Database
+import threading
+import atexit
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """
+    Coalesces single-row inserts (login attempts, sessions) into multi-row
+    INSERT ... VALUES (...), (...) statements
+    
+    Requests append a row and return. A background thread per process
+    flushes every `flush_seconds`, or sooner once `batch_size` rows are
+    waiting, in one transaction per batch. Rows still buffered are written
+    at shutdown. Anything that reads a buffered table should call
+    flush(table) first.
+    """
+    
+    _settings = {
+        'enabled': True,
+        'batch_size': 200,
+        'flush_seconds': 1.0,
+        'max_pending': 10000
+    }
+    
+    _buffers = {}  # (table, columns) -> list of row tuples
+    _pending = 0
+    _lock = threading.Lock()
+    _flush_lock = threading.Lock()
+    _wake = threading.Event()
+    _stop = threading.Event()
+    _thread = None
+    _pid = None
+    _stats = {'rows_written': 0, 'batches': 0, 'failed_rows': 0}
+    
+    @classmethod
+    def configure(cls, enabled=True, batch_size=200, flush_seconds=1.0, max_pending=10000):
+        """Apply settings (call once at startup)"""
+        cls._settings = {
+            'enabled': enabled,
+            'batch_size': max(1, batch_size),
+            'flush_seconds': flush_seconds,
+            'max_pending': max(batch_size, max_pending)
+        }
+    
+    @classmethod
+    def _ensure_started(cls):
+        """Start the flusher for this PID (threads do not survive a fork)"""
+        if cls._pid == os.getpid() and cls._thread is not None and cls._thread.is_alive():
+            return
+        
+        with cls._lock:
+            if cls._pid == os.getpid() and cls._thread is not None and cls._thread.is_alive():
+                return
+            
+            if cls._pid != os.getpid():
+                # Rows inherited from the parent are the parent's to write
+                cls._buffers = {}
+                cls._pending = 0
+            
+            cls._stop.clear()
+            cls._pid = os.getpid()
+            cls._thread = threading.Thread(target=cls._run, name='write-behind', daemon=True)
+            cls._thread.start()
+    
+    @classmethod
+    def record(cls, table, columns, row):
+        """
+        Buffer one row for `table`
+        
+        Args:
+            table: Table name
+            columns: Tuple of column names
+            row: Tuple of values in column order
+        """
+        if not cls._settings['enabled']:
+            cls._insert(table, columns, [row])
+            return
+        
+        cls._ensure_started()
+        
+        with cls._lock:
+            cls._buffers.setdefault((table, tuple(columns)), []).append(tuple(row))
+            cls._pending += 1
+            pending = cls._pending
+        
+        if pending >= cls._settings['max_pending']:
+            # Flusher is behind (database slow or down): write on this thread
+            logger.warning(f"Write-behind buffer holds {pending} rows, flushing inline")
+            cls.flush()
+        elif pending >= cls._settings['batch_size']:
+            cls._wake.set()
+    
+    @classmethod
+    def flush(cls, table=None):
+        """
+        Write buffered rows now (all tables, or only `table`)
+        
+        Returns:
+            Number of rows written
+        """
+        # Always through _flush_lock: a batch the flusher already took off
+        # the buffer (so _pending no longer counts it) may still be in
+        # flight, and callers rely on it being written when this returns
+        with cls._flush_lock:
+            if not cls._pending:
+                return 0
+            
+            with cls._lock:
+                keys = [key for key in cls._buffers if table is None or key[0] == table]
+                batches = [(key, cls._buffers.pop(key)) for key in keys]
+                cls._pending -= sum(len(rows) for _, rows in batches)
+            
+            written = 0
+            batch_size = cls._settings['batch_size']
+            
+            for (table_name, columns), rows in batches:
+                for start in range(0, len(rows), batch_size):
+                    written += cls._insert(table_name, columns, rows[start:start + batch_size])
+            
+            return written
+    
+    @classmethod
+    def _insert(cls, table, columns, rows):
+        """
+        Insert rows with one multi-row statement, falling back to one row
+        at a time so a single bad row does not lose the batch
+        
+        Returns:
+            Number of rows written
+        """
+        placeholders = '(' + ', '.join(['%s'] * len(columns)) + ')'
+        prefix = f"INSERT INTO {table} ({', '.join(columns)}) VALUES "
+        
+        try:
+            cls._execute(prefix + ', '.join([placeholders] * len(rows)), [value for row in rows for value in row])
+            cls._stats['batches'] += 1
+            cls._stats['rows_written'] += len(rows)
+            return len(rows)
+        except Exception as e:
+            if len(rows) == 1:
+                logger.error(f"Error writing {table} row: {e}")
+                cls._stats['failed_rows'] += 1
+                return 0
+            logger.error(f"Batch insert of {len(rows)} {table} rows failed, retrying row by row: {e}")
+        
+        return sum(cls._insert(table, columns, [row]) for row in rows)
+    
+    @staticmethod
+    def _execute(query, params):
+        # Own connection: never part of (or rolled back with) a request's transaction
+        connection = Database.get_connection(scoped=False)
+        cursor = None
+        
+        try:
+            cursor = connection.cursor()
+            cursor.execute(query, params)
+            connection.commit()
+        except Exception:
+            try:
+                connection.rollback()
+            except Exception:
+                pass
+            raise
+        finally:
+            if cursor:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+            connection.close()
+    
+    @classmethod
+    def _run(cls):
+        while not cls._stop.is_set():
+            cls._wake.wait(cls._settings['flush_seconds'])
+            cls._wake.clear()
+            
+            try:
+                cls.flush()
+            except Exception as e:
+                logger.error(f"Write-behind flush error: {e}")
+    
+    @classmethod
+    def stop(cls, timeout=5):
+        """Stop the flusher and write everything still buffered (called at exit)"""
+        if cls._pid != os.getpid():
+            return
+        
+        cls._stop.set()
+        cls._wake.set()
+        if cls._thread is not None:
+            cls._thread.join(timeout)
+        
+        try:
+            cls.flush()
+        except Exception as e:
+            logger.error(f"Could not drain write-behind buffer at exit: {e}")
+    
+    @classmethod
+    def get_stats(cls):
+        stats = dict(cls._stats)
+        stats['pending'] = cls._pending
+        stats['enabled'] = cls._settings['enabled']
+        return stats
+
+
+atexit.register(WriteBehindBuffer.stop)
\ No newline at end of file
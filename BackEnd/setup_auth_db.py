@@ -0,0 +1,227 @@
+# ============================================
+# QUICK LAUNDRY AUTH TABLES SETUP
+# Creates the refresh token table used for
+# token rotation and migrates session/reset
+# tokens to indexed digest lookups
+# ============================================
+
+from BackEnd.utils.database import Database
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def create_refresh_tokens_table():
+    """Create refresh tokens table if it doesn't exist"""
+    
+    create_table = """
+    CREATE TABLE IF NOT EXISTS refresh_tokens (
+        id BIGINT AUTO_INCREMENT PRIMARY KEY,
+        jti CHAR(32) NOT NULL,
+        family_id CHAR(32) NOT NULL,
+        user_id INT NOT NULL,
+        expires_at DATETIME NOT NULL,
+        used_at DATETIME,
+        replaced_by CHAR(32),
+        revoked_at DATETIME,
+        ip_address VARCHAR(45),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE KEY uk_jti (jti),
+        INDEX idx_family (family_id),
+        INDEX idx_user (user_id),
+        INDEX idx_expires (expires_at)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """
+    
+    try:
+        with Database.get_connection() as connection:
+            cursor = connection.cursor()
+            
+            cursor.execute(create_table)
+            logger.info("Refresh tokens table created/verified")
+            
+            connection.commit()
+            cursor.close()
+            
+            return True
+    
+    except Exception as e:
+        logger.error(f"Error creating refresh tokens table: {e}")
+        return False
+
+
+# Tables whose tokens are looked up by SHA-256 digest (token_hash)
+TOKEN_DIGEST_TABLES = ('user_sessions', 'password_reset_tokens')
+
+
+def add_token_digest_column(table):
+    """
+    Add the token_hash column (with a plain index) to table, without locking it
+    
+    Cheap once done: a single SHOW COLUMNS. Rows written from then on carry
+    their digest; older rows are backfilled by migrate_token_digest.
+    """
+    connection = None
+    cursor = None
+    
+    try:
+        connection = Database.get_connection()
+        cursor = connection.cursor()
+        
+        cursor.execute(f"SHOW COLUMNS FROM {table} LIKE 'token_hash'")
+        if not cursor.fetchone():
+            cursor.execute(f"""
+                ALTER TABLE {table}
+                ADD COLUMN token_hash CHAR(64) NULL AFTER token,
+                ADD INDEX idx_token_hash (token_hash),
+                ALGORITHM=INPLACE, LOCK=NONE
+            """)
+            logger.info(f"{table}.token_hash column added")
+        
+        return True
+        
+    except Exception as e:
+        logger.error(f"Error adding token_hash to {table}: {e}")
+        return False
+    
+    finally:
+        if cursor:
+            cursor.close()
+        if connection:
+            connection.close()
+
+
+def migrate_token_digest(table, chunk_size=1000, pause_seconds=0.05):
+    """
+    Backfill token_hash in table and swap its plain index for a unique one
+    
+    Existing rows are backfilled with SHA2(token, 256) in short chunks,
+    duplicates are purged per digest, and the unique index replaces the
+    plain one once every row has a digest. A finished migration is a single
+    SHOW INDEX. Run by the setup script and the maintenance scheduler,
+    never at app startup.
+    Returns: number of rows backfilled or removed
+    """
+    changed = 0
+    
+    try:
+        rows = Database.execute_query(f"""
+            SHOW INDEX FROM {table} WHERE Key_name IN ('uk_token_hash', 'idx_token_hash')
+        """, fetch='all') or []
+        indexes = {row['Key_name'] for row in rows}
+        
+        if 'uk_token_hash' in indexes:
+            return 0
+        
+        # Plain index first, so the duplicate search and purge below are
+        # index lookups rather than a self-join over the whole table
+        if 'idx_token_hash' not in indexes:
+            Database.execute_query(f"""
+                ALTER TABLE {table}
+                ADD INDEX idx_token_hash (token_hash),
+                ALGORITHM=INPLACE, LOCK=NONE
+            """, fetch=None)
+            logger.info(f"{table}.idx_token_hash index created")
+        
+        backfilled = Database.update_in_chunks(
+            table,
+            'token_hash = SHA2(token, 256)',
+            'token_hash IS NULL',
+            chunk_size=chunk_size,
+            pause_seconds=pause_seconds
+        )
+        changed += backfilled
+        logger.info(f"{table}: {backfilled} token digests backfilled")
+        
+        # Identical tokens (same claims issued in the same second, before
+        # tokens carried a jti) would block the unique index; keep the newest
+        # row of each, one short delete per digest
+        duplicates = Database.execute_query(f"""
+            SELECT token_hash, MAX(id) AS keep_id
+            FROM {table}
+            WHERE token_hash IS NOT NULL
+            GROUP BY token_hash
+            HAVING COUNT(*) > 1
+        """, fetch='all') or []
+        
+        purged = 0
+        for row in duplicates:
+            purged += Database.delete_in_chunks(
+                table,
+                'token_hash = %s AND id < %s',
+                params=(row['token_hash'], row['keep_id']),
+                chunk_size=chunk_size,
+                pause_seconds=pause_seconds
+            )
+        changed += purged
+        if purged:
+            logger.info(f"{table}: {purged} duplicate tokens removed")
+        
+        Database.execute_query(f"""
+            ALTER TABLE {table}
+            ADD UNIQUE INDEX uk_token_hash (token_hash),
+            DROP INDEX idx_token_hash,
+            ALGORITHM=INPLACE, LOCK=NONE
+        """, fetch=None)
+        logger.info(f"{table}.uk_token_hash index created")
+        
+    except Exception as e:
+        logger.error(f"Error migrating {table} token digests: {e}")
+    
+    return changed
+
+
+def migrate_token_digests(chunk_size=1000, pause_seconds=0.05):
+    """Run migrate_token_digest over every digest table; returns rows changed"""
+    return sum(
+        migrate_token_digest(table, chunk_size=chunk_size, pause_seconds=pause_seconds)
+        for table in TOKEN_DIGEST_TABLES
+    )
+
+
+def initialize_auth_database():
+    """Initialize auth tables"""
+    try:
+        logger.info("Initializing auth tables...")
+        
+        if not create_refresh_tokens_table():
+            logger.error("Failed to create refresh tokens table")
+            return False
+        
+        # Only the column here; the backfill and unique index are left to
+        # the setup script / maintenance scheduler so workers start quickly
+        for table in TOKEN_DIGEST_TABLES:
+            if not add_token_digest_column(table):
+                logger.error(f"Failed to add token_hash to {table}")
+                return False
+        
+        logger.info("Auth tables initialized successfully")
+        return True
+    
+    except Exception as e:
+        logger.error(f"Error initializing auth tables: {e}")
+        return False
+
+
+if __name__ == '__main__':
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    
+    try:
+        from BackEnd.config import DevelopmentConfig
+        
+        print("Connecting to database...")
+        Database.initialize(DevelopmentConfig)
+        print("✓ Database connection established\n")
+        
+        if initialize_auth_database():
+            changed = migrate_token_digests()
+            print(f"\n✓ Auth tables ready ({changed} token rows backfilled or removed)\n")
+        else:
+            print("\n✗ FAILED! Please check the error messages above.\n")
+            
+    except Exception as e:
+        print(f"\n✗ ERROR: {e}\n")
\ No newline at end of file
@@ -0,0 +1,66 @@
+# ============================================
+# QUICK LAUNDRY EMAIL OUTBOX SETUP
+# Creates the table drained by the email workers
+# ============================================
+
+from BackEnd.utils.database import Database
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def create_email_outbox_table():
+    """Create email outbox table if it doesn't exist"""
+    
+    create_outbox_table = """
+    CREATE TABLE IF NOT EXISTS email_outbox (
+        id BIGINT AUTO_INCREMENT PRIMARY KEY,
+        to_email VARCHAR(255) NOT NULL,
+        subject VARCHAR(255) NOT NULL,
+        html_body MEDIUMTEXT NOT NULL,
+        text_body MEDIUMTEXT,
+        status ENUM('pending', 'sending', 'sent', 'failed') NOT NULL DEFAULT 'pending',
+        attempts INT NOT NULL DEFAULT 0,
+        next_attempt_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        locked_by VARCHAR(64),
+        locked_at DATETIME,
+        last_error TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        sent_at DATETIME,
+        INDEX idx_due (status, next_attempt_at),
+        INDEX idx_locked (status, locked_at)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """
+    
+    try:
+        with Database.get_connection() as connection:
+            cursor = connection.cursor()
+            
+            cursor.execute(create_outbox_table)
+            logger.info("Email outbox table created/verified")
+            
+            connection.commit()
+            cursor.close()
+            
+            return True
+            
+    except Exception as e:
+        logger.error(f"Error creating email outbox table: {e}")
+        return False
+
+
+def initialize_email_database():
+    """Initialize email outbox database"""
+    try:
+        logger.info("Initializing email outbox...")
+        
+        if not create_email_outbox_table():
+            logger.error("Failed to create email outbox table")
+            return False
+        
+        logger.info("Email outbox initialized successfully")
+        return True
+        
+    except Exception as e:
+        logger.error(f"Error initializing email outbox: {e}")
+        return False
\ No newline at end of file
@@ -0,0 +1,62 @@
+# ============================================
+# QUICK LAUNDRY IDEMPOTENCY KEYS SETUP
+# Creates the table that de-duplicates retried
+# order creation requests
+# ============================================
+
+from BackEnd.utils.database import Database
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def create_idempotency_keys_table():
+    """Create idempotency keys table if it doesn't exist"""
+    
+    create_table = """
+    CREATE TABLE IF NOT EXISTS idempotency_keys (
+        id BIGINT AUTO_INCREMENT PRIMARY KEY,
+        key_hash CHAR(64) NOT NULL,
+        request_hash CHAR(64) NOT NULL,
+        status_code SMALLINT,
+        response_body MEDIUMTEXT,
+        claimed_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        expires_at DATETIME NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE KEY uk_key_hash (key_hash),
+        INDEX idx_expires (expires_at)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """
+    
+    try:
+        with Database.get_connection() as connection:
+            cursor = connection.cursor()
+            
+            cursor.execute(create_table)
+            logger.info("Idempotency keys table created/verified")
+            
+            connection.commit()
+            cursor.close()
+            
+            return True
+    
+    except Exception as e:
+        logger.error(f"Error creating idempotency keys table: {e}")
+        return False
+
+
+def initialize_idempotency_database():
+    """Initialize idempotency keys table"""
+    try:
+        logger.info("Initializing idempotency keys...")
+        
+        if not create_idempotency_keys_table():
+            logger.error("Failed to create idempotency keys table")
+            return False
+        
+        logger.info("Idempotency keys initialized successfully")
+        return True
+    
+    except Exception as e:
+        logger.error(f"Error initializing idempotency keys: {e}")
+        return False
\ No newline at end of file
@@ -0,0 +1,82 @@
+# ============================================
+# QUICK LAUNDRY ORDER EVENTS SETUP
+# Creates the order status change log read by
+# the status feed
+# ============================================
+
+from BackEnd.utils.database import Database
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def create_order_events_table():
+    """Create order events tables if they don't exist"""
+    
+    create_table = """
+    CREATE TABLE IF NOT EXISTS order_events (
+        id BIGINT AUTO_INCREMENT PRIMARY KEY,
+        user_id INT NOT NULL,
+        seq BIGINT NOT NULL,
+        scope VARCHAR(20) NOT NULL,
+        order_id INT NOT NULL,
+        old_status VARCHAR(20),
+        new_status VARCHAR(20) NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE KEY uk_user_seq (user_id, seq),
+        INDEX idx_created_at (created_at)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """
+    
+    # Per-user event counter; its row lock orders a user's events by commit
+    create_sequences_table = """
+    CREATE TABLE IF NOT EXISTS order_event_sequences (
+        user_id INT PRIMARY KEY,
+        last_seq BIGINT NOT NULL DEFAULT 0
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """
+    
+    try:
+        with Database.get_connection() as connection:
+            cursor = connection.cursor()
+            
+            # The first version of the log had no seq column. Its rows only
+            # feed short-lived client cursors, so it is rebuilt, not migrated
+            cursor.execute("SHOW TABLES LIKE 'order_events'")
+            if cursor.fetchall():
+                cursor.execute("SHOW COLUMNS FROM order_events LIKE 'seq'")
+                if not cursor.fetchall():
+                    cursor.execute("DROP TABLE order_events")
+                    logger.warning("Order events table rebuilt with per-user seq cursors")
+            
+            cursor.execute(create_table)
+            logger.info("Order events table created/verified")
+            
+            cursor.execute(create_sequences_table)
+            logger.info("Order event sequences table created/verified")
+            
+            connection.commit()
+            cursor.close()
+            
+            return True
+    
+    except Exception as e:
+        logger.error(f"Error creating order events table: {e}")
+        return False
+
+
+def initialize_order_events_database():
+    """Initialize order events table"""
+    try:
+        logger.info("Initializing order events...")
+        
+        if not create_order_events_table():
+            logger.error("Failed to create order events table")
+            return False
+        
+        logger.info("Order events initialized successfully")
+        return True
+    
+    except Exception as e:
+        logger.error(f"Error initializing order events: {e}")
+        return False
\ No newline at end of file
@@ -0,0 +1,73 @@
+# ============================================
+# QUICK LAUNDRY ORDER STATISTICS SETUP
+# Creates the order_stats rollup and fills it
+# from the order tables on first run
+# ============================================
+
+from BackEnd.utils.database import Database
+from BackEnd.models.order_stats import OrderStats
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def create_order_stats_table():
+    """Create order statistics table if it doesn't exist"""
+    
+    create_table = """
+    CREATE TABLE IF NOT EXISTS order_stats (
+        scope VARCHAR(20) NOT NULL,
+        user_id INT NOT NULL,
+        total_orders INT NOT NULL DEFAULT 0,
+        pending_orders INT NOT NULL DEFAULT 0,
+        confirmed_orders INT NOT NULL DEFAULT 0,
+        processing_orders INT NOT NULL DEFAULT 0,
+        ready_orders INT NOT NULL DEFAULT 0,
+        delivered_orders INT NOT NULL DEFAULT 0,
+        completed_orders INT NOT NULL DEFAULT 0,
+        cancelled_orders INT NOT NULL DEFAULT 0,
+        total_spent DECIMAL(12, 2) NOT NULL DEFAULT 0.00,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        PRIMARY KEY (scope, user_id)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """
+    
+    try:
+        with Database.get_connection() as connection:
+            cursor = connection.cursor()
+            
+            cursor.execute(create_table)
+            logger.info("Order statistics table created/verified")
+            
+            cursor.execute("SELECT 1 FROM order_stats LIMIT 1")
+            is_empty = cursor.fetchone() is None
+            
+            connection.commit()
+            cursor.close()
+        
+        if is_empty:
+            # New rollup: the counters start from the existing orders
+            OrderStats.reconcile()
+        
+        return True
+    
+    except Exception as e:
+        logger.error(f"Error creating order statistics table: {e}")
+        return False
+
+
+def initialize_order_stats_database():
+    """Initialize order statistics table"""
+    try:
+        logger.info("Initializing order statistics...")
+        
+        if not create_order_stats_table():
+            logger.error("Failed to create order statistics table")
+            return False
+        
+        logger.info("Order statistics initialized successfully")
+        return True
+    
+    except Exception as e:
+        logger.error(f"Error initializing order statistics: {e}")
+        return False
\ No newline at end of file
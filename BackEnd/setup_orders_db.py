@@ -4,7 +4,9 @@
 # ============================================
 
 from BackEnd.utils.database import Database
+from BackEnd.models.order import parse_order_notes
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -47,6 +49,14 @@ def create_orders_table():
                 pickup_date DATETIME NULL,
                 notes TEXT,
                 
+                service_type VARCHAR(50) NULL,
+                delivery_address VARCHAR(500) NULL,
+                delivery_pincode CHAR(6) NULL,
+                contact_number VARCHAR(20) NULL,
+                urgent_items INT NULL,
+                normal_items INT NULL,
+                customer_notes TEXT NULL,
+                
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
                 
@@ -54,7 +64,10 @@ def create_orders_table():
                 INDEX idx_user_id (user_id),
                 INDEX idx_order_status (order_status),
                 INDEX idx_delivery_date (delivery_date),
-                INDEX idx_created_at (created_at)
+                INDEX idx_created_at (created_at),
+                INDEX idx_service_type (service_type, created_at),
+                INDEX idx_delivery_pincode (delivery_pincode, created_at),
+                INDEX idx_urgent_items (urgent_items)
             ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
         """
         
@@ -138,6 +151,177 @@ def create_orders_table():
                 pass
 
 
+# Typed order metadata that used to live only in the packed notes string
+ORDER_METADATA_COLUMNS = (
+    ('service_type', 'VARCHAR(50) NULL'),
+    ('delivery_address', 'VARCHAR(500) NULL'),
+    ('delivery_pincode', 'CHAR(6) NULL'),
+    ('contact_number', 'VARCHAR(20) NULL'),
+    ('urgent_items', 'INT NULL'),
+    ('normal_items', 'INT NULL'),
+    ('customer_notes', 'TEXT NULL')
+)
+
+ORDER_METADATA_INDEXES = (
+    ('idx_service_type', '(service_type, created_at)'),
+    ('idx_delivery_pincode', '(delivery_pincode, created_at)'),
+    ('idx_urgent_items', '(urgent_items)')
+)
+
+
+def add_order_metadata_columns():
+    """Add the typed metadata columns and indexes to orders, without locking it"""
+    connection = None
+    cursor = None
+    
+    try:
+        connection = Database.get_connection()
+        cursor = connection.cursor()
+        
+        cursor.execute("SHOW COLUMNS FROM orders")
+        existing_columns = {row[0] for row in cursor.fetchall()}
+        
+        missing_columns = [
+            f"ADD COLUMN {name} {definition}"
+            for name, definition in ORDER_METADATA_COLUMNS
+            if name not in existing_columns
+        ]
+        if missing_columns:
+            cursor.execute(f"ALTER TABLE orders {', '.join(missing_columns)}, ALGORITHM=INPLACE, LOCK=NONE")
+            logger.info(f"✓ Order metadata columns added: {len(missing_columns)}")
+        
+        cursor.execute("SHOW INDEX FROM orders")
+        existing_indexes = {row[2] for row in cursor.fetchall()}
+        
+        missing_indexes = [
+            f"ADD INDEX {name} {columns}"
+            for name, columns in ORDER_METADATA_INDEXES
+            if name not in existing_indexes
+        ]
+        if missing_indexes:
+            cursor.execute(f"ALTER TABLE orders {', '.join(missing_indexes)}, ALGORITHM=INPLACE, LOCK=NONE")
+            logger.info(f"✓ Order metadata indexes added: {len(missing_indexes)}")
+        
+        return True
+        
+    except Exception as e:
+        logger.error(f"✗ Error adding order metadata columns: {e}")
+        return False
+    
+    finally:
+        if cursor:
+            try:
+                cursor.close()
+            except:
+                pass
+        if connection:
+            try:
+                connection.close()
+            except:
+                pass
+
+
+def backfill_order_metadata(batch_size=1000, pause_seconds=0.05):
+    """
+    Fill the metadata columns of older orders by parsing their notes
+    
+    Walks the orders without a service_type in id order; each batch is
+    parsed in Python and written back with one UPDATE ... JOIN. Notes that
+    do not follow the packed format get service_type '' so later runs skip
+    them, which makes a finished backfill a single empty index lookup.
+    Run by the setup script and the maintenance scheduler.
+    Returns: number of orders backfilled
+    """
+    columns = [name for name, _ in ORDER_METADATA_COLUMNS]
+    last_id = 0
+    backfilled = 0
+    unparsed = 0
+    
+    try:
+        while True:
+            rows = Database.execute_query("""
+                SELECT id, notes FROM orders
+                WHERE id > %s AND service_type IS NULL
+                ORDER BY id
+                LIMIT %s
+            """, (last_id, batch_size), fetch='all') or []
+            
+            if not rows:
+                break
+            
+            last_id = rows[-1]['id']
+            parsed = []
+            unparsed_ids = []
+            
+            for row in rows:
+                metadata = parse_order_notes(row['notes'])
+                if metadata is None:
+                    unparsed_ids.append(row['id'])
+                    continue
+                parsed.append((row['id'],) + tuple(metadata[column] for column in columns))
+            
+            if parsed:
+                select = "SELECT %s AS id, " + ", ".join(f"%s AS {column}" for column in columns)
+                
+                try:
+                    Database.execute_query(f"""
+                        UPDATE orders o
+                        JOIN ({" UNION ALL ".join([select] * len(parsed))}) v ON v.id = o.id
+                        SET {', '.join(f"o.{column} = v.{column}" for column in columns)}
+                    """, tuple(value for row in parsed for value in row), fetch=None)
+                    backfilled += len(parsed)
+                
+                except Exception as e:
+                    # One row the columns reject must not stall the backfill
+                    # on this batch: retry row by row, failures count as unparsed
+                    logger.warning(f"Order metadata batch from order {parsed[0][0]} failed, retrying row by row: {e}")
+                    for row in parsed:
+                        try:
+                            Database.execute_query(f"""
+                                UPDATE orders o
+                                JOIN ({select}) v ON v.id = o.id
+                                SET {', '.join(f"o.{column} = v.{column}" for column in columns)}
+                            """, row, fetch=None)
+                            backfilled += 1
+                        except Exception:
+                            unparsed_ids.append(row[0])
+            
+            if unparsed_ids:
+                Database.execute_query(f"""
+                    UPDATE orders SET service_type = ''
+                    WHERE id IN ({', '.join(['%s'] * len(unparsed_ids))}) AND service_type IS NULL
+                """, tuple(unparsed_ids), fetch=None)
+                unparsed += len(unparsed_ids)
+            
+            if len(rows) < batch_size:
+                break
+            
+            if pause_seconds:
+                time.sleep(pause_seconds)
+    
+    except Exception as e:
+        logger.error(f"✗ Error backfilling order metadata after {backfilled} orders: {e}")
+        return backfilled
+    
+    if backfilled or unparsed:
+        logger.info(f"✓ Order metadata backfilled for {backfilled} orders ({unparsed} notes not parseable)")
+    return backfilled
+
+
+def migrate_order_metadata():
+    """Add the order metadata columns and backfill existing orders"""
+    try:
+        if not add_order_metadata_columns():
+            return False
+        
+        backfill_order_metadata()
+        return True
+        
+    except Exception as e:
+        logger.error(f"✗ Error migrating order metadata: {e}")
+        return False
+
+
 def initialize_orders_database():
     """Initialize the orders database"""
     try:
@@ -145,7 +329,7 @@ def initialize_orders_database():
         logger.info("INITIALIZING ORDERS DATABASE")
         logger.info("="*60)
         
-        success = create_orders_table()
+        success = create_orders_table() and migrate_order_metadata()
         
         if success:
             logger.info("="*60)
@@ -2,5 +2,7 @@
 
 from .database import Database
 from .validators import Validators
+from .pagination import Pagination
+from .export import Export
 
-__all__ = ['Database', 'Validators']
\ No newline at end of file
+__all__ = ['Database', 'Validators', 'Pagination', 'Export']
\ No newline at end of file
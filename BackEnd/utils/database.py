@@ -5,16 +5,265 @@
 
 import mysql.connector
 from mysql.connector import pooling
+from flask import g, has_request_context, jsonify
+from collections import OrderedDict
+import threading
+import weakref
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+# Upper bounds (ms) of the checkout wait-time histogram buckets
+WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+# Statements that execute_query commits after running
+WRITE_PREFIXES = ('INSERT', 'UPDATE', 'DELETE')
+
+# Cap on remembered query classifications (dynamic SQL is not cached past this)
+STATEMENT_KIND_CACHE_SIZE = 4096
+
+
+class TrackedConnection:
+    """
+    Pool connection wrapper that hands its slot back exactly once on close()
+    
+    Everything else is delegated to the underlying connection, so callers
+    use it exactly like a mysql-connector connection.
+    """
+    
+    def __init__(self, connection, overflow=False):
+        self._connection = connection
+        self._overflow = overflow
+        self._released = False
+    
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+    
+    def close(self):
+        """Return the connection to the pool (overflow connections are closed)"""
+        if self._released:
+            return
+        self._released = True
+        try:
+            self._connection.close()
+        finally:
+            Database._release_slot()
+
+
+class StatementCache:
+    """
+    LRU of prepared cursors for one database session
+    
+    mysql-connector only reuses a prepared statement when it is handed the
+    same str object it prepared, so the first query object seen is kept and
+    returned alongside its cursor.
+    """
+    
+    def __init__(self, connection, capacity):
+        self.connection_id = connection.connection_id
+        self._connection = connection
+        self._capacity = capacity
+        self._entries = OrderedDict()  # query -> (query, cursor)
+    
+    def get(self, query):
+        """Returns (query, cursor) for query, preparing it on first use"""
+        entry = self._entries.get(query)
+        
+        if entry is not None:
+            self._entries.move_to_end(query)
+            Database._statement_stats['hits'] += 1
+            return entry
+        
+        entry = (query, self._connection.cursor(prepared=True, dictionary=True))
+        self._entries[query] = entry
+        Database._statement_stats['prepares'] += 1
+        
+        if len(self._entries) > self._capacity:
+            _, (_, stale) = self._entries.popitem(last=False)
+            Database._statement_stats['evictions'] += 1
+            try:
+                stale.close()
+            except:
+                pass
+        
+        return entry
+    
+    def discard(self, query):
+        """Drop a statement after an error so it is re-prepared next time"""
+        entry = self._entries.pop(query, None)
+        if entry:
+            try:
+                entry[1].close()
+            except:
+                pass
+
+
+class RequestUnitOfWork:
+    """
+    One pooled connection shared by every get_connection() call in a request
+    
+    Model code keeps its usual commit()/rollback()/close() calls; they are
+    routed through RequestConnection handles so the transaction commits once,
+    when the request finishes.
+    """
+    
+    def __init__(self, connection):
+        self.connection = connection
+        self.pending = False  # a commit() was deferred to the end of the request
+        self.on_commit = []   # callbacks run once the request transaction commits
+        self.on_rollback = [] # callbacks run if it rolls back (or fails to commit) instead
+        self._savepoints = 0
+    
+    def handle(self):
+        """Hand out a connection handle for one model/service call"""
+        return RequestConnection(self)
+    
+    def savepoint(self):
+        """Set a new savepoint on the request transaction and return its name"""
+        self._savepoints += 1
+        savepoint = f"uow_{self._savepoints}"
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(f"SAVEPOINT {savepoint}")
+        finally:
+            cursor.close()
+        return savepoint
+    
+    def finish(self, commit):
+        """Commit (or roll back) the request transaction"""
+        committed = False
+        try:
+            if commit and self.pending:
+                self.connection.commit()
+                committed = True
+            else:
+                self.connection.rollback()
+        finally:
+            self.pending = False
+            self._run_callbacks(committed)
+    
+    def _run_callbacks(self, committed):
+        """Run the on_commit or the on_rollback callbacks and drop both lists"""
+        callbacks = self.on_commit if committed else self.on_rollback
+        self.on_commit, self.on_rollback = [], []
+        
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"{'on_commit' if committed else 'on_rollback'} callback failed: {e}")
+    
+    def release(self):
+        """Roll back anything left open and return the connection to the pool"""
+        try:
+            if self.pending:
+                self.connection.rollback()
+        except Exception as e:
+            logger.error(f"Rollback error while releasing request connection: {e}")
+        finally:
+            self.pending = False
+            self._run_callbacks(False)
+            self.connection.close()
+
+
+class RequestConnection:
+    """
+    Connection handle bound to a RequestUnitOfWork
+    
+    If earlier calls already have deferred writes, a savepoint is set before
+    this handle's first possible write, so its rollback() undoes only its
+    own work. Read-only calls never set one.
+    """
+    
+    def __init__(self, unit):
+        self._unit = unit
+        self._savepoint = None
+        self._written = False  # a cursor was opened that may have written
+    
+    def __getattr__(self, name):
+        return getattr(self._unit.connection, name)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is not None:
+            self.rollback()
+        return False
+    
+    def _before_write(self):
+        if self._written:
+            return
+        self._written = True
+        if self._unit.pending:
+            self._savepoint = self._unit.savepoint()
+    
+    def cursor(self, *args, **kwargs):
+        """Cursor for model code, which may write through it"""
+        self._before_write()
+        return self._unit.connection.cursor(*args, **kwargs)
+    
+    def read_cursor(self, *args, **kwargs):
+        """Cursor for a statement known not to write (no savepoint)"""
+        return self._unit.connection.cursor(*args, **kwargs)
+    
+    def commit(self):
+        """Deferred: the request transaction commits once at the end"""
+        self._unit.pending = True
+    
+    def rollback(self):
+        """Undo this call's work (everything, if no earlier writes are pending)"""
+        if not self._written and self._unit.pending:
+            return  # Nothing of this call's to undo; keep the earlier writes
+        
+        if self._savepoint:
+            cursor = None
+            try:
+                cursor = self._unit.connection.cursor()
+                cursor.execute(f"ROLLBACK TO SAVEPOINT {self._savepoint}")
+                return
+            except mysql.connector.Error as err:
+                # Savepoint lost (e.g. the server rolled back on deadlock)
+                logger.warning(f"Savepoint rollback failed, rolling back request transaction: {err}")
+            finally:
+                if cursor:
+                    try:
+                        cursor.close()
+                    except:
+                        pass
+        
+        self._unit.connection.rollback()
+        self._unit.pending = False
+    
+    def close(self):
+        """No-op: the connection is released when the request ends"""
+        pass
+
 
 class Database:
     """Database connection manager with connection pooling"""
     
     _connection_pool = None
     _config = None
+    _pool_settings = None
+    _pool_slots = None
+    _metrics_lock = threading.Lock()
+    _metrics = None
+    _request_scoped = False
+    _use_prepared = False
+    _statement_cache_size = 64
+    _statement_caches = weakref.WeakKeyDictionary()
+    _statement_lock = threading.Lock()
+    _statement_stats = {'hits': 0, 'prepares': 0, 'evictions': 0}
+    _write_statements = {}
     
     @classmethod
     def initialize(cls, config):
@@ -35,15 +284,37 @@ class Database:
                 'raise_on_warnings': True
             }
             
+            pool_size = config.DB_POOL_SIZE
+            if pool_size > pooling.CNX_POOL_MAXSIZE:
+                logger.warning(f"DB_POOL_SIZE {pool_size} exceeds the connector limit, using {pooling.CNX_POOL_MAXSIZE}")
+                pool_size = pooling.CNX_POOL_MAXSIZE
+            
+            cls._pool_settings = {
+                'pool_size': pool_size,
+                'max_overflow': max(0, config.DB_POOL_MAX_OVERFLOW),
+                'timeout': config.DB_POOL_TIMEOUT,
+                'reset_session': config.DB_POOL_RESET_SESSION
+            }
+            
             # Create connection pool
             cls._connection_pool = pooling.MySQLConnectionPool(
                 pool_name="laundry_pool",
-                pool_size=5,
-                pool_reset_session=True,
+                pool_size=pool_size,
+                pool_reset_session=cls._pool_settings['reset_session'],
                 **cls._config
             )
             
-            logger.info(f"Database connection pool initialized for {config.DB_NAME}")
+            cls._use_prepared = config.DB_USE_PREPARED_STATEMENTS
+            cls._statement_cache_size = config.DB_STATEMENT_CACHE_SIZE
+            
+            # One slot per pooled connection plus the overflow allowance;
+            # checkouts block on this instead of failing when the pool is empty
+            cls._pool_slots = threading.BoundedSemaphore(pool_size + cls._pool_settings['max_overflow'])
+            cls.reset_pool_stats()
+            
+            logger.info(f"Database connection pool initialized for {config.DB_NAME} "
+                        f"(size={pool_size}, overflow={cls._pool_settings['max_overflow']}, "
+                        f"timeout={cls._pool_settings['timeout']}s)")
             
             # Test connection
             connection = cls.get_connection()
@@ -61,26 +332,159 @@ class Database:
             return False
     
     @classmethod
-    def get_connection(cls):
+    def init_app(cls, app):
+        """
+        Enable request-scoped connections when DB_REQUEST_SCOPED_CONNECTIONS is set
+        
+        Inside a request, every get_connection() call then shares one pooled
+        connection and one transaction. It is committed before the response
+        is sent (rolled back for 5xx responses) and released on teardown.
         """
-        Get a database connection from the pool
+        cls._request_scoped = bool(app.config.get('DB_REQUEST_SCOPED_CONNECTIONS', False))
+        
+        if not cls._request_scoped:
+            return
+        
+        app.after_request(cls._commit_request)
+        app.teardown_request(cls._teardown_request)
+        logger.info("Request-scoped database connections enabled")
+    
+    @staticmethod
+    def _commit_request(response):
+        """after_request: commit the request transaction before responding"""
+        unit = g.get('_db_unit_of_work')
+        
+        if unit is None:
+            return response
+        
+        try:
+            unit.finish(commit=response.status_code < 500)
+        except Exception as e:
+            logger.exception(f"Failed to commit request transaction: {e}")
+            # after_request must hand back a response object, not a (body, status) tuple
+            response = jsonify({
+                'success': False,
+                'message': 'Failed to save changes'
+            })
+            response.status_code = 500
+        
+        return response
+    
+    @staticmethod
+    def _teardown_request(exc):
+        """teardown_request: release the request connection back to the pool"""
+        unit = g.pop('_db_unit_of_work', None)
+        
+        if unit is not None:
+            try:
+                unit.release()
+            except Exception as e:
+                logger.error(f"Error releasing request connection: {e}")
+    
+    @classmethod
+    def has_pending_writes(cls):
+        """True inside a request whose transaction has uncommitted writes"""
+        unit = g.get('_db_unit_of_work') if cls._request_scoped and has_request_context() else None
+        return unit is not None and unit.pending
+    
+    @classmethod
+    def on_commit(cls, callback):
+        """
+        Run callback once the current request transaction has committed
+        
+        Outside a request-scoped transaction the work is already committed,
+        so callback runs immediately.
+        """
+        unit = g.get('_db_unit_of_work') if cls._request_scoped and has_request_context() else None
+        
+        if unit is not None and unit.pending:
+            unit.on_commit.append(callback)
+        else:
+            callback()
+    
+    @classmethod
+    def on_rollback(cls, callback):
+        """
+        Run callback if the current request transaction rolls back or fails
+        to commit
+        
+        Outside a request-scoped transaction (or before any deferred write)
+        there is nothing left to roll back, so callback is not registered.
+        """
+        unit = g.get('_db_unit_of_work') if cls._request_scoped and has_request_context() else None
+        
+        if unit is not None and unit.pending:
+            unit.on_rollback.append(callback)
+    
+    @classmethod
+    def get_connection(cls, scoped=True):
+        """
+        Get a database connection
+        
+        Inside a request with request-scoped connections enabled, this is a
+        handle on the request's shared connection; otherwise (or with
+        scoped=False) it is a fresh checkout from the pool.
         
         Returns:
-            MySQL connection object (NOT a context manager)
+            Connection object (NOT a context manager)
+        """
+        if scoped and cls._request_scoped and has_request_context():
+            unit = g.get('_db_unit_of_work')
+            if unit is None:
+                unit = RequestUnitOfWork(cls._checkout())
+                g._db_unit_of_work = unit
+            return unit.handle()
+        
+        return cls._checkout()
+    
+    @classmethod
+    def _checkout(cls):
+        """
+        Check a connection out of the pool
+        
+        Waits up to DB_POOL_TIMEOUT seconds for a free slot. When every pooled
+        connection is checked out but overflow slots remain, a standalone
+        connection is opened and closed again on release.
+        
+        Returns:
+            TrackedConnection wrapping a MySQL connection
         """
         try:
             if cls._connection_pool is None:
                 logger.error("Database pool not initialized")
                 raise Exception("Database pool not initialized. Call Database.initialize() first")
             
-            # Get connection from pool
-            connection = cls._connection_pool.get_connection()
+            started = time.perf_counter()
             
-            if connection.is_connected():
-                return connection
-            else:
-                logger.error("Got disconnected connection from pool")
-                raise Exception("Failed to get active connection")
+            if not cls._pool_slots.acquire(blocking=False):
+                cls._increment('exhausted')
+                if not cls._pool_slots.acquire(timeout=cls._pool_settings['timeout']):
+                    cls._increment('timeouts')
+                    logger.error(f"Timed out after {cls._pool_settings['timeout']}s waiting for a database connection")
+                    raise mysql.connector.errors.PoolError("Timed out waiting for a database connection")
+            
+            overflow = False
+            try:
+                # Get connection from pool
+                try:
+                    connection = cls._connection_pool.get_connection()
+                except mysql.connector.errors.PoolError:
+                    connection = mysql.connector.connect(**cls._config)
+                    overflow = True
+                
+                if not connection.is_connected():
+                    logger.error("Got disconnected connection from pool")
+                    try:
+                        connection.close()
+                    except:
+                        pass
+                    raise Exception("Failed to get active connection")
+            except:
+                cls._pool_slots.release()
+                raise
+            
+            cls._record_checkout((time.perf_counter() - started) * 1000, overflow)
+            return TrackedConnection(connection, overflow)
                 
         except mysql.connector.Error as err:
             logger.error(f"Error getting database connection: {err}")
@@ -89,6 +493,122 @@ class Database:
             logger.exception(f"Unexpected error getting connection: {e}")
             raise
     
+    @classmethod
+    def _increment(cls, key):
+        with cls._metrics_lock:
+            cls._metrics[key] += 1
+    
+    @classmethod
+    def _record_checkout(cls, wait_ms, overflow):
+        """Update checkout counters and the wait-time histogram"""
+        with cls._metrics_lock:
+            metrics = cls._metrics
+            metrics['checkouts'] += 1
+            if overflow:
+                metrics['overflow_checkouts'] += 1
+            metrics['in_use'] += 1
+            metrics['peak_in_use'] = max(metrics['peak_in_use'], metrics['in_use'])
+            metrics['wait_ms_total'] += wait_ms
+            metrics['wait_ms_max'] = max(metrics['wait_ms_max'], wait_ms)
+            
+            for bound in WAIT_BUCKETS_MS:
+                if wait_ms <= bound:
+                    metrics['wait_histogram_ms'][f'le_{bound}'] += 1
+                    break
+            else:
+                metrics['wait_histogram_ms']['gt_5000'] += 1
+    
+    @classmethod
+    def _release_slot(cls):
+        """Called by TrackedConnection.close()"""
+        with cls._metrics_lock:
+            cls._metrics['in_use'] -= 1
+        cls._pool_slots.release()
+    
+    @classmethod
+    def reset_pool_stats(cls):
+        """Reset pool counters (the in-use gauge is preserved)"""
+        with cls._metrics_lock:
+            in_use = cls._metrics['in_use'] if cls._metrics else 0
+            histogram = {f'le_{bound}': 0 for bound in WAIT_BUCKETS_MS}
+            histogram['gt_5000'] = 0
+            cls._metrics = {
+                'checkouts': 0,
+                'overflow_checkouts': 0,
+                'exhausted': 0,
+                'timeouts': 0,
+                'in_use': in_use,
+                'peak_in_use': in_use,
+                'wait_ms_total': 0.0,
+                'wait_ms_max': 0.0,
+                'wait_histogram_ms': histogram
+            }
+    
+    @classmethod
+    def get_pool_stats(cls):
+        """
+        Snapshot of pool settings and checkout metrics
+        
+        exhausted counts checkouts that found no free slot and had to wait;
+        timeouts counts those that gave up after DB_POOL_TIMEOUT.
+        """
+        if cls._metrics is None:
+            return {'initialized': False}
+        
+        with cls._metrics_lock:
+            metrics = dict(cls._metrics)
+            metrics['wait_histogram_ms'] = dict(cls._metrics['wait_histogram_ms'])
+        
+        checkouts = metrics['checkouts']
+        metrics['wait_ms_avg'] = round(metrics['wait_ms_total'] / checkouts, 3) if checkouts else 0.0
+        metrics['wait_ms_total'] = round(metrics['wait_ms_total'], 3)
+        metrics['wait_ms_max'] = round(metrics['wait_ms_max'], 3)
+        
+        return {
+            'initialized': cls._connection_pool is not None,
+            'settings': dict(cls._pool_settings),
+            'metrics': metrics,
+            'prepared_statements': {
+                'enabled': cls._use_prepared,
+                **cls._statement_stats
+            }
+        }
+    
+    @classmethod
+    def _is_write(cls, query):
+        """Whether execute_query must commit after query (classified once per query text)"""
+        is_write = cls._write_statements.get(query)
+        
+        if is_write is None:
+            is_write = query.lstrip()[:6].upper().startswith(WRITE_PREFIXES)
+            if len(cls._write_statements) < STATEMENT_KIND_CACHE_SIZE:
+                cls._write_statements[query] = is_write
+        
+        return is_write
+    
+    @classmethod
+    def _statement_cache(cls, connection):
+        """
+        Prepared-statement cache for the session behind connection
+        
+        pool_reset_session deallocates server-side statements when a
+        connection goes back to the pool, so with reset enabled the cache
+        lives for one checkout; otherwise it follows the physical connection
+        (and is rebuilt if that connection reconnects).
+        """
+        lease = connection._unit.connection if isinstance(connection, RequestConnection) else connection
+        physical = lease._connection
+        physical = getattr(physical, '_cnx', physical)  # unwrap PooledMySQLConnection
+        owner = lease if cls._pool_settings['reset_session'] else physical
+        
+        with cls._statement_lock:
+            cache = cls._statement_caches.get(owner)
+            if cache is None or cache.connection_id != physical.connection_id:
+                cache = StatementCache(physical, cls._statement_cache_size)
+                cls._statement_caches[owner] = cache
+        
+        return cache
+    
     @classmethod
     def execute_query(cls, query, params=None, fetch='all'):
         """
@@ -101,44 +621,217 @@ class Database:
             
         Returns:
             Query results or None
+        
+        With DB_USE_PREPARED_STATEMENTS enabled, queries with positional
+        params run as cached server-side prepared statements.
         """
         connection = None
         cursor = None
+        statements = None
         
         try:
             connection = cls.get_connection()
-            cursor = connection.cursor(dictionary=True)
+            is_write = cls._is_write(query)
             
-            if params:
-                cursor.execute(query, params)
+            # Reads through a request handle skip its savepoint
+            if isinstance(connection, RequestConnection):
+                if is_write:
+                    connection._before_write()
+                open_cursor = connection.cursor if is_write else connection.read_cursor
             else:
-                cursor.execute(query)
+                open_cursor = connection.cursor
             
-            if fetch == 'one':
-                result = cursor.fetchone()
-            elif fetch == 'all':
-                result = cursor.fetchall()
+            if cls._use_prepared and params and isinstance(params, (tuple, list)):
+                statements = cls._statement_cache(connection)
+                query, cursor = statements.get(query)
+                cursor.execute(query, params)
             else:
-                result = None
+                cursor = open_cursor(dictionary=True)
+                
+                if params:
+                    cursor.execute(query, params)
+                else:
+                    cursor.execute(query)
+            
+            result = None
+            
+            if cursor.with_rows:
+                if fetch == 'one':
+                    result = cursor.fetchone()
+                    # Read to the end so the connection is free for the next statement
+                    cursor.fetchall()
+                elif fetch == 'all':
+                    result = cursor.fetchall()
+                else:
+                    cursor.fetchall()
             
             # Commit for INSERT/UPDATE/DELETE
-            if query.strip().upper().startswith(('INSERT', 'UPDATE', 'DELETE')):
+            if is_write:
                 connection.commit()
             
             return result
             
         except mysql.connector.Error as err:
             logger.error(f"Query execution error: {err}")
+            if statements:
+                statements.discard(query)
+                cursor = None
             if connection:
                 connection.rollback()
             raise
             
         finally:
-            if cursor:
+            if cursor and statements is None:
                 cursor.close()
             if connection:
                 connection.close()
     
+    @classmethod
+    def delete_in_chunks(cls, table, where, params=(), chunk_size=1000, pause_seconds=0.05):
+        """
+        Delete matching rows chunk_size at a time
+        
+        Each DELETE ... LIMIT runs in its own short transaction on a private
+        connection, with a pause between chunks, so a large purge never holds
+        locks over a wide range or starves request traffic.
+        
+        Returns:
+            Number of rows deleted
+        """
+        query = f"DELETE FROM {table} WHERE {where} LIMIT %s"
+        params = tuple(params) + (chunk_size,)
+        deleted = 0
+        
+        while True:
+            connection = cls.get_connection(scoped=False)
+            cursor = None
+            
+            try:
+                cursor = connection.cursor()
+                cursor.execute(query, params)
+                count = cursor.rowcount
+                connection.commit()
+            except mysql.connector.Error as err:
+                logger.error(f"Chunked delete on {table} failed after {deleted} rows: {err}")
+                connection.rollback()
+                raise
+            finally:
+                if cursor:
+                    cursor.close()
+                connection.close()
+            
+            deleted += count
+            
+            if count < chunk_size:
+                return deleted
+            
+            if pause_seconds:
+                time.sleep(pause_seconds)
+    
+    @classmethod
+    def update_in_chunks(cls, table, assignments, where, params=(), chunk_size=1000, pause_seconds=0.05):
+        """
+        Update matching rows chunk_size at a time (online backfills)
+        
+        Same short-transaction pattern as delete_in_chunks; `where` must stop
+        matching a row once it is updated or the loop never ends.
+        
+        Returns:
+            Number of rows updated
+        """
+        query = f"UPDATE {table} SET {assignments} WHERE {where} LIMIT %s"
+        params = tuple(params) + (chunk_size,)
+        updated = 0
+        
+        while True:
+            connection = cls.get_connection(scoped=False)
+            cursor = None
+            
+            try:
+                cursor = connection.cursor()
+                cursor.execute(query, params)
+                count = cursor.rowcount
+                connection.commit()
+            except mysql.connector.Error as err:
+                logger.error(f"Chunked update on {table} failed after {updated} rows: {err}")
+                connection.rollback()
+                raise
+            finally:
+                if cursor:
+                    cursor.close()
+                connection.close()
+            
+            updated += count
+            
+            if count < chunk_size:
+                return updated
+            
+            if pause_seconds:
+                time.sleep(pause_seconds)
+    
+    @classmethod
+    def open_dedicated_connection(cls):
+        """
+        Open a connection outside the pool (caller closes it)
+        
+        For long-lived sessions such as lock holders that should not tie up
+        a pool slot.
+        """
+        if cls._config is None:
+            raise Exception("Database pool not initialized. Call Database.initialize() first")
+        
+        return mysql.connector.connect(**cls._config)
+    
+    @classmethod
+    def stream_query(cls, query, params=None, batch_size=1000):
+        """
+        Stream a SELECT through an unbuffered cursor
+        
+        Rows are pulled from the server batch_size at a time, so memory
+        stays flat however large the result set is. The connection is held
+        until the generator is exhausted or closed.
+        
+        Yields:
+            Row dictionaries
+        """
+        connection = None
+        cursor = None
+        exhausted = False
+        
+        try:
+            # Always a dedicated connection: the stream outlives the request transaction
+            connection = cls._checkout()
+            cursor = connection.cursor(dictionary=True, buffered=False)
+            cursor.execute(query, params)
+            
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+            
+            exhausted = True
+            
+        finally:
+            if cursor and exhausted:
+                try:
+                    cursor.close()
+                except:
+                    pass
+            if connection:
+                if not exhausted:
+                    # Abandoned mid-stream (e.g. client disconnected): drop the
+                    # socket instead of draining the remaining rows. The pool
+                    # reconnects it on the next checkout.
+                    try:
+                        connection.disconnect()
+                    except:
+                        pass
+                try:
+                    connection.close()
+                except:
+                    pass
+    
     @classmethod
     def test_connection(cls):
         """
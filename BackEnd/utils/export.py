@@ -0,0 +1,87 @@
+# ============================================
+# EXPORT HELPERS
+# Streams row iterators as NDJSON or CSV responses
+# ============================================
+
+from flask import Response, stream_with_context
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+import json
+import csv
+import io
+
+EXPORT_FORMATS = ('ndjson', 'csv')
+
+
+class Export:
+    """Generator-backed export responses for large result sets"""
+    
+    # Rows written per chunk handed to the WSGI server
+    CHUNK_ROWS = 500
+    
+    @staticmethod
+    def _serialize(value):
+        """Convert DB values to JSON/CSV friendly scalars"""
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return float(value)
+        if isinstance(value, timedelta):
+            return str(value)
+        return value
+    
+    @staticmethod
+    def ndjson(rows):
+        """Yield rows as newline-delimited JSON, CHUNK_ROWS at a time"""
+        chunk = []
+        for row in rows:
+            chunk.append(json.dumps({k: Export._serialize(v) for k, v in row.items()}))
+            if len(chunk) >= Export.CHUNK_ROWS:
+                yield '\n'.join(chunk) + '\n'
+                chunk = []
+        if chunk:
+            yield '\n'.join(chunk) + '\n'
+    
+    @staticmethod
+    def csv(rows, fieldnames):
+        """Yield rows as CSV with a header line, CHUNK_ROWS at a time"""
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=fieldnames, extrasaction='ignore')
+        writer.writeheader()
+        count = 0
+        for row in rows:
+            writer.writerow({k: Export._serialize(v) for k, v in row.items()})
+            count += 1
+            if count >= Export.CHUNK_ROWS:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+                count = 0
+        yield buffer.getvalue()
+    
+    @staticmethod
+    def response(rows, export_format, filename, fieldnames):
+        """
+        Build a streaming response for an iterator of row dicts
+        
+        Args:
+            rows: Iterator of dicts (consumed lazily while the response is sent)
+            export_format: 'ndjson' or 'csv'
+            filename: Download filename without extension
+            fieldnames: Column order for CSV output
+        """
+        if export_format == 'csv':
+            body = Export.csv(rows, fieldnames)
+            mimetype = 'text/csv'
+        else:
+            body = Export.ndjson(rows)
+            mimetype = 'application/x-ndjson'
+        
+        return Response(
+            stream_with_context(body),
+            mimetype=mimetype,
+            headers={
+                'Content-Disposition': f'attachment; filename="{filename}.{export_format}"',
+                'X-Accel-Buffering': 'no'
+            }
+        )
\ No newline at end of file
@@ -0,0 +1,65 @@
+# ============================================
+# PAGINATION HELPERS
+# Opaque keyset cursors over (created_at, id)
+# ============================================
+
+from datetime import datetime
+import base64
+
+
+class Pagination:
+    """Keyset pagination helpers for listings ordered by created_at DESC, id DESC"""
+    
+    DEFAULT_PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 500
+    
+    @staticmethod
+    def page_size(limit):
+        """Clamp a requested page size to [1, MAX_PAGE_SIZE]"""
+        if limit is None:
+            return Pagination.DEFAULT_PAGE_SIZE
+        return max(1, min(int(limit), Pagination.MAX_PAGE_SIZE))
+    
+    @staticmethod
+    def encode_cursor(created_at, row_id):
+        """
+        Encode the last row of a page as an opaque cursor
+        
+        Args:
+            created_at: datetime (or ISO string) of the last row
+            row_id: id of the last row
+        
+        Returns:
+            URL-safe cursor string
+        """
+        if hasattr(created_at, 'isoformat'):
+            created_at = created_at.isoformat()
+        raw = f"{created_at}|{row_id}".encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+    
+    @staticmethod
+    def decode_cursor(cursor):
+        """
+        Decode a cursor produced by encode_cursor
+        
+        Returns:
+            Tuple (created_at: datetime, row_id: int)
+        
+        Raises:
+            ValueError: if the cursor is malformed
+        """
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            raw = base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8')
+            created_at, row_id = raw.rsplit('|', 1)
+            return datetime.fromisoformat(created_at), int(row_id)
+        except (ValueError, UnicodeError) as e:
+            raise ValueError('Invalid cursor') from e
+    
+    @staticmethod
+    def next_cursor(rows, limit):
+        """Cursor for the page after rows, or None when rows was the last page"""
+        if not limit or len(rows) < limit:
+            return None
+        last = rows[-1]
+        return Pagination.encode_cursor(last['created_at'], last['id'])
\ No newline at end of file
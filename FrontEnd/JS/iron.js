@@ -546,6 +546,13 @@ document.addEventListener('DOMContentLoaded', () => {
         const user = getCurrentUser();
         console.log('User logged in:', user?.email || 'Unknown');
         showNotification('Welcome back! Ready to place your order.', 'info');
+        
+        // Live order status updates
+        if (window.OrderStatusFeed) {
+            OrderStatusFeed.follow(API_CONFIG.baseURL, event => {
+                showNotification(OrderStatusFeed.describe(event), 'info');
+            });
+        }
     } else {
         console.log('User not logged in');
     }
@@ -0,0 +1,72 @@
+/* ============================================
+   ORDER STATUS FEED
+   Follows the user's order status changes through
+   the /api/orders/events long poll
+   ============================================ */
+
+const OrderStatusFeed = (() => {
+    const MAX_RETRY_DELAY = 60000;
+    let running = false;
+
+    function sleep(ms) {
+        return new Promise(resolve => setTimeout(resolve, ms));
+    }
+
+    // Long poll loop: the server answers as soon as an event exists (or after
+    // its wait), and poll_after says how long to pause before the next call
+    // when it had no thread free to wait on
+    async function follow(baseURL, onEvent) {
+        if (running) return;
+        running = true;
+
+        let cursor = null;
+        let failures = 0;
+
+        while (running) {
+            const token = localStorage.getItem('access_token');
+            if (!token) break;
+
+            const query = cursor === null ? '' : `?after=${cursor}`;
+            let delay = 0;
+
+            try {
+                const response = await fetch(`${baseURL}/orders/events${query}`, {
+                    method: 'GET',
+                    headers: {
+                        'Authorization': `Bearer ${token}`
+                    }
+                });
+
+                if (response.status === 401) break;
+                if (!response.ok) throw new Error(`HTTP ${response.status}`);
+
+                const result = await response.json();
+                (result.events || []).forEach(event => onEvent(event));
+                cursor = result.cursor;
+                delay = (result.poll_after || 0) * 1000;
+                failures = 0;
+            } catch (error) {
+                failures += 1;
+                delay = Math.min(MAX_RETRY_DELAY, 2000 * 2 ** failures);
+                console.warn('Order status feed error:', error);
+            }
+
+            if (delay) await sleep(delay);
+        }
+
+        running = false;
+    }
+
+    function stop() {
+        running = false;
+    }
+
+    function describe(event) {
+        const kind = event.scope === 'dry_clean' ? 'Dry clean order' : 'Order';
+        return `${kind} #${event.order_id} is now ${event.new_status}`;
+    }
+
+    return { follow, stop, describe };
+})();
+
+window.OrderStatusFeed = OrderStatusFeed;
@@ -491,6 +491,15 @@ class PetrolWashService {
     });
   }
 
+  // Live order status updates
+  followOrderStatus() {
+    if (!this.checkAuth() || !window.OrderStatusFeed) return;
+
+    OrderStatusFeed.follow(this.API_URL, (event) => {
+      this.showNotification(OrderStatusFeed.describe(event), 'info');
+    });
+  }
+
   // Notifications
   showNotification(message, type = 'info') {
     const notification = document.getElementById('notification');
@@ -508,5 +517,6 @@ class PetrolWashService {
 // Initialize when page loads
 document.addEventListener('DOMContentLoaded', () => {
   window.petrolWashService = new PetrolWashService();
+  window.petrolWashService.followOrderStatus();
   console.log('Petrol Wash Service initialized');
 });
\ No newline at end of file